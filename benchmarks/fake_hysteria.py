@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+用于基准测试的 Hysteria2 替身程序
+
+接受与 hysteria 相同的命令行（client -c <配置文件> --log-level <级别>），读取配置中的 http.listen
+和 socks5.listen 并在这些地址上提供本地代理：HTTP CONNECT 和 SOCKS5 CONNECT 请求直接连接目标地址并双向转发，
+普通 HTTP 请求返回 200。开始监听后像 hysteria 一样在 stderr 输出一行 "connected to server" 日志。
+不连接任何远程服务器，只用来衡量本项目自身的启动、就绪探测和清理开销。
+
+环境变量：
+    FAKE_HYSTERIA_DELAY: 开始监听前的等待时间（秒），模拟握手耗时，默认为 0
+    FAKE_HYSTERIA_AUTH_FAIL: 设置为 1 时输出认证失败日志后退出，模拟服务器拒绝认证
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+
+
+async def pipe(reader, writer):
+    """单向转发数据，读到 EOF 后半关闭写端"""
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+        writer.write_eof()
+    except (OSError, RuntimeError):
+        writer.close()
+
+
+async def tunnel(writer, reader, host, port, success, failure):
+    """连接目标地址，成功后双向转发"""
+    try:
+        upstream_reader, upstream_writer = await asyncio.open_connection(host, int(port))
+    except (OSError, ValueError):
+        writer.write(failure)
+        writer.close()
+        return
+
+    writer.write(success)
+    await writer.drain()
+    await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+
+
+async def handle_socks5(reader, writer):
+    """处理一个 SOCKS5 代理请求（无认证）"""
+    try:
+        _, method_count = await reader.readexactly(2)
+        await reader.readexactly(method_count)
+        writer.write(b"\x05\x00")
+        _, command, _, atyp = await reader.readexactly(4)
+        if atyp == 1:
+            host = ".".join(str(b) for b in await reader.readexactly(4))
+        elif atyp == 3:
+            host = (await reader.readexactly((await reader.readexactly(1))[0])).decode("idna")
+        else:
+            host = ":".join((await reader.readexactly(16)).hex()[i:i + 4] for i in range(0, 32, 4))
+        port = int.from_bytes(await reader.readexactly(2), "big")
+    except (OSError, asyncio.IncompleteReadError):
+        writer.close()
+        return
+
+    reply = b"\x00\x00\x01\x00\x00\x00\x00\x00\x00"
+    if command != 1:
+        writer.write(b"\x05\x07" + reply)
+        writer.close()
+        return
+    await tunnel(writer, reader, host, port, b"\x05\x00" + reply, b"\x05\x05" + reply)
+
+
+async def handle(reader, writer):
+    """处理一个 HTTP 代理请求"""
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except (OSError, ValueError):
+        writer.close()
+        return
+
+    if method != "CONNECT":
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+        return
+
+    host, port = target.rsplit(":", 1)
+    await tunnel(
+        writer, reader, host, port,
+        b"HTTP/1.1 200 Connection established\r\n\r\n",
+        b"HTTP/1.1 502 Bad Gateway\r\n\r\n"
+    )
+
+
+async def main():
+    config_file = sys.argv[sys.argv.index("-c") + 1]
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    delay = float(os.environ.get("FAKE_HYSTERIA_DELAY", "0"))
+    if delay > 0:
+        time.sleep(delay)
+
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    if os.environ.get("FAKE_HYSTERIA_AUTH_FAIL") == "1":
+        print(f'{timestamp}\tFATAL\tfailed to initialize client\t{{"error": "authentication error, HTTP status code: 404"}}',
+              file=sys.stderr, flush=True)
+        sys.exit(1)
+
+    servers = []
+    for protocol, handler in (("http", handle), ("socks5", handle_socks5)):
+        if protocol in config:
+            host, port = config[protocol]["listen"].rsplit(":", 1)
+            servers.append(await asyncio.start_server(handler, host, int(port)))
+            print(f"{protocol.upper()} proxy server listening on {host}:{port}", flush=True)
+    print(f'{timestamp}\tINFO\tconnected to server\t{{"udpEnabled": true, "count": 1}}', file=sys.stderr, flush=True)
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+用于基准测试的 sing-box 替身程序
+
+接受与 sing-box 相同的命令行（run -c <配置文件>），为配置中的每个 http 和 socks 入站提供本地代理，
+代理行为与 fake_hysteria.py 相同。收到 SIGHUP 时重新读取配置，关闭已删除的入站并监听新增的入站，
+用来衡量单核心模式下本项目自身的启动、重新加载和清理开销。
+
+环境变量：
+    FAKE_HYSTERIA_DELAY: 开始监听前的等待时间（秒），模拟握手耗时，默认为 0
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+
+from fake_hysteria import handle, handle_socks5
+
+HANDLERS = {"http": handle, "socks": handle_socks5}
+
+
+def load_inbounds(config_file):
+    """读取配置中的入站，以 (类型, 地址, 端口) 为键"""
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return {
+        (inbound["type"], inbound.get("listen", "127.0.0.1"), int(inbound["listen_port"]))
+        for inbound in config.get("inbounds", [])
+        if inbound.get("type") in HANDLERS
+    }
+
+
+async def reload(config_file, servers):
+    """按配置文件同步监听的入站"""
+    wanted = load_inbounds(config_file)
+    for key in list(servers):
+        if key not in wanted:
+            servers.pop(key).close()
+    for key in wanted - set(servers):
+        inbound_type, host, port = key
+        try:
+            servers[key] = await asyncio.start_server(HANDLERS[inbound_type], host, port)
+        except OSError as e:
+            print(f"inbound {inbound_type} {host}:{port} failed: {e}", flush=True)
+    print(f"serving {len(servers)} inbounds", flush=True)
+
+
+async def main():
+    config_file = sys.argv[sys.argv.index("-c") + 1]
+
+    delay = float(os.environ.get("FAKE_HYSTERIA_DELAY", "0"))
+    if delay > 0:
+        time.sleep(delay)
+
+    servers = {}
+    await reload(config_file, servers)
+
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(reload(config_file, servers)))
+    loop.add_signal_handler(signal.SIGTERM, lambda: stop.done() or stop.set_result(None))
+    await stop
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
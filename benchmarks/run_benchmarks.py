@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基准测试脚本，衡量配置生成、批量连接和进程清理随节点数量的扩展情况
+
+每个规模依次执行：
+    1. generate_all_configs：从合成的订阅文件首次生成配置，再在订阅不变时重新生成一次
+    2. connect_batch：用替身程序 fake_hysteria.py 启动全部节点并等待就绪
+    3. cleanup_processes：终止全部节点
+
+结果（耗时、就绪耗时分位数、峰值 RSS、打开的文件描述符数量）以 JSON 保存到 benchmarks/results/，
+指定 --baseline 时与之前的结果对比并打印变化百分比。
+
+用法：
+    python benchmarks/run_benchmarks.py --sizes 10,100,1000
+    python benchmarks/run_benchmarks.py --sizes 100 --baseline benchmarks/results/<文件>.json
+    python benchmarks/run_benchmarks.py --sizes 100,1000 --single-core
+    python benchmarks/run_benchmarks.py --sizes 1000 --adaptive --max-parallel 256
+
+最后在新的解释器中测量开始连接前的启动耗时：connect 路径（懒加载，不导入 yaml）和旧入口每次都会执行的转换后连接，
+并测量日志解析器处理 debug 级别输出的单行耗时。
+"""
+
+import io
+import os
+import math
+import sys
+import json
+import time
+import shutil
+import asyncio
+import subprocess
+import argparse
+import platform
+import tempfile
+import contextlib
+from typing import Dict, Any, List, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from proxy_converter.proxy_converter import ProxyConverter
+from proxy_converter.hysteria2.client import Hysteria2Client
+from proxy_converter.utils.state_store import StateStore
+from proxy_converter.utils.log_events import Hysteria2LogParser
+
+FAKE_EXECUTABLE = os.path.join(BENCHMARK_DIR, "fake_hysteria.py")
+FAKE_SINGBOX_EXECUTABLE = os.path.join(BENCHMARK_DIR, "fake_singbox.py")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """计算分位数（最近秩法）
+
+    Args:
+        values: 数值列表
+        pct: 分位（0-100）
+
+    Returns:
+        分位数，列表为空时返回 None
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_kb() -> Optional[int]:
+    """获取当前进程的峰值 RSS（KB）"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def children_rss_kb(pids: List[int]) -> Optional[int]:
+    """汇总子进程当前的 RSS（KB），仅 Linux 可用"""
+    if not os.path.isdir("/proc"):
+        return None
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            pass
+    return total
+
+
+def open_fds() -> Optional[int]:
+    """统计当前进程打开的文件描述符数量"""
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir))
+    return None
+
+
+def raise_fd_limit() -> None:
+    """把文件描述符软限制提升到硬限制，大规模测试时每个子进程需要多个管道"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def write_subscription(path: str, size: int) -> None:
+    """生成包含 size 个 hysteria2 节点的订阅文件"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("proxies:\n")
+        for i in range(size):
+            f.write(
+                f"  - {{name: bench-{i}, type: hysteria2, server: node{i}.bench.invalid, "
+                f"port: {10000 + i % 50000}, password: bench-{i}}}\n"
+            )
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool):
+    """屏蔽被测代码的 print 输出"""
+    if enabled:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    else:
+        yield
+
+
+async def start_echo_server():
+    """启动本地回显服务器，作为就绪探测 CONNECT 的目标"""
+    async def handle(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def run_scenario(
+    size: int,
+    port_start: int,
+    probe_target: str,
+    max_parallel: int,
+    verbose: bool,
+    single_core: bool = False,
+    adaptive: bool = False
+) -> Dict[str, Any]:
+    """执行一个规模的全部场景
+
+    Args:
+        size: 节点数量
+        port_start: 节点 HTTP 端口的起始值
+        probe_target: 就绪探测的 CONNECT 目标
+        max_parallel: 连接并发数，0 表示不限制
+        verbose: 是否显示被测代码的输出
+        single_core: 是否使用单核心模式，由替身程序 fake_singbox.py 提供所有节点
+        adaptive: 是否使用自适应并发窗口启动节点，max_parallel 为窗口上限
+
+    Returns:
+        该规模的测试结果
+    """
+    work_dir = tempfile.mkdtemp(prefix=f"proxy_converter_bench_{size}_")
+    subscription = os.path.join(work_dir, "subscription.yaml")
+    output_dir = os.path.join(work_dir, "configs")
+    write_subscription(subscription, size)
+    result = {"size": size, "single_core": single_core}
+
+    try:
+        # 配置生成：首次生成和订阅不变时的增量生成
+        with quiet(not verbose):
+            start = time.perf_counter()
+            converter = ProxyConverter(subscription, use_cache=False)
+            config_files = await converter.generate_all_configs(
+                "hysteria2", output_dir, port_range=(port_start, 65535)
+            )
+            result["generate_cold"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            converter = ProxyConverter(subscription, use_cache=False)
+            await converter.generate_all_configs("hysteria2", output_dir, port_range=(port_start, 65535))
+            result["generate_warm"] = time.perf_counter() - start
+        result["configs"] = len(config_files)
+
+        state_store = StateStore(output_dir)
+        state_store.load()
+        selected = [state_store.config_path(port) for port in state_store.ports()]
+
+        fds_before = open_fds()
+        with quiet(not verbose):
+            client = Hysteria2Client(
+                config_dir=output_dir,
+                executable=FAKE_EXECUTABLE,
+                probe_target=probe_target,
+                max_restarts=0,
+                singbox_executable=FAKE_SINGBOX_EXECUTABLE,
+                single_core=single_core
+            )
+            try:
+                start = time.perf_counter()
+                results = await client.batch_connect(max_parallel=max_parallel, config_files=selected, adaptive=adaptive)
+                result["connect_wall"] = time.perf_counter() - start
+                if adaptive:
+                    result["window_trajectory"] = client.connection_manager.concurrency.trajectory
+
+                # 单核心模式下所有节点共用一个进程，只统计一次
+                pids = {info["process"].pid for info in client.process_manager.get_live_processes()}
+                result["children"] = len(pids)
+                result["children_rss_kb"] = children_rss_kb(pids)
+                result["open_fds"] = open_fds()
+            finally:
+                start = time.perf_counter()
+                await client.cleanup()
+                result["cleanup_wall"] = time.perf_counter() - start
+                shutdown = getattr(client.process_manager, "last_shutdown", None) or {}
+                result["cleanup_killed"] = shutdown.get("killed", 0)
+                result["cleanup_leftover"] = len(shutdown.get("leftover", []))
+
+        ready = [r["time_to_ready"] for r in results if r.get("success")]
+        result["connected"] = len(ready)
+        result["time_to_ready"] = {
+            "p50": percentile(ready, 50),
+            "p90": percentile(ready, 90),
+            "p99": percentile(ready, 99),
+            "max": max(ready) if ready else None
+        }
+        result["fds_before"] = fds_before
+        result["fds_after_cleanup"] = open_fds()
+        result["peak_rss_kb"] = peak_rss_kb()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return result
+
+
+def measure_startup(size: int, repeats: int = 5) -> Dict[str, Any]:
+    """测量命令行在开始连接之前的启动耗时
+
+    在新的解释器中分别执行：
+    - connect 路径：懒加载入口加上连接所需的模块，读取节点状态（status 子命令，与 connect 导入相同的模块）
+    - 转换后连接：旧入口每次都会执行的 convert（使用订阅解析缓存），同样加上连接所需的模块
+
+    各取 repeats 次的中位数，同时检查 connect 路径是否导入了 yaml。
+
+    Args:
+        size: 订阅中的节点数量
+        repeats: 每种入口的执行次数
+
+    Returns:
+        启动耗时（秒）和 connect 路径是否导入 yaml
+    """
+    project_dir = os.path.dirname(BENCHMARK_DIR)
+    work_dir = tempfile.mkdtemp(prefix="proxy_converter_bench_startup_")
+    subscription = os.path.join(work_dir, "subscription.yaml")
+    output_dir = os.path.join(work_dir, "configs")
+    write_subscription(subscription, size)
+    prelude = "import sys; from proxy_converter.cli import main; import proxy_converter.hysteria2.client; "
+    commands = {
+        "convert_then_connect": [
+            sys.executable, "-c",
+            prelude + f"main(['convert', '-Y', {subscription!r}, '-O', {output_dir!r}, '--port-range', '20000-65535'])"
+        ],
+        "connect_path": [
+            sys.executable, "-c",
+            prelude + f"main(['status', '-O', {output_dir!r}]); print('yaml' in sys.modules, file=sys.stderr)"
+        ]
+    }
+    result = {"size": size}
+    try:
+        for name, cmd in commands.items():
+            durations = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                completed = subprocess.run(cmd, cwd=project_dir, capture_output=True, text=True)
+                durations.append(time.perf_counter() - start)
+            result[name] = percentile(durations, 50)
+            if name == "connect_path":
+                result["connect_imports_yaml"] = completed.stderr.strip().endswith("True")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def measure_log_parser(lines: int = 200000) -> Dict[str, Any]:
+    """测量日志解析器处理 debug 级别输出的单行耗时
+
+    合成的输出以逐请求的 TCP/UDP 调试日志为主，每 1000 行穿插一次断开和重连。
+
+    Args:
+        lines: 解析的总行数
+
+    Returns:
+        每行平均耗时（纳秒）、每秒行数和识别出的事件数
+    """
+    samples = [
+        b'2024-05-01T12:00:00+08:00\tDEBUG\tTCP request\t{"addr": "www.example.com:443", "id": 1}',
+        b'2024-05-01T12:00:00+08:00\tDEBUG\tTCP closed\t{"addr": "www.example.com:443", "id": 1}',
+        b'2024-05-01T12:00:00+08:00\tDEBUG\tUDP request\t{"addr": "1.1.1.1:53", "id": 2}',
+        b'2024-05-01T12:00:00+08:00\tINFO\tTCP forwarding\t{"addr": "127.0.0.1:1080"}',
+    ]
+    reconnect = [
+        b'2024-05-01T12:00:00+08:00\tWARN\tconnection closed\t{"error": "timeout: no recent network activity"}',
+        b'2024-05-01T12:00:00+08:00\tINFO\tconnected to server\t{"udpEnabled": true, "count": 2}',
+    ]
+    corpus = [samples[i % len(samples)] for i in range(lines)]
+    for i in range(0, lines - 1, 1000):
+        corpus[i:i + 2] = reconnect
+
+    parser = Hysteria2LogParser()
+    feed = parser.feed
+    start = time.perf_counter()
+    events = sum(1 for line in corpus if feed(line) is not None)
+    elapsed = time.perf_counter() - start
+    return {
+        "lines": lines,
+        "ns_per_line": elapsed / lines * 1e9,
+        "lines_per_second": lines / elapsed,
+        "events": events
+    }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    """打印一个规模的测试结果"""
+    ttr = result["time_to_ready"]
+    fmt = lambda value: "-" if value is None else f"{value:.3f}s"
+    mode = "，单核心模式" if result.get("single_core") else ""
+    print(f"[{result['size']} 个节点{mode}] 连接成功 {result['connected']}/{result['configs']}，子进程 {result['children']} 个")
+    print(f"  生成配置: 首次 {fmt(result['generate_cold'])}，增量 {fmt(result['generate_warm'])}")
+    print(f"  批量连接: {fmt(result['connect_wall'])}，就绪耗时 p50 {fmt(ttr['p50'])} / p90 {fmt(ttr['p90'])} / "
+          f"p99 {fmt(ttr['p99'])} / 最长 {fmt(ttr['max'])}")
+    print(f"  清理进程: {fmt(result['cleanup_wall'])}，强制终止 {result['cleanup_killed']} 个，遗留 {result['cleanup_leftover']} 个")
+    print(f"  峰值 RSS: {result['peak_rss_kb']} KB，子进程 RSS: {result['children_rss_kb']} KB，"
+          f"打开的文件描述符: {result['fds_before']} -> {result['open_fds']} -> {result['fds_after_cleanup']}")
+    if result.get("window_trajectory"):
+        windows = [point["window"] for point in result["window_trajectory"]]
+        print(f"  并发窗口: {' -> '.join(str(window) for window in windows)}（峰值 {max(windows)}）")
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline_file: str,
+    startup: Dict[str, Any] = None,
+    log_parser: Dict[str, Any] = None
+) -> None:
+    """与基线结果对比耗时指标
+
+    Args:
+        results: 本次结果
+        baseline_file: 基线结果文件
+        startup: 本次的启动耗时
+        log_parser: 本次的日志解析耗时
+    """
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    baseline = {item["size"]: item for item in report["results"]}
+
+    print(f"\n与基线 {baseline_file} 对比:")
+    for key in ("convert_then_connect", "connect_path"):
+        old, new = (report.get("startup") or {}).get(key), (startup or {}).get(key)
+        if old and new is not None:
+            print(f"  startup.{key}: {old:.3f}s -> {new:.3f}s ({(new - old) / old * 100:+.1f}%)")
+    old, new = (report.get("log_parser") or {}).get("ns_per_line"), (log_parser or {}).get("ns_per_line")
+    if old and new is not None:
+        print(f"  log_parser.ns_per_line: {old:.0f}ns -> {new:.0f}ns ({(new - old) / old * 100:+.1f}%)")
+    for result in results:
+        base = baseline.get(result["size"])
+        if not base:
+            continue
+        for key in ("generate_cold", "generate_warm", "connect_wall", "cleanup_wall"):
+            old, new = base.get(key), result.get(key)
+            if old and new is not None:
+                print(f"  [{result['size']}] {key}: {old:.3f}s -> {new:.3f}s ({(new - old) / old * 100:+.1f}%)")
+        old, new = base["time_to_ready"].get("p50"), result["time_to_ready"].get("p50")
+        if old and new is not None:
+            print(f"  [{result['size']}] time_to_ready.p50: {old:.3f}s -> {new:.3f}s ({(new - old) / old * 100:+.1f}%)")
+
+
+async def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="代理转换工具基准测试")
+    parser.add_argument("--sizes", default="10,100,1000,5000", help="节点数量列表，以逗号分隔，默认为 10,100,1000,5000")
+    parser.add_argument("--port-start", type=int, default=20000, help="节点 HTTP 端口的起始值，默认为 20000")
+    parser.add_argument("--max-parallel", type=int, default=0, help="批量连接的最大并发数，0 表示不限制")
+    parser.add_argument("--output", help="结果文件路径，默认保存到 benchmarks/results/ 下以时间命名的文件")
+    parser.add_argument("--baseline", help="用于对比的基线结果文件")
+    parser.add_argument("--single-core", action="store_true", help="使用单核心模式，所有节点由一个 sing-box 替身进程提供")
+    parser.add_argument("--adaptive", action="store_true", help="使用自适应并发窗口启动节点，--max-parallel 为窗口上限")
+    parser.add_argument("--verbose", "-v", action="store_true", help="显示被测代码的输出")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    echo_server, echo_port = await start_echo_server()
+    probe_target = f"127.0.0.1:{echo_port}"
+
+    results = []
+    try:
+        for size in sizes:
+            print(f"\n正在测试 {size} 个节点...")
+            result = await run_scenario(
+                size, args.port_start, probe_target, args.max_parallel, args.verbose, args.single_core, args.adaptive
+            )
+            print_result(result)
+            results.append(result)
+    finally:
+        echo_server.close()
+
+    print("\n正在测量启动耗时...")
+    startup = measure_startup(max(sizes))
+    print(f"  [{startup['size']} 个节点] 转换后连接: {startup['convert_then_connect']:.3f}s，"
+          f"connect 路径: {startup['connect_path']:.3f}s（导入 yaml: {'是' if startup['connect_imports_yaml'] else '否'}）")
+
+    print("\n正在测量日志解析耗时...")
+    log_parser = measure_log_parser()
+    print(f"  {log_parser['lines']} 行: 每行 {log_parser['ns_per_line']:.0f}ns，"
+          f"每秒 {log_parser['lines_per_second']:.0f} 行，识别事件 {log_parser['events']} 个")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "startup": startup,
+        "log_parser": log_parser,
+        "results": results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到: {output}")
+
+    if args.baseline:
+        compare(results, args.baseline, startup, log_parser)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,7 +8,15 @@ ProxyConverter 包
 
 __version__ = "1.0.0"
 
-from .proxy_converter import ProxyConverter
-from .hysteria2.client import Hysteria2Client
-
 __all__ = ["ProxyConverter", "Hysteria2Client"]
+
+
+def __getattr__(name):
+    """按需导入公开类，只使用连接功能时不会导入 yaml"""
+    if name == "ProxyConverter":
+        from .proxy_converter import ProxyConverter
+        return ProxyConverter
+    if name == "Hysteria2Client":
+        from .hysteria2.client import Hysteria2Client
+        return Hysteria2Client
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,12 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+支持 python -m proxy_converter 运行命令行
+"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
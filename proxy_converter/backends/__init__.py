@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+代理协议后端注册表
+
+每种 Clash 代理类型对应一个后端，负责把节点转换为配置文件并说明如何启动核心程序。
+新增协议时实现 Backend 子类并调用 register_backend 注册即可。
+"""
+
+from typing import Dict, Any, List, Optional
+
+from .base import Backend
+from .hysteria2 import Hysteria2Backend
+from .singbox import SingBoxBackend, TrojanBackend, VlessBackend, ShadowsocksBackend, TuicBackend
+
+# 未写明 type 的节点配置都是 Hysteria2 客户端配置
+DEFAULT_BACKEND = "hysteria2"
+
+_BACKENDS: Dict[str, Backend] = {}
+
+
+def register_backend(backend: Backend) -> None:
+    """注册后端
+
+    Args:
+        backend: 后端实例，以其 name 作为代理类型
+    """
+    _BACKENDS[backend.name] = backend
+
+
+def get_backend(proxy_type: str) -> Optional[Backend]:
+    """根据代理类型获取后端
+
+    Args:
+        proxy_type: Clash 中的代理类型
+
+    Returns:
+        后端，不支持的类型返回 None
+    """
+    return _BACKENDS.get(proxy_type)
+
+
+def backend_for_config(config: Dict[str, Any]) -> Backend:
+    """根据节点配置获取后端
+
+    Args:
+        config: 节点配置
+
+    Returns:
+        后端
+
+    Raises:
+        ValueError: 配置中的类型不受支持时抛出
+    """
+    proxy_type = config.get("type", DEFAULT_BACKEND)
+    backend = _BACKENDS.get(proxy_type)
+    if backend is None:
+        raise ValueError(f"不支持的代理类型: {proxy_type}")
+    return backend
+
+
+def supported_types() -> List[str]:
+    """获取所有支持的代理类型
+
+    Returns:
+        代理类型列表
+    """
+    return list(_BACKENDS)
+
+
+for _backend in (Hysteria2Backend(), TrojanBackend(), VlessBackend(), ShadowsocksBackend(), TuicBackend()):
+    register_backend(_backend)
+
+__all__ = [
+    "Backend", "SingBoxBackend", "register_backend", "get_backend", "backend_for_config", "supported_types"
+]
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+代理协议后端基类
+"""
+
+from typing import Dict, Any, List
+
+
+class Backend:
+    """代理协议后端
+
+    每个后端对应 Clash 中的一种代理类型，同时负责两件事：
+    - 转换：把 Clash 节点转换为节点配置文件的内容
+    - 进程：说明使用哪个核心程序、如何构建启动命令，以及核心程序实际读取的运行时配置
+
+    节点配置统一用顶层的 http/socks5 字段描述本地代理监听，由 ProxyConverter 写入，
+    因此连接、就绪探测、延迟测量、健康检查和负载均衡都与具体协议无关。
+    """
+
+    # Clash 配置中的 type
+    name = ""
+
+    # 核心程序的基本文件名，用于自动查找和按名称指定可执行文件
+    executable = ""
+
+    @staticmethod
+    def server_host(proxy: Dict[str, Any]) -> str:
+        """获取可以直接拼接端口的服务器主机，IPv6 地址会加上方括号
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            服务器主机
+        """
+        server = str(proxy.get('server', ''))
+        if ':' in server and not server.startswith('['):
+            server = f"[{server}]"
+        return server
+
+    def server_address(self, proxy: Dict[str, Any]) -> str:
+        """构建节点的服务器地址，用于状态记录和按服务器查找
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            服务器地址，如 example.com:443
+        """
+        return f"{self.server_host(proxy)}:{proxy.get('port')}"
+
+    def build_config(self, proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """把 Clash 节点转换为节点配置，不含本地监听和节点名称
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            配置字典
+        """
+        raise NotImplementedError
+
+    def build_command(self, executable: str, config_file: str, log_level: str) -> List[str]:
+        """构建启动核心程序的命令
+
+        Args:
+            executable: 核心程序路径
+            config_file: 运行时配置文件路径
+            log_level: 日志级别
+
+        Returns:
+            命令参数列表
+        """
+        raise NotImplementedError
+
+    def runtime_config(self, config: Dict[str, Any], log_level: str) -> Dict[str, Any]:
+        """把节点配置转换为核心程序实际读取的配置
+
+        返回 config 本身表示节点配置文件可以直接交给核心程序，否则进程管理器会把返回值写入临时文件。
+
+        Args:
+            config: 节点配置
+            log_level: 日志级别
+
+        Returns:
+            运行时配置
+        """
+        return config
+
+    def log_parser(self):
+        """创建核心程序输出的增量解析器，用于从日志中提取连接、认证失败等事件
+
+        Returns:
+            带有 feed(line) 方法的解析器，不支持时返回 None
+        """
+        return None
+
+    def shared_outbound(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """把节点配置转换为 sing-box 出站，用于把多个节点合并到一个核心进程的单核心模式
+
+        Args:
+            config: 节点配置
+
+        Returns:
+            出站配置，不含 tag
+
+        Raises:
+            NotImplementedError: 后端不支持单核心模式时抛出
+        """
+        raise NotImplementedError(f"{self.name} 节点不支持单核心模式")
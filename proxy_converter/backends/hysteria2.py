@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Hysteria2 后端，节点配置即 Hysteria2 客户端配置
+"""
+
+import re
+from typing import Dict, Any, List, Optional
+
+from ..utils.network import normalize_port_ranges
+from ..utils.log_events import Hysteria2LogParser
+from .base import Backend
+
+
+class Hysteria2Backend(Backend):
+    """Hysteria2 后端，每个节点由一个 hysteria client 进程提供"""
+
+    name = "hysteria2"
+    executable = "hysteria"
+
+    def build_config(self, proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """构建 Hysteria2 客户端配置
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            配置字典
+        """
+        config = {
+            "server": self.server_address(proxy),
+            "auth": proxy.get('password'),
+            "tls": self._tls(proxy),
+            "transport": self._transport(proxy)
+        }
+        
+        # 带宽提示，填写后 Hysteria2 使用 Brutal 拥塞控制
+        bandwidth = {
+            key: self._bandwidth(proxy.get(key))
+            for key in ('up', 'down') if proxy.get(key) not in (None, '', 0)
+        }
+        if bandwidth:
+            config["bandwidth"] = bandwidth
+        
+        # 混淆
+        if proxy.get('obfs'):
+            obfs_type = str(proxy['obfs']).lower()
+            config["obfs"] = {"type": obfs_type, obfs_type: {"password": proxy.get('obfs-password', '')}}
+        
+        return config
+
+    def build_command(self, executable: str, config_file: str, log_level: str) -> List[str]:
+        """构建 hysteria client 启动命令
+
+        Args:
+            executable: hysteria 可执行文件路径
+            config_file: 配置文件路径
+            log_level: 日志级别
+
+        Returns:
+            命令参数列表
+        """
+        return [executable, "client", "-c", config_file, "--log-level", log_level]
+
+    def log_parser(self) -> Hysteria2LogParser:
+        """创建 hysteria 客户端日志的增量解析器
+
+        Returns:
+            解析器
+        """
+        return Hysteria2LogParser()
+
+    def shared_outbound(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """把 Hysteria2 客户端配置转换为 sing-box 的 hysteria2 出站
+
+        sing-box 没有对应项的字段（如 pinSHA256 和通过配置覆盖设置的 quic 参数）会被忽略。
+
+        Args:
+            config: 节点配置
+
+        Returns:
+            出站配置，不含 tag
+        """
+        host, _, ports = config["server"].rpartition(":")
+        outbound = {"type": "hysteria2", "server": host.strip("[]")}
+        if any(sep in ports for sep in ",-"):
+            # sing-box 的端口范围写作 起始:结束
+            outbound["server_ports"] = [
+                item.replace("-", ":") if "-" in item else f"{item}:{item}" for item in ports.split(",")
+            ]
+            hop_interval = (config.get("transport") or {}).get("udp", {}).get("hopInterval")
+            if hop_interval:
+                outbound["hop_interval"] = hop_interval
+        else:
+            outbound["server_port"] = int(ports)
+        outbound["password"] = config.get("auth") or ""
+        
+        bandwidth = config.get("bandwidth") or {}
+        for key in ("up", "down"):
+            mbps = self._mbps(bandwidth.get(key))
+            if mbps:
+                outbound[f"{key}_mbps"] = mbps
+        
+        obfs = config.get("obfs")
+        if obfs:
+            outbound["obfs"] = {"type": obfs["type"], "password": obfs.get(obfs["type"], {}).get("password", "")}
+        
+        tls = config.get("tls") or {}
+        outbound["tls"] = {"enabled": True, "insecure": bool(tls.get("insecure", False))}
+        if tls.get("sni"):
+            outbound["tls"]["server_name"] = tls["sni"]
+        if tls.get("ca"):
+            outbound["tls"]["certificate_path"] = tls["ca"]
+        return outbound
+
+    def server_address(self, proxy: Dict[str, Any]) -> str:
+        """构建 Hysteria2 配置中的服务器地址
+
+        节点带有 ports 时使用端口跳跃的多端口地址，如 example.com:443,20000-50000，
+        无法解析时退回 port。
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            服务器地址
+        """
+        server = self.server_host(proxy)
+        
+        # 处理端口，ports 优先于 port
+        if proxy.get('ports'):
+            try:
+                return f"{server}:{normalize_port_ranges(proxy['ports'])}"
+            except ValueError as e:
+                print(f"节点 {proxy.get('name', server)} 的 ports 无效，改用 port: {e}")
+        if 'port' in proxy:
+            server += f":{proxy['port']}"
+        
+        return server
+
+    @staticmethod
+    def _transport(proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """构建 Hysteria2 配置中的传输设置
+
+        端口跳跃时把 hop-interval（秒数或带单位的时长，如 30、"30s"）写入 udp.hopInterval。
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            传输设置
+        """
+        hop_interval = proxy.get('hop-interval')
+        if not proxy.get('ports') or hop_interval in (None, ''):
+            return {}
+        
+        # 只有一个端口或 ports 无效时不会跳跃
+        try:
+            if not any(sep in normalize_port_ranges(proxy['ports']) for sep in ',-'):
+                return {}
+        except ValueError:
+            return {}
+        
+        hop_interval = str(hop_interval).strip()
+        try:
+            hop_interval = f"{float(hop_interval):g}s"
+        except ValueError:
+            # 已带单位的时长原样使用
+            pass
+        return {"type": "udp", "udp": {"hopInterval": hop_interval}}
+
+    @staticmethod
+    def _tls(proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """构建 Hysteria2 配置中的 TLS 设置
+
+        fingerprint 为证书 SHA-256 指纹时写入 pinSHA256；uTLS 客户端指纹（如 chrome）Hysteria2 不支持，忽略。
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            TLS 设置
+        """
+        tls = {"insecure": proxy.get('skip-cert-verify', False)}
+        if proxy.get('sni'):
+            tls["sni"] = proxy['sni']
+        fingerprint = str(proxy.get('fingerprint') or '').replace(':', '').lower()
+        if len(fingerprint) == 64 and all(c in '0123456789abcdef' for c in fingerprint):
+            tls["pinSHA256"] = fingerprint
+        if proxy.get('ca'):
+            tls["ca"] = proxy['ca']
+        return tls
+
+    @staticmethod
+    def _bandwidth(value: Any) -> str:
+        """把 Clash 的带宽写法转换为 Hysteria2 的带宽字符串
+
+        纯数字按 Mbps 处理，如 30 或 "30" 转为 "30 mbps"，带单位的写法（如 "30 Mbps"）原样转为小写。
+
+        Args:
+            value: Clash 配置中的 up 或 down
+
+        Returns:
+            带宽字符串
+        """
+        value = str(value).strip()
+        try:
+            return f"{float(value):g} mbps"
+        except ValueError:
+            return value.lower()
+
+    @staticmethod
+    def _mbps(value: Any) -> Optional[int]:
+        """把 Hysteria2 的带宽字符串（如 "30 mbps"、"1 gbps"）换算为整数 Mbps
+
+        Args:
+            value: 带宽字符串
+
+        Returns:
+            Mbps，为空或无法解析时返回 None
+        """
+        match = re.fullmatch(r"([\d.]+)\s*([kmgt]?)b?ps", str(value or "").strip().lower())
+        if not match:
+            return None
+        scale = {"k": 0.001, "": 0.000001, "m": 1, "g": 1000, "t": 1000000}[match.group(2)]
+        return max(1, round(float(match.group(1)) * scale))
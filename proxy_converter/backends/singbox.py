@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+sing-box 后端，用 sing-box 为 trojan、vless、shadowsocks 和 tuic 节点提供本地代理
+
+节点配置文件保存 sing-box 出站（outbound）和本地监听，启动时渲染为完整的 sing-box 配置写入临时文件。
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+
+from ..utils.network import parse_listen_address, config_listeners
+from .base import Backend
+
+
+# 本地监听协议对应的 sing-box 入站类型
+INBOUND_TYPES = {"http": "http", "socks5": "socks"}
+
+
+class SingBoxBackend(Backend):
+    """sing-box 后端基类，子类只需实现 build_outbound"""
+
+    executable = "sing-box"
+
+    def build_config(self, proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """构建节点配置
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            配置字典，包含 type、server 和 sing-box 出站
+        """
+        outbound = self.build_outbound(proxy)
+        outbound["tag"] = "proxy"
+        return {
+            "type": self.name,
+            "server": self.server_address(proxy),
+            "outbound": outbound
+        }
+
+    def build_outbound(self, proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """把 Clash 节点转换为 sing-box 出站
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            出站配置
+        """
+        raise NotImplementedError
+
+    def build_command(self, executable: str, config_file: str, log_level: str) -> List[str]:
+        """构建 sing-box 启动命令
+
+        Args:
+            executable: sing-box 可执行文件路径
+            config_file: 运行时配置文件路径
+            log_level: 日志级别，写在运行时配置中
+
+        Returns:
+            命令参数列表
+        """
+        return [executable, "run", "-c", config_file]
+
+    def runtime_config(self, config: Dict[str, Any], log_level: str) -> Dict[str, Any]:
+        """把节点配置渲染为完整的 sing-box 配置
+
+        Args:
+            config: 节点配置
+            log_level: 日志级别
+
+        Returns:
+            sing-box 配置
+        """
+        return {
+            "log": {"level": log_level, "timestamp": True},
+            "inbounds": build_inbounds(config, "in"),
+            "outbounds": [config["outbound"]],
+            "route": {"final": config["outbound"]["tag"]}
+        }
+
+    def shared_outbound(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """取出节点配置中的 sing-box 出站
+
+        Args:
+            config: 节点配置
+
+        Returns:
+            出站配置，不含 tag
+        """
+        outbound = dict(config["outbound"])
+        outbound.pop("tag", None)
+        return outbound
+
+    @staticmethod
+    def _base_outbound(outbound_type: str, proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """构建出站的公共字段
+
+        Args:
+            outbound_type: sing-box 出站类型
+            proxy: 代理配置
+
+        Returns:
+            出站配置
+        """
+        return {
+            "type": outbound_type,
+            "server": str(proxy.get('server', '')),
+            "server_port": int(proxy.get('port', 0))
+        }
+
+    @staticmethod
+    def _tls(proxy: Dict[str, Any], enabled: bool = True, sni_key: str = 'sni') -> Optional[Dict[str, Any]]:
+        """构建出站的 TLS 设置
+
+        Args:
+            proxy: 代理配置
+            enabled: 是否启用 TLS
+            sni_key: Clash 中 SNI 字段的名称，vless 使用 servername
+
+        Returns:
+            TLS 设置，不启用时返回 None
+        """
+        if not enabled:
+            return None
+        tls = {"enabled": True, "insecure": bool(proxy.get('skip-cert-verify', False))}
+        server_name = proxy.get(sni_key) or proxy.get('sni')
+        if server_name:
+            tls["server_name"] = server_name
+        if proxy.get('alpn'):
+            alpn = proxy['alpn']
+            tls["alpn"] = alpn if isinstance(alpn, list) else [item.strip() for item in str(alpn).split(',')]
+        if proxy.get('client-fingerprint'):
+            tls["utls"] = {"enabled": True, "fingerprint": proxy['client-fingerprint']}
+        reality = proxy.get('reality-opts')
+        if isinstance(reality, dict) and reality.get('public-key'):
+            tls["reality"] = {
+                "enabled": True,
+                "public_key": reality['public-key'],
+                "short_id": reality.get('short-id', '')
+            }
+        return tls
+
+    @staticmethod
+    def _transport(proxy: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """构建 ws、grpc、http 传输设置
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            传输设置，使用 TCP 时返回 None
+        """
+        network = proxy.get('network', 'tcp')
+        if network == 'ws':
+            opts = proxy.get('ws-opts') or {}
+            transport = {"type": "ws", "path": opts.get('path', '/')}
+            if opts.get('headers'):
+                transport["headers"] = opts['headers']
+            if opts.get('max-early-data'):
+                transport["max_early_data"] = opts['max-early-data']
+                transport["early_data_header_name"] = opts.get('early-data-header-name', 'Sec-WebSocket-Protocol')
+            return transport
+        if network == 'grpc':
+            opts = proxy.get('grpc-opts') or {}
+            return {"type": "grpc", "service_name": opts.get('grpc-service-name', '')}
+        if network in ('http', 'h2'):
+            opts = proxy.get('h2-opts') or proxy.get('http-opts') or {}
+            transport = {"type": "http"}
+            if opts.get('host'):
+                transport["host"] = opts['host'] if isinstance(opts['host'], list) else [opts['host']]
+            if opts.get('path'):
+                path = opts['path']
+                transport["path"] = path[0] if isinstance(path, list) else path
+            return transport
+        return None
+
+
+def build_inbounds(config: Dict[str, Any], tag_prefix: str) -> List[Dict[str, Any]]:
+    """把节点配置中的本地监听转换为 sing-box 入站
+
+    Args:
+        config: 节点配置
+        tag_prefix: 入站标签前缀
+
+    Returns:
+        入站列表
+    """
+    inbounds = []
+    for protocol, listen in config_listeners(config):
+        host, port = parse_listen_address(listen)
+        inbounds.append({
+            "type": INBOUND_TYPES[protocol],
+            "tag": f"{tag_prefix}-{protocol}",
+            "listen": host,
+            "listen_port": port
+        })
+    return inbounds
+
+
+def build_shared_config(nodes: List[Tuple[str, Dict[str, Any], Dict[str, Any]]], log_level: str) -> Dict[str, Any]:
+    """把多个节点合并为一个 sing-box 配置，每个节点保留自己的本地监听，并按入站路由到各自的出站
+
+    Args:
+        nodes: (节点标签, 节点配置, 出站配置) 列表
+        log_level: 日志级别
+
+    Returns:
+        sing-box 配置
+    """
+    inbounds = []
+    outbounds = []
+    rules = []
+    for tag, config, outbound in nodes:
+        node_inbounds = build_inbounds(config, f"{tag}-in")
+        inbounds.extend(node_inbounds)
+        outbounds.append(dict(outbound, tag=tag))
+        rules.append({"inbound": [inbound["tag"] for inbound in node_inbounds], "outbound": tag})
+    return {
+        "log": {"level": log_level, "timestamp": True},
+        "inbounds": inbounds,
+        "outbounds": outbounds,
+        "route": {"rules": rules}
+    }
+
+
+class TrojanBackend(SingBoxBackend):
+    """trojan 后端"""
+
+    name = "trojan"
+
+    def build_outbound(self, proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """构建 trojan 出站
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            出站配置
+        """
+        outbound = self._base_outbound("trojan", proxy)
+        outbound["password"] = proxy.get('password', '')
+        outbound["tls"] = self._tls(proxy)
+        transport = self._transport(proxy)
+        if transport:
+            outbound["transport"] = transport
+        return outbound
+
+
+class VlessBackend(SingBoxBackend):
+    """vless 后端"""
+
+    name = "vless"
+
+    def build_outbound(self, proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """构建 vless 出站
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            出站配置
+        """
+        outbound = self._base_outbound("vless", proxy)
+        outbound["uuid"] = proxy.get('uuid', '')
+        if proxy.get('flow'):
+            outbound["flow"] = proxy['flow']
+        tls = self._tls(proxy, bool(proxy.get('tls')), sni_key='servername')
+        if tls:
+            outbound["tls"] = tls
+        transport = self._transport(proxy)
+        if transport:
+            outbound["transport"] = transport
+        return outbound
+
+
+class ShadowsocksBackend(SingBoxBackend):
+    """shadowsocks 后端"""
+
+    name = "ss"
+
+    # Clash 插件名对应的 sing-box 插件名
+    PLUGINS = {"obfs": "obfs-local", "v2ray-plugin": "v2ray-plugin"}
+
+    def build_outbound(self, proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """构建 shadowsocks 出站
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            出站配置
+        """
+        outbound = self._base_outbound("shadowsocks", proxy)
+        outbound["method"] = proxy.get('cipher', '')
+        outbound["password"] = proxy.get('password', '')
+        plugin = self.PLUGINS.get(proxy.get('plugin'))
+        if plugin:
+            outbound["plugin"] = plugin
+            outbound["plugin_opts"] = self._plugin_opts(proxy.get('plugin'), proxy.get('plugin-opts') or {})
+        if proxy.get('udp-over-tcp'):
+            outbound["udp_over_tcp"] = True
+        return outbound
+
+    @staticmethod
+    def _plugin_opts(plugin: str, opts: Dict[str, Any]) -> str:
+        """把 Clash 的 plugin-opts 转换为 SIP003 插件参数字符串
+
+        Args:
+            plugin: Clash 插件名
+            opts: Clash 插件参数
+
+        Returns:
+            插件参数字符串，如 obfs=http;obfs-host=example.com
+        """
+        if plugin == "obfs":
+            parts = [f"obfs={opts.get('mode', 'http')}"]
+            if opts.get('host'):
+                parts.append(f"obfs-host={opts['host']}")
+            return ";".join(parts)
+        parts = [f"mode={opts.get('mode', 'websocket')}"]
+        if opts.get('tls'):
+            parts.append("tls")
+        if opts.get('host'):
+            parts.append(f"host={opts['host']}")
+        if opts.get('path'):
+            parts.append(f"path={opts['path']}")
+        if opts.get('mux'):
+            parts.append("mux=1")
+        return ";".join(parts)
+
+
+class TuicBackend(SingBoxBackend):
+    """tuic（v5）后端"""
+
+    name = "tuic"
+
+    def build_outbound(self, proxy: Dict[str, Any]) -> Dict[str, Any]:
+        """构建 tuic 出站
+
+        Args:
+            proxy: 代理配置
+
+        Returns:
+            出站配置
+        """
+        outbound = self._base_outbound("tuic", proxy)
+        outbound["uuid"] = proxy.get('uuid', '')
+        outbound["password"] = proxy.get('password', '')
+        if proxy.get('congestion-controller'):
+            outbound["congestion_control"] = proxy['congestion-controller']
+        if proxy.get('udp-relay-mode'):
+            outbound["udp_relay_mode"] = proxy['udp-relay-mode']
+        if proxy.get('reduce-rtt'):
+            outbound["zero_rtt_handshake"] = True
+        if proxy.get('heartbeat-interval'):
+            outbound["heartbeat"] = f"{proxy['heartbeat-interval']}ms"
+        outbound["tls"] = self._tls(proxy)
+        return outbound
@@ -0,0 +1,596 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+命令行入口
+
+子命令：
+    convert  把 Clash 订阅转换为节点配置文件
+    connect  连接已生成的节点配置，不读取也不解析 YAML
+    status   查看连接进程和节点状态
+    stop     终止正在运行的连接进程
+    run      先转换再连接（未指定子命令时的默认行为）
+    daemon   先转换再连接，并通过 UNIX 套接字接受控制命令，支持热重载
+    ctl      向守护进程发送控制命令：list、add、remove、restart、reload
+
+各子命令只在执行时导入所需模块，connect、status、stop 和 ctl 不会导入 yaml，启动更快。
+"""
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import argparse
+from typing import List, Optional
+
+COMMANDS = ("convert", "connect", "status", "stop", "run", "daemon", "ctl")
+
+DEFAULT_YAML_FILE = "C:\\Users\\24750\\AppData\\Roaming\\io.github.clash-verge-rev.clash-verge-rev\\profiles\\RNxaxXM4uPWP.yaml"
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加所有子命令共用的参数"""
+    parser.add_argument("--output-dir", "-O", default="./configs", help="配置文件输出目录，默认为 ./configs")
+
+
+def socket_path(args: argparse.Namespace) -> str:
+    """获取守护进程控制套接字路径，默认位于配置目录下"""
+    return args.socket or os.path.join(args.output_dir, ".control.sock")
+
+
+def add_convert_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加配置转换参数"""
+    parser.add_argument("--yaml-file", "-Y", default=DEFAULT_YAML_FILE,
+                        help="YAML 配置文件路径或订阅地址（http/https），订阅地址使用条件请求下载并缓存")
+    parser.add_argument("--fetch-timeout", type=float, default=30.0, help="下载订阅的超时时间（秒），默认为 30")
+    parser.add_argument("--type", "-T", default="hysteria2", help="代理类型，多个类型以逗号分隔，如 hysteria2,trojan，all 表示 hysteria2、trojan、vless、ss、tuic 全部类型，默认为 hysteria2")
+    parser.add_argument("--port-range", default="8080-65535", help="新节点可分配的 HTTP 端口范围，默认为 8080-65535")
+    parser.add_argument("--exclude-ports", default="", help="不分配给新节点的端口，如 8888,9000-9010")
+    parser.add_argument("--listener", default="http", choices=["http", "socks5", "both"],
+                        help="本地代理监听模式，both 表示同时监听 HTTP 和 SOCKS5（SOCKS5 使用第二个端口），默认为 http")
+    parser.add_argument("--overrides", help="配置覆盖文件（JSON），用于设置全局或单个节点的 QUIC 窗口、空闲超时、保活等字段")
+    parser.add_argument("--no-cache", action="store_true", help="不使用订阅解析缓存，强制重新解析 YAML 文件")
+
+
+def add_connect_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加连接参数"""
+    parser.add_argument("--count", "-C", type=int, default=5, help="最终保留的代理数量，默认为 5")
+    parser.add_argument("--executable", "-E", help="Hysteria2 可执行文件路径")
+    parser.add_argument("--singbox-executable", help="sing-box 可执行文件路径，用于 trojan、vless、ss、tuic 节点，不指定则自动查找")
+    parser.add_argument("--single-core", action="store_true",
+                        help="单核心模式：把选中的节点合并为一个 sing-box 配置，由一个进程提供，每个节点仍使用自己的端口")
+    parser.add_argument("--filter", "-F", help="配置文件过滤模式，支持正则表达式或以 | 分隔的多个文件名")
+    parser.add_argument("--spawn-concurrency", type=int, default=0,
+                        help="同时启动的最大节点数，0 表示不限制；与 --adaptive-spawn 同用时为并发窗口上限")
+    parser.add_argument("--adaptive-spawn", action="store_true",
+                        help="从较小的并发窗口开始启动节点，就绪耗时平稳时扩大窗口，耗时或失败率上升时收缩")
+    parser.add_argument("--ready-timeout", type=float, default=10.0, help="每个节点的就绪截止时间（秒），默认为 10")
+    parser.add_argument("--probe-target", default="www.gstatic.com:443",
+                        help="就绪探测时通过代理 CONNECT 的目标地址，传入空字符串则只探测本地监听")
+    parser.add_argument("--select", "-S", default="random", choices=["random", "fastest", "weighted"],
+                        help="节点选择模式：random 随机选择；fastest 先连接候选节点再保留延迟最低的；"
+                             "weighted 按延迟倒数加权随机保留，默认为 random")
+    parser.add_argument("--candidates", type=int, default=0,
+                        help="fastest/weighted 模式下先行连接的候选节点数量，0 表示全部节点")
+    parser.add_argument("--probe-url", default="http://www.gstatic.com/generate_204",
+                        help="测量节点延迟时访问的目标 URL")
+    parser.add_argument("--probe-concurrency", type=int, default=16, help="同时测量延迟的最大节点数，默认为 16")
+    parser.add_argument("--max-restarts", type=int, default=5,
+                        help="节点在 --restart-window 秒内允许的最大重启次数，超过则放弃该节点，0 表示不重启，默认为 5")
+    parser.add_argument("--restart-window", type=float, default=60.0, help="统计节点崩溃次数的时间窗口（秒），默认为 60")
+    parser.add_argument("--log-level", default="debug", choices=["debug", "info", "warn", "error"],
+                        help="Hysteria2 子进程的日志级别，默认为 debug")
+    parser.add_argument("--lb-listen", help="启动负载均衡前置代理的监听地址，如 127.0.0.1:8000，不指定则不启动")
+    parser.add_argument("--lb-strategy", default="round_robin", choices=["round_robin", "least_conn", "random"],
+                        help="负载均衡策略，默认为 round_robin")
+    parser.add_argument("--health-interval", type=float, default=30.0,
+                        help="连接后健康检查的平均间隔（秒），0 表示不检查，默认为 30")
+    parser.add_argument("--health-failures", type=int, default=3, help="连续健康检查失败多少次后驱逐节点，默认为 3")
+    parser.add_argument("--metrics-listen", help="Prometheus 指标端点的监听地址，如 127.0.0.1:9100，不指定则不启动")
+    parser.add_argument("--cpu-affinity", action="store_true", help="把每个 Hysteria2 子进程绑定到负载最低的 CPU 核心")
+    parser.add_argument("--nice", type=int, help="Hysteria2 子进程的 nice 值，如 10")
+    parser.add_argument("--ionice-class", type=int, choices=[1, 2, 3], help="Hysteria2 子进程的 IO 调度类别，1 实时、2 尽力而为、3 空闲")
+    parser.add_argument("--ionice-level", type=int, choices=range(8), help="IO 调度优先级（0-7），仅对类别 1 和 2 有效")
+    parser.add_argument("--cgroup-memory", help="每个 Hysteria2 子进程的内存上限（cgroup v2），如 256M")
+    parser.add_argument("--cgroup-cpu", type=float, help="每个 Hysteria2 子进程可使用的 CPU 核数上限（cgroup v2），如 0.5")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行解析器
+
+    Returns:
+        解析器
+    """
+    parser = argparse.ArgumentParser(prog="proxy-converter", description="代理配置转换工具")
+    subparsers = parser.add_subparsers(dest="command", metavar="{convert,connect,status,stop,run,daemon,ctl}")
+
+    convert = subparsers.add_parser("convert", help="把 Clash 订阅转换为节点配置文件")
+    add_common_arguments(convert)
+    add_convert_arguments(convert)
+
+    connect = subparsers.add_parser("connect", help="连接已生成的节点配置，不重新转换")
+    add_common_arguments(connect)
+    add_connect_arguments(connect)
+
+    status = subparsers.add_parser("status", help="查看连接进程和节点状态")
+    add_common_arguments(status)
+    status.add_argument("--probe-timeout", type=float, default=0.5, help="探测节点本地监听的超时时间（秒），默认为 0.5")
+
+    stop = subparsers.add_parser("stop", help="终止正在运行的连接进程")
+    add_common_arguments(stop)
+    stop.add_argument("--timeout", type=float, default=10.0, help="等待连接进程退出的时间（秒），超时后强制终止，默认为 10")
+
+    run = subparsers.add_parser("run", help="先转换再连接")
+    add_common_arguments(run)
+    add_convert_arguments(run)
+    add_connect_arguments(run)
+
+    daemon = subparsers.add_parser("daemon", help="先转换再连接，并通过 UNIX 套接字接受控制命令")
+    add_common_arguments(daemon)
+    add_convert_arguments(daemon)
+    add_connect_arguments(daemon)
+    daemon.add_argument("--socket", help="控制套接字路径，默认为配置目录下的 .control.sock")
+
+    ctl = subparsers.add_parser("ctl", help="向守护进程发送控制命令")
+    add_common_arguments(ctl)
+    ctl.add_argument("--socket", help="控制套接字路径，默认为配置目录下的 .control.sock")
+    ctl.add_argument("action", choices=["list", "add", "remove", "restart", "reload"],
+                     help="list 列出节点；add 按端口或配置文件启动节点；remove、restart 按端口或配置文件移除、重启节点；"
+                          "reload 重新转换订阅，只重启配置变化的节点")
+    ctl.add_argument("targets", nargs="*", help="端口或配置文件路径")
+
+    return parser
+
+
+async def convert(args: argparse.Namespace) -> List[str]:
+    """执行 convert 子命令
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        配置文件路径列表，失败时为空
+    """
+    from .proxy_converter import ProxyConverter
+    from .utils.network import parse_port_spec
+
+    print("正在转换代理配置...")
+    try:
+        start_port, end_port = map(int, args.port_range.split('-'))
+        exclude_ports = parse_port_spec(args.exclude_ports)
+    except ValueError as e:
+        print(f"端口参数格式错误: {e}")
+        return []
+    converter = ProxyConverter(
+        args.yaml_file,
+        use_cache=not args.no_cache,
+        listener=args.listener,
+        overrides_file=args.overrides,
+        fetch_timeout=args.fetch_timeout
+    )
+    return await converter.generate_all_configs(
+        args.type,
+        args.output_dir,
+        port_range=(start_port, end_port),
+        exclude_ports=exclude_ports
+    )
+
+
+def _record_run(run_file, client) -> None:
+    """把当前连接进程和存活节点写入运行文件"""
+    run_file.write([
+        {
+            "port": process_info["port"],
+            "config_file": process_info["config_file"],
+            "pid": process_info["process"].pid
+        }
+        for process_info in client.process_manager.get_live_processes()
+    ])
+
+
+async def _serve(args: argparse.Namespace, client, run_file, target_count: int) -> None:
+    """记录运行文件，守护模式下启动控制接口，然后等待中断
+
+    Args:
+        args: 命令行参数
+        client: Hysteria2 客户端
+        run_file: 运行文件
+        target_count: 守护模式下重载后需要保持的节点数量，0 表示不补足
+    """
+    _record_run(run_file, client)
+
+    if args.command == "daemon":
+        await client.start_daemon(
+            socket_path(args),
+            target_count,
+            regenerate=lambda: convert(args),
+            on_change=lambda: _record_run(run_file, client)
+        )
+
+    # 等待用户中断
+    await client.wait_for_interrupt()
+
+
+async def connect(args: argparse.Namespace) -> None:
+    """执行 connect 子命令，连接配置目录中已生成的节点
+
+    Args:
+        args: 命令行参数
+    """
+    import random
+    from .hysteria2.client import Hysteria2Client
+    from .utils.state_store import StateStore
+    from .utils.resources import ResourceLimiter
+    from .utils.run_file import RunFile
+
+    run_file = RunFile(args.output_dir)
+    running = run_file.read()
+    if running and running.get("pid") != os.getpid() and RunFile.is_alive(running.get("pid", 0)):
+        print(f"连接进程已在运行（PID: {running['pid']}），请先执行 stop")
+        return
+
+    # SIGTERM（stop 子命令）与 Ctrl+C 一样取消主任务，触发正常的清理流程
+    task = asyncio.current_task()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    except (NotImplementedError, AttributeError, RuntimeError):
+        pass
+
+    # 子进程资源控制，未指定任何选项时不启用
+    resource_limiter = ResourceLimiter(
+        cpu_affinity=args.cpu_affinity,
+        nice=args.nice,
+        ionice_class=args.ionice_class,
+        ionice_level=args.ionice_level,
+        cgroup_memory=args.cgroup_memory,
+        cgroup_cpu=args.cgroup_cpu
+    )
+
+    state_store = StateStore(args.output_dir)
+    client_kwargs = dict(
+        config_dir=args.output_dir,
+        executable=args.executable,
+        ready_timeout=args.ready_timeout,
+        probe_target=args.probe_target,
+        max_restarts=args.max_restarts,
+        restart_window=args.restart_window,
+        log_level=args.log_level,
+        state_store=state_store,
+        resource_limiter=resource_limiter,
+        singbox_executable=args.singbox_executable,
+        single_core=args.single_core
+    )
+
+    # 如果指定了过滤模式，则直接使用过滤模式连接
+    if args.filter:
+        print(f"使用指定的过滤模式: {args.filter}")
+
+        client = Hysteria2Client(**client_kwargs)
+
+        try:
+            if args.metrics_listen:
+                await client.start_metrics_server(args.metrics_listen)
+
+            # 批量连接代理
+            print("\n正在建立连接...")
+            results = await client.batch_connect(
+                filter_pattern=args.filter,
+                max_parallel=args.spawn_concurrency,
+                adaptive=args.adaptive_spawn
+            )
+
+            if args.health_interval > 0:
+                client.start_health_checker(
+                    sum(1 for result in results if result["success"]),
+                    interval=args.health_interval,
+                    max_failures=args.health_failures,
+                    concurrency=args.probe_concurrency
+                )
+
+            if args.lb_listen:
+                await client.start_load_balancer(args.lb_listen, args.lb_strategy)
+
+            await _serve(args, client, run_file, 0)
+        except Exception as e:
+            print(f"连接代理时出错: {e}")
+        finally:
+            # 清理资源
+            await client.cleanup()
+            run_file.remove()
+
+        return
+
+    # 步骤 1：从状态文件中读取端口信息
+    print("步骤 1: 正在读取节点状态...")
+
+    if not state_store.exists():
+        print(f"状态文件 {state_store.path} 不存在，请先执行 convert")
+        return
+
+    available_ports = state_store.ports()
+
+    if not available_ports:
+        print("可用端口列表为空，程序退出")
+        return
+
+    # 步骤 2：选择端口，延迟排序模式下先选出候选端口，连接后再按延迟筛选
+    if args.select == "random":
+        print(f"步骤 2: 正在随机选择 {args.count} 个端口...")
+        sample_size = args.count
+    else:
+        sample_size = args.candidates if args.candidates > 0 else len(available_ports)
+        print(f"步骤 2: 正在选择 {sample_size} 个候选端口，连接后按 {args.select} 模式保留 {args.count} 个...")
+
+    # 如果要选择的数量大于可用端口数量，则使用所有端口
+    if sample_size >= len(available_ports):
+        selected_ports = available_ports
+    else:
+        # 随机选择端口
+        selected_ports = random.sample(available_ports, sample_size)
+
+    if not selected_ports:
+        print("未能选择到有效端口，程序退出")
+        return
+
+    # 打印选择的端口
+    print("\n选择的代理地址:")
+    for port in selected_ports:
+        print(f"127.0.0.1:{port}")
+
+    # 步骤 3：建立连接
+    print("\n步骤 3: 正在建立连接...")
+
+    client = Hysteria2Client(**client_kwargs)
+
+    try:
+        if args.metrics_listen:
+            await client.start_metrics_server(args.metrics_listen)
+
+        # 根据选择的端口直接从状态中查找对应的配置文件
+        selected_config_files = [state_store.config_path(port) for port in selected_ports]
+
+        if not selected_config_files:
+            print("未找到对应的配置文件，程序退出")
+            return
+
+        results = await client.batch_connect(
+            config_files=selected_config_files,
+            max_parallel=args.spawn_concurrency,
+            adaptive=args.adaptive_spawn
+        )
+
+        # 按实测延迟保留最优节点，终止其余节点
+        if args.select != "random":
+            selected = await client.select_nodes(
+                results,
+                args.count,
+                mode=args.select,
+                probe_url=args.probe_url,
+                concurrency=args.probe_concurrency
+            )
+            print("\n最终保留的代理地址:")
+            for result in selected:
+                print(f"127.0.0.1:{result['port']}")
+        else:
+            selected = [result for result in results if result["success"]]
+
+        # 健康检查：优先用未参与本次选择的节点补位，其次是落选的候选节点
+        if args.health_interval > 0:
+            kept_files = {result["config_file"] for result in selected}
+            spares = [state_store.config_path(port) for port in set(available_ports) - set(selected_ports)]
+            random.shuffle(spares)
+            spares += [path for path in selected_config_files if path not in kept_files]
+            client.start_health_checker(
+                args.count,
+                spares,
+                interval=args.health_interval,
+                max_failures=args.health_failures,
+                concurrency=args.probe_concurrency
+            )
+
+        if args.lb_listen:
+            await client.start_load_balancer(args.lb_listen, args.lb_strategy)
+
+        await _serve(args, client, run_file, args.count)
+    except Exception as e:
+        print(f"连接代理时出错: {e}")
+    finally:
+        # 清理资源
+        await client.cleanup()
+        run_file.remove()
+
+
+async def status(args: argparse.Namespace) -> int:
+    """执行 status 子命令，打印连接进程和节点状态
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        退出码，连接进程在运行时为 0，否则为 1
+    """
+    from .utils.state_store import StateStore
+    from .utils.run_file import RunFile
+    from .utils.network import probe_listener
+
+    running = RunFile(args.output_dir).read()
+    alive = bool(running) and RunFile.is_alive(running.get("pid", 0))
+    if alive:
+        uptime = time.time() - running.get("started_at", time.time())
+        print(f"连接进程运行中，PID: {running['pid']}，运行时长: {uptime:.0f}秒")
+    else:
+        print("没有运行中的连接进程")
+
+    state_store = StateStore(args.output_dir)
+    if not state_store.exists():
+        print(f"状态文件 {state_store.path} 不存在")
+        return 0 if alive else 1
+
+    # 只探测连接进程记录的节点
+    running_ports = {node["port"] for node in running.get("nodes", [])} if alive else set()
+    ports = state_store.ports()
+    listening = await asyncio.gather(
+        *(probe_listener("127.0.0.1", port, args.probe_timeout) for port in ports if port in running_ports)
+    )
+    listening = dict(zip([port for port in ports if port in running_ports], listening))
+
+    print(f"共 {len(ports)} 个节点，连接中 {len(running_ports)} 个，监听正常 {sum(listening.values())} 个")
+    for port in ports:
+        node = state_store.get_by_port(port)
+        health = node.get("health") or {}
+        if port in listening:
+            state = "监听中" if listening[port] else "无响应"
+        else:
+            state = "未连接"
+        checked = time.strftime("%m-%d %H:%M:%S", time.localtime(health["checked_at"])) if health.get("checked_at") else "-"
+        print(f"  127.0.0.1:{port}  {state}  最近健康状态: {health.get('status', '-')}（{checked}）  "
+              f"{node.get('name') or node['file']}  {node.get('server') or ''}")
+    return 0 if alive else 1
+
+
+async def stop(args: argparse.Namespace) -> int:
+    """执行 stop 子命令，终止正在运行的连接进程
+
+    先发送 SIGTERM 让连接进程自行清理子进程，超时后强制终止连接进程和运行文件中记录的子进程。
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        退出码，成功终止或没有运行中的连接进程时为 0
+    """
+    from .utils.run_file import RunFile
+
+    run_file = RunFile(args.output_dir)
+    running = run_file.read()
+    if not running or not RunFile.is_alive(running.get("pid", 0)):
+        print("没有运行中的连接进程")
+        return 0
+
+    pid = running["pid"]
+    print(f"正在终止连接进程，PID: {pid}...")
+    os.kill(pid, signal.SIGTERM)
+
+    deadline = time.monotonic() + args.timeout
+    while time.monotonic() < deadline and RunFile.is_alive(pid):
+        await asyncio.sleep(0.1)
+    if not RunFile.is_alive(pid):
+        print("连接进程已退出")
+        return 0
+
+    print(f"连接进程在 {args.timeout:.0f} 秒内未退出，强制终止")
+    force = getattr(signal, "SIGKILL", signal.SIGTERM)
+    for target in [pid] + [node["pid"] for node in running.get("nodes", []) if node.get("pid")]:
+        if not RunFile.is_alive(target):
+            continue
+        try:
+            # 子进程在各自的新会话中启动，进程组 ID 等于 PID，连同其子进程一起终止
+            if target != pid and hasattr(os, "killpg"):
+                os.killpg(target, force)
+            else:
+                os.kill(target, force)
+        except OSError:
+            pass
+    try:
+        os.unlink(run_file.path)
+    except OSError:
+        pass
+    return 1
+
+
+async def run(args: argparse.Namespace) -> None:
+    """执行 run 子命令，先转换再连接
+
+    Args:
+        args: 命令行参数
+    """
+    config_files = await convert(args)
+    if not config_files:
+        print("未能生成有效的代理配置文件，程序退出")
+        return
+    await connect(args)
+
+
+async def ctl(args: argparse.Namespace) -> int:
+    """执行 ctl 子命令，向守护进程发送控制命令并打印结果
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        退出码，命令成功时为 0
+    """
+    from .hysteria2.daemon import send_command
+
+    path = socket_path(args)
+    try:
+        response = await send_command(path, args.action, args.targets)
+    except (OSError, ValueError, asyncio.TimeoutError) as e:
+        print(f"无法连接守护进程 {path}: {e}")
+        return 1
+    if not response.get("ok"):
+        print(f"命令执行失败: {response.get('error')}")
+        return 1
+
+    result = response["result"]
+    if args.action == "list":
+        print(f"共 {len(result)} 个节点")
+        for node in result:
+            state = "运行中" if node["alive"] else "已退出"
+            print(f"  127.0.0.1:{node['port']}  PID: {node['pid']}  {state}  重启 {node['restarts']} 次  "
+                  f"运行 {node['uptime']:.0f}秒  {node.get('name') or os.path.basename(node['config_file'])}")
+    elif args.action == "remove":
+        for config_file in result:
+            print(f"已移除: {config_file}")
+    elif args.action == "reload":
+        print(f"重载完成: 移除 {len(result['removed'])} 个，重启 {len(result['restarted'])} 个，"
+              f"新增 {len(result['added'])} 个，未变化 {result['unchanged']} 个")
+    else:
+        for item in result:
+            if item["success"]:
+                print(f"已启动: 127.0.0.1:{item['port']}  {item['config_file']}")
+            else:
+                print(f"启动失败: {item['config_file']}  {item.get('error')}")
+    return 0
+
+
+async def daemon(args: argparse.Namespace) -> None:
+    """执行 daemon 子命令，先转换再连接，之后通过控制接口管理节点
+
+    Args:
+        args: 命令行参数
+    """
+    await run(args)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口
+
+    Args:
+        argv: 命令行参数，不指定则使用 sys.argv
+
+    Returns:
+        退出码
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # 兼容不带子命令的旧用法
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "run")
+    args = build_parser().parse_args(argv)
+
+    handlers = {
+        "convert": convert, "connect": connect, "status": status, "stop": stop,
+        "run": run, "daemon": daemon, "ctl": ctl
+    }
+    try:
+        result = asyncio.run(handlers[args.command](args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        return 130
+    if args.command == "convert":
+        return 0 if result else 1
+    return result or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
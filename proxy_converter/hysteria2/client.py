@@ -5,31 +5,87 @@
 Hysteria2 客户端模块，用于管理 Hysteria2 代理连接
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Awaitable
 
 from ..utils.config_manager import ConfigManager
+from ..utils.readiness import ReadinessProbe
+from ..utils.state_store import StateStore
+from ..utils.resources import ResourceLimiter
+from ..utils.metrics import NodeMetrics, MetricsServer
 from .process_manager import ProcessManager
+from .shared_core import SharedCoreProcessManager
 from .connection import ConnectionManager
+from .load_balancer import LoadBalancer
+from .selector import NodeSelector
+from .health import HealthChecker
+from .daemon import NodeDaemon
 
 
 class Hysteria2Client:
     """Hysteria2 客户端封装类，用于建立 Hysteria2 代理连接"""
 
-    def __init__(self, config_file: str = None, config_dir: str = None, executable: str = None):
+    def __init__(
+        self,
+        config_file: str = None,
+        config_dir: str = None,
+        executable: str = None,
+        ready_timeout: float = 10.0,
+        probe_target: str = "www.gstatic.com:443",
+        max_restarts: int = 5,
+        restart_window: float = 60.0,
+        log_level: str = "debug",
+        state_store: StateStore = None,
+        resource_limiter: ResourceLimiter = None,
+        singbox_executable: str = None,
+        single_core: bool = False
+    ):
         """初始化 Hysteria2 客户端
 
         Args:
             config_file: 配置文件路径
             config_dir: 配置文件目录，当需要批量连接时使用
             executable: Hysteria2 可执行文件路径，不指定则自动查找
+            ready_timeout: 每个节点的就绪截止时间（秒）
+            probe_target: 就绪探测时 CONNECT 的目标地址（host:port），为空则只探测本地监听
+            max_restarts: 节点在 restart_window 内允许的最大重启次数，0 表示崩溃后不重启
+            restart_window: 统计崩溃次数的时间窗口（秒）
+            log_level: Hysteria2 子进程的日志级别
+            state_store: 运行状态存储，提供时连接结果会写入节点的健康状态
+            resource_limiter: 资源控制器，为子进程设置 CPU 亲和性、优先级和 cgroup 限制
+            singbox_executable: sing-box 可执行文件路径，用于 trojan、vless、ss、tuic 节点，不指定则自动查找
+            single_core: 是否使用单核心模式，所有节点（包括 Hysteria2 节点）由同一个 sing-box 进程提供
         """
         self.config_file = config_file
         self.config_dir = config_dir
+        self.state_store = state_store
+        self.probe_target = probe_target
+        
+        # 节点指标，由连接管理器和负载均衡器更新
+        self.metrics = NodeMetrics()
         
         # 初始化各个管理器
         self.config_manager = ConfigManager(config_dir)
-        self.process_manager = ProcessManager(executable)
-        self.connection_manager = ConnectionManager(self.config_manager, self.process_manager)
+        manager_class = SharedCoreProcessManager if single_core else ProcessManager
+        self.process_manager = manager_class(
+            executable,
+            max_restarts=max_restarts,
+            restart_window=restart_window,
+            log_level=log_level,
+            resource_limiter=resource_limiter,
+            executables={"sing-box": singbox_executable} if singbox_executable else None
+        )
+        self.connection_manager = ConnectionManager(
+            self.config_manager,
+            self.process_manager,
+            ReadinessProbe(timeout=ready_timeout, probe_target=probe_target),
+            state_store,
+            self.metrics
+        )
+        
+        self.load_balancer = None
+        self.metrics_server = None
+        self.health_checker = None
+        self.daemon = None
         
         # 验证配置目录
         if self.config_dir and not self.config_manager.validate_config_dir():
@@ -39,14 +95,18 @@ class Hysteria2Client:
         self, 
         limit: int = 0, 
         filter_pattern: str = None,
-        max_parallel: int = 0
+        max_parallel: int = 0,
+        config_files: List[str] = None,
+        adaptive: bool = False
     ) -> List[Dict[str, Any]]:
         """批量连接多个服务器
 
         Args:
             limit: 最大连接数量，0 表示不限制
             filter_pattern: 过滤配置文件的模式，None 表示不过滤
-            max_parallel: 最大并发数，0 表示不限制
+            max_parallel: 最大并发数，0 表示不限制；自适应模式下为窗口上限
+            config_files: 直接指定要连接的配置文件路径，指定时不再扫描配置目录
+            adaptive: 是否按近期节点的就绪耗时和失败率自适应调整并发窗口
 
         Returns:
             连接结果列表
@@ -55,13 +115,150 @@ class Hysteria2Client:
         return await self.connection_manager.connect_batch(
             limit=limit,
             filter_pattern=filter_pattern,
-            max_parallel=max_parallel
+            max_parallel=max_parallel,
+            config_files=config_files,
+            adaptive=adaptive
         )
     
+    async def select_nodes(
+        self,
+        results: List[Dict[str, Any]],
+        count: int,
+        mode: str = "fastest",
+        probe_url: str = "http://www.gstatic.com/generate_204",
+        concurrency: int = 16
+    ) -> List[Dict[str, Any]]:
+        """按实测延迟从已连接的节点中保留 count 个，终止其余节点
+
+        Args:
+            results: batch_connect 返回的连接结果列表
+            count: 需要保留的节点数量
+            mode: 选择模式，random、fastest 或 weighted
+            probe_url: 测量延迟时访问的目标 URL
+            concurrency: 同时测量的最大节点数
+
+        Returns:
+            被选中的连接结果列表
+        """
+        selector = NodeSelector(self.process_manager, probe_url=probe_url, concurrency=concurrency)
+        return await selector.select(results, count, mode)
+    
+    async def start_load_balancer(self, listen: str = "127.0.0.1:8000", strategy: str = "round_robin") -> LoadBalancer:
+        """启动负载均衡前置代理，将连接分发到所有运行中的节点
+
+        Args:
+            listen: 前置代理监听地址
+            strategy: 选路策略，round_robin、least_conn 或 random
+
+        Returns:
+            负载均衡器
+        """
+        self.load_balancer = LoadBalancer(self.process_manager, listen=listen, strategy=strategy, metrics=self.metrics)
+        await self.load_balancer.start()
+        return self.load_balancer
+    
+    async def start_metrics_server(self, listen: str = "127.0.0.1:9100") -> MetricsServer:
+        """启动 Prometheus 指标端点
+
+        Args:
+            listen: 指标端点监听地址
+
+        Returns:
+            指标端点
+        """
+        self.metrics_server = MetricsServer(self.metrics, self.process_manager, listen)
+        await self.metrics_server.start()
+        return self.metrics_server
+    
+    def start_health_checker(
+        self,
+        target_count: int,
+        spares: List[str] = None,
+        interval: float = 30.0,
+        max_failures: int = 3,
+        concurrency: int = 8
+    ) -> HealthChecker:
+        """启动后台健康检查，驱逐连续失败的节点并用备用配置补位
+
+        Args:
+            target_count: 需要保持的可用节点数量
+            spares: 备用配置文件路径列表
+            interval: 两轮检查之间的平均间隔（秒）
+            max_failures: 连续失败多少次后驱逐节点
+            concurrency: 同时进行的最大探测数
+
+        Returns:
+            健康检查器
+        """
+        self.health_checker = HealthChecker(
+            self.connection_manager,
+            self.process_manager,
+            target_count,
+            spares=spares,
+            interval=interval,
+            concurrency=concurrency,
+            max_failures=max_failures,
+            probe_target=self.probe_target,
+            state_store=self.state_store,
+            metrics=self.metrics
+        )
+        self.health_checker.start()
+        return self.health_checker
+    
+    async def start_daemon(
+        self,
+        socket_path: str,
+        target_count: int = 0,
+        regenerate: Callable[[], Awaitable[List[str]]] = None,
+        on_change: Callable[[], None] = None
+    ) -> NodeDaemon:
+        """启动守护进程控制接口，通过 UNIX 套接字查看、添加、移除、重启节点和热重载
+
+        Args:
+            socket_path: 控制套接字路径
+            target_count: 重载后需要保持的节点数量，0 表示不补足
+            regenerate: 重新生成配置的协程函数，返回配置文件路径列表
+            on_change: 节点增减后的回调
+
+        Returns:
+            守护进程
+        """
+        self.daemon = NodeDaemon(
+            self.connection_manager,
+            self.process_manager,
+            socket_path,
+            target_count=target_count,
+            regenerate=regenerate,
+            state_store=self.state_store,
+            on_change=on_change
+        )
+        await self.daemon.start()
+        return self.daemon
+    
+    def get_status(self) -> List[Dict[str, Any]]:
+        """获取每个节点的运行状态
+
+        Returns:
+            状态列表，包含端口、PID、是否存活、重启次数和运行时长
+        """
+        return self.process_manager.get_process_stats()
+    
     async def wait_for_interrupt(self):
         """等待用户中断并清理资源"""
         await self.process_manager.wait_for_interrupt()
     
     async def cleanup(self):
         """清理所有资源"""
+        if self.daemon:
+            await self.daemon.stop()
+            self.daemon = None
+        if self.health_checker:
+            await self.health_checker.stop()
+            self.health_checker = None
+        if self.load_balancer:
+            await self.load_balancer.stop()
+            self.load_balancer = None
+        if self.metrics_server:
+            await self.metrics_server.stop()
+            self.metrics_server = None
         await self.process_manager.cleanup_processes()
@@ -11,41 +11,66 @@ import asyncio
 from typing import List, Dict, Any
 
 from ..utils.config_manager import ConfigManager
+from ..utils.network import parse_listen_address, config_listeners
+from ..utils.readiness import ReadinessProbe
+from ..utils.state_store import StateStore
+from ..utils.metrics import NodeMetrics
+from ..utils.concurrency import AdaptiveConcurrency
 from .process_manager import ProcessManager
 
 
 class ConnectionManager:
     """Hysteria2 连接管理类"""
     
-    def __init__(self, config_manager: ConfigManager, process_manager: ProcessManager):
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        process_manager: ProcessManager,
+        readiness_probe: ReadinessProbe = None,
+        state_store: StateStore = None,
+        metrics: NodeMetrics = None
+    ):
         """初始化连接管理器
         
         Args:
             config_manager: 配置管理器
             process_manager: 进程管理器
+            readiness_probe: 就绪探测器，不指定则使用默认参数
+            state_store: 运行状态存储，提供时连接结果会写入节点的健康状态
+            metrics: 指标存储，提供时记录每个节点的就绪状态和就绪耗时
         """
         self.config_manager = config_manager
         self.process_manager = process_manager
+        self.readiness_probe = readiness_probe or ReadinessProbe()
+        self.state_store = state_store
+        self.metrics = metrics
+        # 最近一次自适应批量连接使用的并发窗口，供汇总报告读取
+        self.concurrency: AdaptiveConcurrency = None
     
     async def connect_batch(
         self, 
         limit: int = 0, 
         filter_pattern: str = None,
-        max_parallel: int = 0
+        max_parallel: int = 0,
+        config_files: List[str] = None,
+        adaptive: bool = False
     ) -> List[Dict[str, Any]]:
         """批量连接多个服务器
         
         Args:
             limit: 最大连接数量，0 表示不限制
             filter_pattern: 过滤配置文件的模式，None 表示不过滤
-            max_parallel: 最大并发数，0 表示不限制
+            max_parallel: 最大并发数，0 表示不限制；自适应模式下为窗口上限
+            config_files: 直接指定要连接的配置文件路径，指定时不再扫描配置目录
+            adaptive: 是否按近期节点的就绪耗时和失败率自适应调整并发窗口
         
         Returns:
             连接结果列表
         """
         # 获取所有配置文件
-        config_files = []
-        if self.config_manager.config_dir and os.path.isdir(self.config_manager.config_dir):
+        if config_files is not None:
+            config_files = config_files[:limit] if limit > 0 else list(config_files)
+        elif self.config_manager.config_dir and os.path.isdir(self.config_manager.config_dir):
             config_files = self.config_manager.select_config_files(limit, filter_pattern)
         else:
             print(f"配置目录 {self.config_manager.config_dir} 不存在或不是目录")
@@ -59,6 +84,8 @@ class ConnectionManager:
         
         # 控制并发数
         semaphore = asyncio.Semaphore(max_parallel if max_parallel > 0 else len(config_files))
+        if adaptive:
+            self.concurrency = AdaptiveConcurrency(maximum=max_parallel if max_parallel > 0 else len(config_files))
         
         print(f"准备并发连接 {len(config_files)} 个服务器...")
         total_start_time = time.time()
@@ -66,8 +93,25 @@ class ConnectionManager:
         # 预分配资源
         resources = await self._prepare_resources(config_files)
         
+        # 本批次配置中的端口不作为冲突时的替代端口
+        for resource in resources:
+            for _, listen in resource["listeners"]:
+                try:
+                    _, port = parse_listen_address(listen)
+                    self.process_manager.port_allocator.exclude.add(port)
+                except ValueError:
+                    pass
+        
         # 创建并发任务，使用真正的异步方式
         async def connect_with_semaphore(resource):
+            if adaptive:
+                started = await self.concurrency.acquire()
+                result = {"success": False}
+                try:
+                    result = await self._connect_one(resource)
+                    return result
+                finally:
+                    await self.concurrency.release(started, result["success"])
             async with semaphore:
                 return await self._connect_one(resource)
         
@@ -96,6 +140,27 @@ class ConnectionManager:
         successful_count = sum(1 for result in results if result["success"])
         print(f"成功连接 {successful_count}/{len(results)} 个服务器")
         
+        # 统计就绪耗时
+        ready_times = sorted(result["time_to_ready"] for result in results if result.get("time_to_ready") is not None)
+        if ready_times:
+            print(f"就绪耗时: 最短 {ready_times[0]:.3f}秒，"
+                  f"中位 {ready_times[len(ready_times) // 2]:.3f}秒，最长 {ready_times[-1]:.3f}秒")
+        
+        if adaptive:
+            print(f"并发窗口变化: {self.concurrency.summary()}")
+        
+        # 记录每个节点最近的健康状态
+        if self.state_store is not None:
+            for result in results:
+                if result["success"]:
+                    self.state_store.update_health(
+                        result["config_file"], "up",
+                        port=result["port"], time_to_ready=result["time_to_ready"]
+                    )
+                else:
+                    self.state_store.update_health(result["config_file"], "down", error=result.get("error"))
+            self.state_store.save()
+        
         total_end_time = time.time()
         print(f"整个批量连接过程完成，总耗时: {total_end_time - total_start_time:.2f}秒")
         
@@ -108,7 +173,7 @@ class ConnectionManager:
             config_files: 配置文件列表
             
         Returns:
-            资源列表，每个资源包含配置文件和配置内容
+            资源列表，每个资源包含配置文件、配置内容和本地代理监听
         """
         resources = []
         
@@ -119,14 +184,16 @@ class ConnectionManager:
             try:
                 config = self.config_manager.load_config(config_file)
                 
-                # 检查配置是否包含 HTTP 监听配置
-                if "http" not in config or "listen" not in config["http"]:
-                    print(f"配置文件 {os.path.basename(config_file)} 不包含 HTTP 监听配置，跳过")
+                # 检查配置是否包含 HTTP 或 SOCKS5 监听配置
+                listeners = config_listeners(config)
+                if not listeners:
+                    print(f"配置文件 {os.path.basename(config_file)} 不包含 HTTP 或 SOCKS5 监听配置，跳过")
                     return None
                 
                 return {
                     "config_file": config_file,
-                    "config": config
+                    "config": config,
+                    "listeners": listeners
                 }
             except Exception as e:
                 print(f"准备资源失败 {os.path.basename(config_file)}: {e}")
@@ -160,58 +227,75 @@ class ConnectionManager:
         start_time = time.time()
         config_name = os.path.basename(config_file)
         
-        # 获取监听端口
-        http_listen = config.get("http", {}).get("listen", "")
-        if not http_listen:
+        # 获取主监听，HTTP 优先，其次 SOCKS5
+        listeners = resource.get("listeners") or config_listeners(config)
+        if not listeners:
             end_time = time.time()
-            print(f"[{config_name}] 配置中没有 HTTP 监听地址，无法连接。耗时: {end_time - start_time:.2f}秒")
+            print(f"[{config_name}] 配置中没有 HTTP 或 SOCKS5 监听地址，无法连接。耗时: {end_time - start_time:.2f}秒")
             return {
                 "config_file": config_file,
                 "success": False,
-                "error": "配置中没有 HTTP 监听地址"
+                "error": "配置中没有 HTTP 或 SOCKS5 监听地址"
             }
+        protocol, listen = listeners[0]
         
-        # 提取端口
+        # 提取主机和端口
         try:
-            port = int(http_listen.split(":")[-1])
-        except:
+            host, port = parse_listen_address(listen)
+        except ValueError:
             end_time = time.time()
-            print(f"[{config_name}] 无法解析 HTTP 监听地址 {http_listen}。耗时: {end_time - start_time:.2f}秒")
+            print(f"[{config_name}] 无法解析监听地址 {listen}。耗时: {end_time - start_time:.2f}秒")
             return {
                 "config_file": config_file,
                 "success": False,
-                "error": f"无法解析 HTTP 监听地址 {http_listen}"
+                "error": f"无法解析监听地址 {listen}"
             }
         
         try:
-            # 启动进程
+            # 启动进程，端口被占用时进程管理器会改用替代端口
             process_info = await self.process_manager.launch_process(config_file, config, port)
+            if process_info["config"] is not config:
+                listeners = config_listeners(process_info["config"])
+                port = process_info["port"]
             
-            # 仅等待很短时间检查进程是否立即失败
-            await asyncio.sleep(0.2)
+            # 轮询本地监听并通过隧道探测，节点就绪后立即返回
+            readiness = await self.readiness_probe.wait_ready(
+                host, port, process_info["process"], protocol, process_info.get("log_state")
+            )
             
-            # 检查进程是否正常运行
-            returncode = process_info["process"].returncode
-            if returncode is not None:
+            if not readiness["ready"]:
                 end_time = time.time()
-                print(f"[{config_name}] 进程已退出，退出码: {returncode}。耗时: {end_time - start_time:.2f}秒")
-                    
+                print(f"[{config_name}] 节点未就绪: {readiness['error']}。耗时: {end_time - start_time:.2f}秒")
+                
+                # 未就绪的进程不再保留
+                await self.process_manager.stop_process(process_info)
+                if self.metrics is not None:
+                    self.metrics.set_down(port, config_name)
+                
                 return {
                     "config_file": config_file,
                     "success": False,
                     "port": port,
-                    "error": f"进程立即退出，退出码: {returncode}"
+                    "stage": readiness["stage"],
+                    "error": readiness["error"]
                 }
             
             # 连接成功
             end_time = time.time()
-            print(f"[{config_name}] 连接成功。HTTP 代理: {http_listen}。耗时: {end_time - start_time:.2f}秒")
+            listen_text = "，".join(f"{kind.upper()} 代理: {address}" for kind, address in listeners)
+            print(f"[{config_name}] 连接成功。{listen_text}。"
+                  f"就绪耗时: {readiness['time_to_ready']:.3f}秒，总耗时: {end_time - start_time:.2f}秒")
+            if self.metrics is not None:
+                self.metrics.set_ready(port, config_name, readiness["time_to_ready"])
             
             return {
                 "config_file": config_file,
                 "success": True,
                 "port": port,
-                "http_listen": http_listen
+                "protocol": protocol,
+                "http_listen": dict(listeners).get("http"),
+                "socks5_listen": dict(listeners).get("socks5"),
+                "time_to_ready": readiness["time_to_ready"]
             }
             
         except Exception as e:
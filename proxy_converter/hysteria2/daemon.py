@@ -0,0 +1,372 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+守护进程模块，通过本地 UNIX 套接字提供节点的查看、添加、移除、重启和热重载
+"""
+
+import os
+import json
+import random
+import asyncio
+import hashlib
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+from ..utils.state_store import StateStore
+from .process_manager import ProcessManager
+from .connection import ConnectionManager
+
+
+def effective_config_hash(config: Dict[str, Any]) -> str:
+    """计算节点配置中影响连接的部分的哈希，节点名称不参与计算
+
+    Args:
+        config: 节点配置
+
+    Returns:
+        十六进制哈希值
+    """
+    effective = {key: value for key, value in config.items() if key != "name"}
+    return hashlib.sha256(json.dumps(effective, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class NodeDaemon:
+    """节点守护进程
+
+    连接建立后在 UNIX 套接字上接受控制命令，每个连接发送一行 JSON 请求，收到一行 JSON 响应：
+    请求格式为 {"command": "list" | "add" | "remove" | "restart" | "reload", "targets": [...]}，
+    targets 为端口或配置文件路径；响应格式为 {"ok": true, "result": ...} 或 {"ok": false, "error": "..."}。
+
+    reload 先重新生成配置（增量生成保证未变化节点的端口和文件不变），再与运行中的节点逐一比较：
+    配置文件已删除的节点被移除，有效配置变化的节点被重启，其余节点不受影响、继续提供服务；
+    运行中的节点少于 target_count 时从未运行的节点中随机补足。
+    """
+
+    COMMANDS = ("list", "add", "remove", "restart", "reload")
+
+    def __init__(
+        self,
+        connection_manager: ConnectionManager,
+        process_manager: ProcessManager,
+        socket_path: str,
+        target_count: int = 0,
+        regenerate: Callable[[], Awaitable[List[str]]] = None,
+        state_store: StateStore = None,
+        on_change: Callable[[], None] = None
+    ):
+        """初始化守护进程
+
+        Args:
+            connection_manager: 连接管理器，用于启动节点
+            process_manager: 进程管理器，提供运行中的节点并终止节点
+            socket_path: 控制套接字路径
+            target_count: reload 后需要保持的节点数量，0 表示不补足
+            regenerate: 重新生成配置的协程函数，返回配置文件路径列表，不指定时 reload 不可用
+            state_store: 运行状态存储，用于按端口查找配置文件，reload 后会重新加载
+            on_change: 节点增减后的回调，如更新运行文件
+        """
+        self.connection_manager = connection_manager
+        self.process_manager = process_manager
+        self.socket_path = socket_path
+        self.target_count = target_count
+        self.regenerate = regenerate
+        self.state_store = state_store
+        self.on_change = on_change
+        # 每个运行中节点启动时的有效配置哈希，以配置文件路径为键
+        self.config_hashes: Dict[str, str] = {}
+        self._lock = asyncio.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """记录当前节点的配置哈希并开始监听控制套接字
+
+        Raises:
+            RuntimeError: 当前平台不支持 UNIX 套接字时抛出
+        """
+        if not hasattr(asyncio, "start_unix_server"):
+            raise RuntimeError("当前平台不支持 UNIX 套接字，无法启动守护进程控制接口")
+        for process_info in self.process_manager.processes:
+            self._record_hash(process_info["config_file"])
+
+        # 残留的套接字文件来自异常退出的守护进程
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        print(f"守护进程控制接口已启动: {self.socket_path}")
+
+    async def stop(self) -> None:
+        """停止监听并删除套接字文件"""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+            print("守护进程控制接口已停止")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理一个控制连接
+
+        Args:
+            reader: 读取流
+            writer: 写入流
+        """
+        try:
+            line = await asyncio.wait_for(reader.readline(), 5.0)
+            try:
+                request = json.loads(line)
+                result = await self.execute(request.get("command"), request.get("targets") or [])
+                response = {"ok": True, "result": result}
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            await writer.drain()
+        except (OSError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def execute(self, command: str, targets: List[Any] = None) -> Any:
+        """执行控制命令
+
+        Args:
+            command: 命令名
+            targets: 端口或配置文件路径列表
+
+        Returns:
+            命令结果
+
+        Raises:
+            ValueError: 命令或参数无效时抛出
+        """
+        if command not in self.COMMANDS:
+            raise ValueError(f"未知命令: {command}，可选: {', '.join(self.COMMANDS)}")
+        if command == "list":
+            return self.list_nodes()
+
+        async with self._lock:
+            if command == "reload":
+                result = await self.reload()
+            elif not targets:
+                raise ValueError(f"{command} 命令需要指定端口或配置文件")
+            elif command == "add":
+                result = await self.add_nodes(self._resolve_files(targets))
+            elif command == "remove":
+                result = await self.remove_nodes(self._find_nodes(targets))
+            else:
+                result = await self.restart_nodes(self._find_nodes(targets))
+        if self.on_change:
+            self.on_change()
+        return result
+
+    def list_nodes(self) -> List[Dict[str, Any]]:
+        """列出运行中的节点
+
+        Returns:
+            节点列表，包含端口、PID、是否存活、重启次数、运行时长、配置文件和节点名称
+        """
+        nodes = []
+        for stats, process_info in zip(self.process_manager.get_process_stats(), self.process_manager.processes):
+            node = self.state_store.get_by_config(stats["config_file"]) if self.state_store else None
+            nodes.append(dict(
+                stats,
+                name=(node or {}).get("name") or process_info["config"].get("name"),
+                uptime=round(stats["uptime"], 1)
+            ))
+        return nodes
+
+    def _resolve_files(self, targets: List[Any]) -> List[str]:
+        """把端口或配置文件路径转换为配置文件路径
+
+        Args:
+            targets: 端口或配置文件路径列表
+
+        Returns:
+            配置文件路径列表
+
+        Raises:
+            ValueError: 端口不在状态中或文件不存在时抛出
+        """
+        config_files = []
+        for target in targets:
+            if isinstance(target, int) or str(target).isdigit():
+                config_file = self.state_store.config_path(int(target)) if self.state_store else None
+                if not config_file:
+                    raise ValueError(f"节点状态中没有端口 {target}")
+            else:
+                config_file = str(target)
+            if not os.path.exists(config_file):
+                raise ValueError(f"配置文件不存在: {config_file}")
+            config_files.append(config_file)
+        return config_files
+
+    def _find_nodes(self, targets: List[Any]) -> List[Dict[str, Any]]:
+        """按端口或配置文件路径查找运行中的节点
+
+        Args:
+            targets: 端口或配置文件路径列表
+
+        Returns:
+            进程信息列表
+
+        Raises:
+            ValueError: 节点未在运行时抛出
+        """
+        nodes = []
+        for target in targets:
+            for process_info in self.process_manager.processes:
+                if (str(process_info["port"]) == str(target)
+                        or os.path.abspath(process_info["config_file"]) == os.path.abspath(str(target))):
+                    nodes.append(process_info)
+                    break
+            else:
+                raise ValueError(f"没有运行中的节点: {target}")
+        return nodes
+
+    def _record_hash(self, config_file: str) -> None:
+        """记录节点当前的有效配置哈希
+
+        Args:
+            config_file: 配置文件路径
+        """
+        try:
+            config = self.connection_manager.config_manager.load_config(config_file)
+        except Exception:
+            return
+        self.config_hashes[config_file] = effective_config_hash(config)
+
+    async def add_nodes(self, config_files: List[str]) -> List[Dict[str, Any]]:
+        """启动节点，已在运行的配置文件会被跳过
+
+        Args:
+            config_files: 配置文件路径列表
+
+        Returns:
+            连接结果列表
+        """
+        running = {process_info["config_file"] for process_info in self.process_manager.processes}
+        config_files = [config_file for config_file in config_files if config_file not in running]
+        if not config_files:
+            return []
+        results = await self.connection_manager.connect_batch(config_files=config_files)
+        for result in results:
+            if result["success"]:
+                self._record_hash(result["config_file"])
+        return [
+            {key: result.get(key) for key in ("config_file", "success", "port", "time_to_ready", "error")}
+            for result in results
+        ]
+
+    async def remove_nodes(self, nodes: List[Dict[str, Any]]) -> List[str]:
+        """终止节点，其余节点不受影响
+
+        Args:
+            nodes: 进程信息列表
+
+        Returns:
+            被终止节点的配置文件路径列表
+        """
+        await asyncio.gather(*(self.process_manager.stop_process(process_info) for process_info in nodes))
+        for process_info in nodes:
+            self.config_hashes.pop(process_info["config_file"], None)
+            if self.connection_manager.metrics is not None:
+                self.connection_manager.metrics.set_down(
+                    process_info["port"], os.path.basename(process_info["config_file"])
+                )
+        return [process_info["config_file"] for process_info in nodes]
+
+    async def restart_nodes(self, nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """重启节点，重新读取配置文件
+
+        Args:
+            nodes: 进程信息列表
+
+        Returns:
+            连接结果列表
+        """
+        config_files = await self.remove_nodes(nodes)
+        return await self.add_nodes([config_file for config_file in config_files if os.path.exists(config_file)])
+
+    async def reload(self) -> Dict[str, Any]:
+        """重新生成配置，只重启有效配置变化的节点
+
+        Returns:
+            重载结果，包含被移除、重启和新增节点的配置文件以及未变化的节点数
+
+        Raises:
+            RuntimeError: 没有提供 regenerate 时抛出
+        """
+        if self.regenerate is None:
+            raise RuntimeError("守护进程未配置订阅来源，无法重载")
+        config_files = await self.regenerate()
+        if self.state_store is not None:
+            self.state_store.load()
+
+        removed, changed = [], []
+        for process_info in list(self.process_manager.processes):
+            config_file = process_info["config_file"]
+            if not os.path.exists(config_file):
+                removed.append(process_info)
+                continue
+            try:
+                config = self.connection_manager.config_manager.load_config(config_file)
+            except Exception:
+                removed.append(process_info)
+                continue
+            if effective_config_hash(config) != self.config_hashes.get(config_file):
+                changed.append(process_info)
+
+        unchanged = len(self.process_manager.processes) - len(removed) - len(changed)
+        print(f"重载: 移除 {len(removed)} 个节点，重启 {len(changed)} 个节点，{unchanged} 个节点未变化")
+        removed_files = await self.remove_nodes(removed)
+        restarted = await self.restart_nodes(changed)
+
+        # 节点被移除后从未运行的节点中补足
+        added = []
+        missing = self.target_count - len(self.process_manager.processes)
+        if missing > 0:
+            running = {process_info["config_file"] for process_info in self.process_manager.processes}
+            candidates = [config_file for config_file in config_files or [] if config_file not in running]
+            random.shuffle(candidates)
+            added = await self.add_nodes(candidates[:missing])
+
+        return {
+            "removed": removed_files,
+            "restarted": [result["config_file"] for result in restarted],
+            "added": [result["config_file"] for result in added],
+            "unchanged": unchanged
+        }
+
+
+async def send_command(socket_path: str, command: str, targets: List[Any] = None, timeout: float = 120.0) -> Dict[str, Any]:
+    """向守护进程发送控制命令
+
+    Args:
+        socket_path: 控制套接字路径
+        command: 命令名
+        targets: 端口或配置文件路径列表
+        timeout: 等待响应的时间（秒），reload 需要重新生成配置并启动节点，默认较长
+
+    Returns:
+        守护进程的响应
+
+    Raises:
+        OSError: 无法连接控制套接字时抛出
+    """
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        writer.write(json.dumps({"command": command, "targets": targets or []}).encode("utf-8") + b"\n")
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout)
+    finally:
+        writer.close()
+    if not line:
+        raise OSError("守护进程关闭了连接")
+    return json.loads(line)
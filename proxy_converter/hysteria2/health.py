@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+健康检查模块，持续探测运行中的节点，驱逐失效节点并启用备用节点补位
+"""
+
+import os
+import random
+import asyncio
+from typing import List, Dict, Any, Optional
+
+from ..utils.network import probe_listener, open_proxy_tunnel, close_writer
+from ..utils.metrics import NodeMetrics
+from ..utils.state_store import StateStore
+from .process_manager import ProcessManager
+from .connection import ConnectionManager
+
+
+class HealthChecker:
+    """节点健康检查器
+
+    每隔 interval 秒（带 ±jitter 比例的随机抖动，避免多个实例同步探测）通过每个存活节点的本地监听
+    发起 CONNECT 探测，同时进行的探测数量不超过 concurrency。连续失败 max_failures 次的节点会被终止，
+    然后从备用配置中依次启动新节点，使可用节点数量保持在 target_count。
+    """
+
+    def __init__(
+        self,
+        connection_manager: ConnectionManager,
+        process_manager: ProcessManager,
+        target_count: int,
+        spares: List[str] = None,
+        interval: float = 30.0,
+        jitter: float = 0.2,
+        timeout: float = 5.0,
+        concurrency: int = 8,
+        max_failures: int = 3,
+        probe_target: str = "www.gstatic.com:443",
+        state_store: StateStore = None,
+        metrics: NodeMetrics = None
+    ):
+        """初始化健康检查器
+
+        Args:
+            connection_manager: 连接管理器，用于启动备用节点
+            process_manager: 进程管理器，提供存活节点并终止失效节点
+            target_count: 需要保持的可用节点数量
+            spares: 备用配置文件路径列表，按顺序启用
+            interval: 两轮检查之间的平均间隔（秒）
+            jitter: 间隔的随机抖动比例
+            timeout: 单次探测的超时时间（秒）
+            concurrency: 同时进行的最大探测数
+            max_failures: 连续失败多少次后驱逐节点
+            probe_target: 探测时 CONNECT 的目标地址，为空则只探测本地监听
+            state_store: 运行状态存储，提供时记录被驱逐节点的健康状态
+            metrics: 指标存储，提供时把被驱逐的节点标记为不可用
+        """
+        self.connection_manager = connection_manager
+        self.process_manager = process_manager
+        self.target_count = target_count
+        self.spares = list(spares or [])
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.max_failures = max_failures
+        self.probe_target = probe_target
+        self.state_store = state_store
+        self.metrics = metrics
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """在后台开始周期性检查"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"健康检查已启动: 间隔 {self.interval:g} 秒，连续失败 {self.max_failures} 次驱逐，"
+                  f"保持 {self.target_count} 个节点，备用 {len(self.spares)} 个")
+
+    async def stop(self) -> None:
+        """停止检查"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _next_delay(self) -> float:
+        """计算下一轮检查前的等待时间
+
+        Returns:
+            等待时间（秒）
+        """
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _run(self) -> None:
+        """周期性执行检查"""
+        while True:
+            await asyncio.sleep(self._next_delay())
+            try:
+                await self.check_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"健康检查出错: {e}")
+
+    async def _probe(self, port: int, protocol: str = "http") -> Optional[str]:
+        """探测单个节点
+
+        Args:
+            port: 节点主监听端口
+            protocol: 主监听的代理协议，http 或 socks5
+
+        Returns:
+            失败原因，探测成功时返回 None
+        """
+        try:
+            if not self.probe_target:
+                return None if await probe_listener("127.0.0.1", port, self.timeout) else "本地监听无响应"
+            _, writer = await open_proxy_tunnel(protocol, "127.0.0.1", port, self.probe_target, self.timeout)
+            await close_writer(writer)
+            return None
+        except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+            return str(e) or type(e).__name__
+
+    async def check_once(self) -> Dict[str, Any]:
+        """执行一轮检查：探测、驱逐并补位
+
+        Returns:
+            本轮统计，包含 checked、failed、evicted 和 promoted
+        """
+        live = self.process_manager.get_live_processes()
+        # 打乱顺序，避免每轮都按相同顺序压到同一批节点上
+        random.shuffle(live)
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def check_one(process_info):
+            async with semaphore:
+                error = await self._probe(process_info["port"], process_info.get("protocol", "http"))
+            if error is None:
+                process_info["health_failures"] = 0
+                return None
+            process_info["health_failures"] = process_info.get("health_failures", 0) + 1
+            config_name = os.path.basename(process_info["config_file"])
+            print(f"[{config_name}] 健康检查失败（连续 {process_info['health_failures']} 次）: {error}")
+            return process_info if process_info["health_failures"] >= self.max_failures else None
+
+        outcomes = await asyncio.gather(*(check_one(process_info) for process_info in live))
+        failed = sum(1 for process_info in live if process_info.get("health_failures", 0) > 0)
+        evicted = [process_info for process_info in outcomes if process_info is not None]
+
+        for process_info in evicted:
+            await self._evict(process_info)
+
+        promoted = await self._promote()
+        if self.state_store is not None and (evicted or promoted):
+            self.state_store.save()
+
+        return {"checked": len(live), "failed": failed, "evicted": len(evicted), "promoted": promoted}
+
+    async def _evict(self, process_info: Dict[str, Any]) -> None:
+        """终止失效节点
+
+        Args:
+            process_info: 进程信息
+        """
+        config_name = os.path.basename(process_info["config_file"])
+        print(f"[{config_name}] 连续 {process_info['health_failures']} 次健康检查失败，驱逐节点")
+        await self.process_manager.stop_process(process_info)
+        if self.state_store is not None:
+            self.state_store.update_health(process_info["config_file"], "down", error="健康检查连续失败，已驱逐")
+        if self.metrics is not None:
+            self.metrics.set_down(process_info["port"], config_name)
+
+    async def _promote(self) -> int:
+        """从备用配置中启动新节点，直到可用节点数量达到目标或备用耗尽
+
+        Returns:
+            成功启用的备用节点数量
+        """
+        promoted = 0
+        while self.spares:
+            # 正在退避重启的节点仍计入，避免其恢复后超出目标数量
+            missing = self.target_count - len(self.process_manager.processes)
+            if missing <= 0:
+                break
+            batch, self.spares = self.spares[:missing], self.spares[missing:]
+            print(f"可用节点不足，启用 {len(batch)} 个备用节点...")
+            results = await self.connection_manager.connect_batch(config_files=batch)
+            promoted += sum(1 for result in results if result["success"])
+        return promoted
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+负载均衡前置代理模块，将一个本地入口的连接分发到所有运行中的 Hysteria2 监听端口
+"""
+
+import random
+import socket
+import asyncio
+from typing import Dict, List, Optional
+
+from ..utils.network import parse_listen_address
+from ..utils.metrics import NodeMetrics
+from .process_manager import ProcessManager
+
+
+class LoadBalancer:
+    """负载均衡前置代理
+
+    在一个本地端口上接受代理连接，按策略选择一个存活节点的主监听端口（HTTP 或 SOCKS5），
+    然后在两个套接字之间双向转发原始字节。
+    代理协议本身由后端解析，前置代理只负责选路和转发，因此 HTTP、CONNECT 和 SOCKS5 请求都能透明通过，
+    入口使用的协议与节点主监听的协议一致。
+    """
+
+    STRATEGIES = ("round_robin", "least_conn", "random")
+
+    def __init__(
+        self,
+        process_manager: ProcessManager,
+        listen: str = "127.0.0.1:8000",
+        strategy: str = "round_robin",
+        buffer_size: int = 256 * 1024,
+        connect_timeout: float = 5.0,
+        max_attempts: int = 3,
+        metrics: NodeMetrics = None
+    ):
+        """初始化负载均衡器
+
+        Args:
+            process_manager: 进程管理器，从中获取存活的后端监听端口
+            listen: 前置代理监听地址
+            strategy: 选路策略，round_robin、least_conn 或 random
+            buffer_size: 每个转发方向使用的缓冲区大小（字节）
+            connect_timeout: 连接后端的超时时间（秒）
+            max_attempts: 后端连接失败时最多尝试的后端数量
+            metrics: 指标存储，提供时按后端统计转发的字节数和连接数
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"不支持的负载均衡策略: {strategy}，可选: {', '.join(self.STRATEGIES)}")
+
+        self.process_manager = process_manager
+        self.listen = listen
+        self.strategy = strategy
+        self.buffer_size = buffer_size
+        self.connect_timeout = connect_timeout
+        self.max_attempts = max_attempts
+        self.metrics = metrics
+
+        # 每个后端端口当前的活动连接数
+        self.active_connections: Dict[int, int] = {}
+        self._rr_index = 0
+        self._server_socket: Optional[socket.socket] = None
+        self._accept_task: Optional[asyncio.Task] = None
+        self._connection_tasks = set()
+
+    async def start(self) -> None:
+        """开始监听并接受连接"""
+        host, port = parse_listen_address(self.listen)
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server_socket.bind((host, port))
+        server_socket.listen(1024)
+        server_socket.setblocking(False)
+        self._server_socket = server_socket
+        self._accept_task = asyncio.create_task(self._accept_loop())
+        print(f"负载均衡代理已启动: {host}:{port}，策略: {self.strategy}")
+
+    async def stop(self) -> None:
+        """停止监听并断开所有转发中的连接"""
+        if self._accept_task:
+            self._accept_task.cancel()
+            try:
+                await self._accept_task
+            except asyncio.CancelledError:
+                pass
+            self._accept_task = None
+
+        for task in list(self._connection_tasks):
+            task.cancel()
+        if self._connection_tasks:
+            await asyncio.gather(*self._connection_tasks, return_exceptions=True)
+
+        if self._server_socket:
+            self._server_socket.close()
+            self._server_socket = None
+            print("负载均衡代理已停止")
+
+    def _live_backends(self) -> List[int]:
+        """获取所有存活后端的端口
+
+        Returns:
+            端口列表
+        """
+        return sorted(process_info["port"] for process_info in self.process_manager.get_live_processes())
+
+    def _pick_backend(self, excluded: set) -> Optional[int]:
+        """按策略选择一个后端
+
+        Args:
+            excluded: 本次连接中已经尝试失败的后端端口
+
+        Returns:
+            后端端口，没有可用后端时返回 None
+        """
+        backends = [port for port in self._live_backends() if port not in excluded]
+        if not backends:
+            return None
+
+        if self.strategy == "least_conn":
+            return min(backends, key=lambda port: self.active_connections.get(port, 0))
+        if self.strategy == "random":
+            return random.choice(backends)
+
+        port = backends[self._rr_index % len(backends)]
+        self._rr_index += 1
+        return port
+
+    async def _accept_loop(self) -> None:
+        """接受新连接，每个连接交给独立任务处理"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                client_socket, _ = await loop.sock_accept(self._server_socket)
+            except OSError as e:
+                print(f"负载均衡代理接受连接时出错: {e}")
+                await asyncio.sleep(0.1)
+                continue
+
+            task = asyncio.create_task(self._handle_client(client_socket))
+            self._connection_tasks.add(task)
+            task.add_done_callback(self._connection_tasks.discard)
+
+    async def _connect_backend(self, port: int) -> socket.socket:
+        """建立到后端监听端口的连接
+
+        Args:
+            port: 后端端口
+
+        Returns:
+            已连接的非阻塞套接字
+        """
+        loop = asyncio.get_running_loop()
+        backend_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        backend_socket.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(backend_socket, ("127.0.0.1", port)), self.connect_timeout)
+        except BaseException:
+            backend_socket.close()
+            raise
+        backend_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return backend_socket
+
+    async def _handle_client(self, client_socket: socket.socket) -> None:
+        """为一个客户端连接选择后端并双向转发
+
+        Args:
+            client_socket: 客户端套接字
+        """
+        client_socket.setblocking(False)
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        backend_socket = None
+        backend_port = None
+        tried = set()
+        try:
+            # 后端连接失败时换一个后端重试
+            while backend_socket is None and len(tried) < self.max_attempts:
+                backend_port = self._pick_backend(tried)
+                if backend_port is None:
+                    break
+                try:
+                    backend_socket = await self._connect_backend(backend_port)
+                except (OSError, asyncio.TimeoutError):
+                    tried.add(backend_port)
+
+            if backend_socket is None:
+                return
+
+            self.active_connections[backend_port] = self.active_connections.get(backend_port, 0) + 1
+            metrics = self.metrics
+            slot = metrics.slot(backend_port) if metrics else 0
+            if metrics:
+                metrics.connections_total[slot] += 1
+                metrics.active_connections[slot] += 1
+            try:
+                await asyncio.gather(
+                    self._relay(client_socket, backend_socket, metrics.bytes_sent if metrics else None, slot),
+                    self._relay(backend_socket, client_socket, metrics.bytes_received if metrics else None, slot)
+                )
+            finally:
+                self.active_connections[backend_port] -= 1
+                if metrics:
+                    metrics.active_connections[slot] -= 1
+        finally:
+            client_socket.close()
+            if backend_socket is not None:
+                backend_socket.close()
+
+    async def _relay(
+        self,
+        source: socket.socket,
+        destination: socket.socket,
+        byte_counter: Optional[List[int]] = None,
+        slot: int = 0
+    ) -> None:
+        """单向转发数据
+
+        使用预分配的大缓冲区批量读写：recv_into 直接写入缓冲区，
+        发送时使用 memoryview 切片，转发过程中不产生额外的字节拷贝。
+
+        Args:
+            source: 读取端套接字
+            destination: 写入端套接字
+            byte_counter: 字节计数列表，转发的字节数累加到其中的 slot 下标
+            slot: 节点在计数列表中的槽位
+        """
+        loop = asyncio.get_running_loop()
+        buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+        try:
+            while True:
+                received = await loop.sock_recv_into(source, buffer)
+                if not received:
+                    break
+                await loop.sock_sendall(destination, view[:received])
+                if byte_counter is not None:
+                    byte_counter[slot] += received
+        except OSError:
+            pass
+        finally:
+            # 半关闭写方向，让对端感知 EOF，另一方向的转发继续进行
+            try:
+                destination.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
@@ -6,119 +6,498 @@ Hysteria2 进程管理模块
 """
 
 import os
+import time
+import random
+import signal
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-from ..utils.filesystem import find_executable, get_executable_names
+from ..utils.filesystem import find_executable, get_executable_names, create_temp_config_file
+from ..utils.network import PortAllocator, parse_listen_address, config_listeners
+from ..utils.log_buffer import LogRingBuffer, drain_stream
+from ..utils.log_events import NodeLogState
+from ..utils.resources import ResourceLimiter
+from ..backends import Backend, backend_for_config
 
 
 class ProcessManager:
-    """Hysteria2 进程管理类"""
+    """Hysteria2 进程管理类
     
-    def __init__(self, executable: str = None):
+    除了启动和终止进程，还负责监督运行中的进程：每个进程由独立的监视任务直接等待其退出，
+    崩溃后按带抖动的指数退避重启；在 restart_window 秒内崩溃超过 max_restarts 次的节点会被放弃。
+    后端提供日志解析器时，子进程输出会被逐行解析为事件并更新节点的 log_state，
+    就绪探测据此立即发现认证失败等启动错误，认证失败的节点不会被重启。
+    启动命令和运行时配置由节点配置对应的协议后端决定，非 Hysteria2 节点由 sing-box 等核心程序提供。
+    """
+    
+    def __init__(
+        self,
+        executable: str = None,
+        max_restarts: int = 5,
+        restart_window: float = 60.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        log_level: str = "debug",
+        log_buffer_lines: int = 200,
+        port_allocator: PortAllocator = None,
+        resource_limiter: ResourceLimiter = None,
+        executables: Dict[str, str] = None,
+        shutdown_grace: float = 2.0
+    ):
         """初始化进程管理器
         
         Args:
             executable: Hysteria2 可执行文件路径，不指定则自动查找
+            max_restarts: 在 restart_window 内允许的最大重启次数，0 表示不重启
+            restart_window: 统计崩溃次数的时间窗口（秒）
+            backoff_base: 重启退避的初始延迟（秒）
+            backoff_max: 重启退避的最大延迟（秒）
+            log_level: 子进程的日志级别，如 debug、info、warn、error
+            log_buffer_lines: 每个节点保留的最近输出行数
+            port_allocator: 端口分配器，配置中的端口已被占用时用它分配替代端口
+            resource_limiter: 资源控制器，为子进程设置 CPU 亲和性、优先级和 cgroup 限制
+            executables: 其他核心程序的可执行文件路径，以程序名为键，如 {"sing-box": "/usr/bin/sing-box"}
+            shutdown_grace: 清理时发送 SIGTERM 后等待的时间（秒），到期后强制终止仍在运行的进程
         """
-        self.executable = executable or self._find_executable()
+        # 可执行文件按程序名在首次使用时查找，只用到 sing-box 的节点不要求安装 Hysteria2
+        self.executables = dict(executables or {})
+        if executable:
+            self.executables["hysteria"] = executable
         self.processes = []
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.log_level = log_level
+        self.log_buffer_lines = log_buffer_lines
+        self.port_allocator = port_allocator or PortAllocator()
+        self.resource_limiter = resource_limiter if resource_limiter and resource_limiter.enabled else None
+        self.shutdown_grace = shutdown_grace
+        # 最近一次清理的统计，包含终止数量、强制终止数量、遗留进程和耗时
+        self.last_shutdown: Optional[Dict[str, Any]] = None
         
-        if not self.executable:
-            raise FileNotFoundError("找不到 Hysteria2 可执行文件，请确保已安装或指定正确的路径")
+        # 监督状态
+        self._exit_future = None
+        self._supervising = False
+        self._stopping = False
+    
+    @property
+    def executable(self) -> Optional[str]:
+        """Hysteria2 可执行文件路径"""
+        return self.get_executable("hysteria")
+    
+    def get_executable(self, name: str) -> Optional[str]:
+        """获取核心程序的可执行文件路径，未指定时自动查找并记住结果
+        
+        Args:
+            name: 程序名，如 hysteria、sing-box
+        
+        Returns:
+            可执行文件路径，找不到时返回 None
+        """
+        if not self.executables.get(name):
+            found = find_executable(get_executable_names(name))
+            if found:
+                self.executables[name] = found
+        return self.executables.get(name)
+    
+    async def _spawn(
+        self,
+        config_file: str,
+        placement: Dict[str, Any] = None,
+        backend: Backend = None
+    ) -> asyncio.subprocess.Process:
+        """创建核心程序子进程
+        
+        Args:
+            config_file: 核心程序读取的配置文件路径
+            placement: 资源放置方案，由资源控制器分配
+            backend: 节点的协议后端，不指定则为 Hysteria2
+        
+        Returns:
+            子进程对象
+        
+        Raises:
+            FileNotFoundError: 找不到后端所需的可执行文件时抛出
+        """
+        backend = backend or backend_for_config({})
+        executable = self.get_executable(backend.executable)
+        if not executable:
+            raise FileNotFoundError(f"找不到 {backend.executable} 可执行文件，请确保已安装或指定正确的路径")
+        
+        # 构建命令
+        cmd = backend.build_command(executable, config_file, self.log_level)
+        
+        kwargs = {}
+        if self.resource_limiter:
+            cmd = self.resource_limiter.wrap_command(cmd)
+            preexec_fn = self.resource_limiter.preexec_fn(placement)
+            if preexec_fn:
+                kwargs["preexec_fn"] = preexec_fn
+        
+        # 使用真正的异步进程创建
+        return await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,  # 确保在新的会话中启动
+            **kwargs
+        )
     
     async def launch_process(self, config_file: str, config: Dict[str, Any], port: int) -> Dict[str, Any]:
-        """启动 Hysteria2 客户端进程
+        """启动节点的核心程序进程
         
         Args:
             config_file: 配置文件路径
             config: 配置内容
-            port: HTTP 监听端口
+            port: 主监听端口
         
         Returns:
             进程信息
         """
-        # 构建命令
-        cmd = [self.executable, "client", "-c", config_file, "--log-level", "debug"]
+        backend = backend_for_config(config)
+        print(f"启动 {os.path.basename(config_file)} 的 {backend.name} 客户端...")
+        
+        # 端口冲突时改用新端口
+        resolved_config, ports = self._resolve_ports(config_file, config, port)
+        port = ports[0]
         
-        print(f"启动 {os.path.basename(config_file)} 的 Hysteria2 客户端...")
-        # 从配置中获取 HTTP 监听地址
-        http_listen = config.get("http", {}).get("listen", f"127.0.0.1:{port}")
-        print(f"HTTP 代理: {http_listen}")
+        # 改过端口或需要由后端另行渲染的配置写入临时文件
+        runtime_config_file = None
+        runtime_config = backend.runtime_config(resolved_config, self.log_level)
+        if resolved_config is not config or runtime_config is not resolved_config:
+            runtime_config_file = create_temp_config_file(
+                runtime_config, prefix=f"{os.path.splitext(os.path.basename(config_file))[0]}-"
+            )
+            if not runtime_config_file:
+                self._release_node(ports)
+                raise RuntimeError(f"无法为 {os.path.basename(config_file)} 创建临时配置文件")
+        config = resolved_config
+        
+        # 打印本地代理监听地址
+        listeners = config_listeners(config) or [("http", f"127.0.0.1:{port}")]
+        for protocol, listen in listeners:
+            print(f"{protocol.upper()} 代理: {listen}")
         print(f"服务器: {config.get('server', 'Unknown')}")
         
         try:
-            # 使用真正的异步进程创建
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                start_new_session=True  # 确保在新的会话中启动
-            )
+            placement = self.resource_limiter.assign(port) if self.resource_limiter else None
+            if placement and placement["cpus"]:
+                print(f"绑定 CPU: {','.join(str(cpu) for cpu in placement['cpus'])}")
+            
+            # 子进程绑定前才释放为替代端口保留的套接字
+            for listen_port in ports:
+                self.port_allocator.release(listen_port)
+            process = await self._spawn(runtime_config_file or config_file, placement, backend)
             
             # 创建进程信息
             process_info = {
                 "process": process,
                 "config_file": config_file,
-                "port": port
+                "runtime_config_file": runtime_config_file,
+                "config": config,
+                "backend": backend,
+                "port": port,
+                "ports": ports,
+                "protocol": listeners[0][0],
+                "placement": placement,
+                "started_at": time.monotonic(),
+                "restarts": 0,
+                "crash_times": [],
+                "health_failures": 0,
+                "watcher": None,
+                "log": LogRingBuffer(self.log_buffer_lines),
+                "log_state": None,
+                "drainers": []
             }
+            self._start_drainers(process_info)
             
             # 添加到进程列表
             self.processes.append(process_info)
             
+            # 监督已经开始时，新进程立即纳入监督
+            if self._supervising:
+                self._start_watcher(process_info)
+            
             # 返回进程信息
             return process_info
         except Exception as e:
             print(f"启动进程时发生错误: {e}")
+            self._release_node(ports, runtime_config_file)
             raise
     
+    def _resolve_ports(
+        self,
+        config_file: str,
+        config: Dict[str, Any],
+        port: int
+    ) -> Tuple[Dict[str, Any], List[int]]:
+        """检查配置中的每个本地代理监听端口，被占用时分配替代端口
+        
+        Args:
+            config_file: 配置文件路径
+            config: 配置内容
+            port: 配置中的主监听端口
+        
+        Returns:
+            (实际使用的配置, 实际使用的端口列表（第一个为主监听端口）)，端口有替换时配置为新的字典
+        """
+        listeners = config_listeners(config)
+        if not listeners:
+            listeners = [("http", f"127.0.0.1:{port}")]
+        
+        ports = []
+        replacements = {}
+        for protocol, listen in listeners:
+            host, listen_port = parse_listen_address(listen)
+            if self.port_allocator.claim(listen_port):
+                ports.append(listen_port)
+                continue
+            new_ports = self.port_allocator.allocate(1, reserve=True)
+            if not new_ports:
+                self._release_node(ports)
+                raise RuntimeError(f"端口 {listen_port} 已被占用，且没有可用的替代端口")
+            print(f"端口 {listen_port} 已被占用，{os.path.basename(config_file)} 的 {protocol.upper()} 监听改用端口 {new_ports[0]}")
+            ports.append(new_ports[0])
+            replacements[protocol] = f"{host}:{new_ports[0]}"
+        
+        if not replacements:
+            return config, ports
+        
+        resolved_config = dict(config)
+        for protocol, listen in replacements.items():
+            resolved_config[protocol] = dict(config.get(protocol, {}), listen=listen)
+        
+        return resolved_config, ports
+    
+    def _release_node(self, ports: List[int], runtime_config_file: str = None) -> None:
+        """注销节点占用的端口和资源，并删除临时配置文件
+        
+        Args:
+            ports: 节点的监听端口列表，第一个为主监听端口
+            runtime_config_file: 临时配置文件路径
+        """
+        for port in ports:
+            self.port_allocator.release(port)
+            self.port_allocator.unassign(port)
+        if self.resource_limiter and ports:
+            self.resource_limiter.release(ports[0])
+        if runtime_config_file:
+            try:
+                os.unlink(runtime_config_file)
+            except OSError:
+                pass
+    
+    def get_live_processes(self) -> List[Dict[str, Any]]:
+        """获取所有仍在运行的进程
+        
+        Returns:
+            进程信息列表
+        """
+        return [process_info for process_info in self.processes if process_info["process"].returncode is None]
+    
+    def get_process_stats(self) -> List[Dict[str, Any]]:
+        """获取每个节点的运行统计
+        
+        Returns:
+            统计列表，包含配置文件、端口、PID、是否存活、重启次数和本次运行时长，
+            后端支持日志解析时还包含连接状态、握手耗时、重连次数、认证失败次数和错误次数
+        """
+        now = time.monotonic()
+        stats = []
+        for process_info in self.processes:
+            process = process_info["process"]
+            alive = process.returncode is None
+            item = {
+                "config_file": process_info["config_file"],
+                "port": process_info["port"],
+                "pid": process.pid,
+                "alive": alive,
+                "restarts": process_info["restarts"],
+                "uptime": now - process_info["started_at"] if alive else 0.0
+            }
+            log_state = process_info.get("log_state")
+            if log_state is not None:
+                item.update(
+                    status=log_state.status,
+                    handshake_rtt=log_state.handshake_rtt,
+                    reconnects=log_state.reconnects,
+                    auth_failures=log_state.auth_failures,
+                    errors=log_state.errors
+                )
+            stats.append(item)
+        return stats
+    
+    async def stop_process(self, process_info: Dict[str, Any]) -> None:
+        """终止单个进程并将其从进程列表中移除
+        
+        Args:
+            process_info: 进程信息
+        """
+        # 先移出列表，避免监视任务把它当作崩溃重启
+        if process_info in self.processes:
+            self.processes.remove(process_info)
+        watcher = process_info.get("watcher")
+        if watcher:
+            watcher.cancel()
+        await self._cleanup_single_process(process_info)
+        for drainer in process_info.get("drainers", []):
+            drainer.cancel()
+    
     async def check_processes_status(self, future: asyncio.Future) -> None:
-        """周期性检查进程状态
+        """开始监督所有进程
+        
+        为每个进程创建监视任务，直接等待进程退出而不是周期性轮询。
+        所有节点都被放弃后设置 future，通知主循环退出。
         
         Args:
             future: 完成时通知的未来对象
         """
+        self._exit_future = future
+        self._supervising = True
+        for process_info in self.processes:
+            self._start_watcher(process_info)
+    
+    def _start_watcher(self, process_info: Dict[str, Any]) -> None:
+        """为进程创建监视任务
+        
+        Args:
+            process_info: 进程信息
+        """
+        if process_info.get("watcher") is None or process_info["watcher"].done():
+            process_info["watcher"] = asyncio.create_task(self._watch_process(process_info))
+    
+    def _restart_delay(self, crash_count: int) -> float:
+        """计算带抖动的指数退避延迟
+        
+        Args:
+            crash_count: 时间窗口内的崩溃次数
+        
+        Returns:
+            延迟时间（秒）
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (crash_count - 1)))
+        # 在 [delay/2, delay] 之间随机，避免大量节点同时重启
+        return random.uniform(delay / 2, delay)
+    
+    async def _watch_process(self, process_info: Dict[str, Any]) -> None:
+        """监视单个进程，退出后按退避策略重启
+        
+        Args:
+            process_info: 进程信息
+        """
+        config_name = os.path.basename(process_info["config_file"])
         try:
-            while not future.done():
-                # 检查进程状态
-                for process_info in self.processes[:]:
-                    if process_info["process"].returncode is not None:
-                        process = process_info["process"]
-                        config_file = os.path.basename(process_info['config_file'])
-                        print(f"{config_file} 进程已退出，退出码: {process.returncode}")
-                        
-                        # 尝试读取进程的输出信息
-                        try:
-                            stdout_data, stderr_data = await asyncio.gather(
-                                process.stdout.read(),
-                                process.stderr.read()
-                            )
-                            
-                            stdout_str = stdout_data.decode('utf-8', errors='replace').strip()
-                            stderr_str = stderr_data.decode('utf-8', errors='replace').strip()
-                            
-                            if stdout_str:
-                                print(f"{config_file} 标准输出:\n{stdout_str}")
-                            if stderr_str:
-                                print(f"{config_file} 标准错误:\n{stderr_str}")
-                        except Exception as e:
-                            print(f"无法读取进程输出信息: {e}")
-                        
-                        self.processes.remove(process_info)
+            while True:
+                process = process_info["process"]
+                returncode = await process.wait()
+                if self._stopping or process_info not in self.processes:
+                    return
+                
+                uptime = time.monotonic() - process_info["started_at"]
+                print(f"{config_name} 进程已退出，退出码: {returncode}，运行时长: {uptime:.1f}秒")
+                await self._print_process_output(process_info)
                 
-                if not self.processes:
-                    print("所有进程已退出，程序结束")
-                    # 设置未来对象为完成状态，通知主循环退出
-                    future.set_result(None)
-                    break
+                # 认证失败重启也无法恢复
+                log_state = process_info.get("log_state")
+                if log_state is not None and log_state.failure_type == "auth_failed":
+                    print(f"{config_name} 认证失败，不再重启")
+                    self.processes.remove(process_info)
+                    self._release_node(process_info["ports"], process_info.get("runtime_config_file"))
+                    self._notify_if_all_exited()
+                    return
                 
-                # 短暂等待后再次检查
-                await asyncio.sleep(1)
+                # 只统计时间窗口内的崩溃
+                now = time.monotonic()
+                crash_times = [t for t in process_info["crash_times"] if now - t <= self.restart_window]
+                crash_times.append(now)
+                process_info["crash_times"] = crash_times
+                
+                if len(crash_times) > self.max_restarts:
+                    if self.max_restarts > 0:
+                        print(f"{config_name} 在 {self.restart_window:.0f} 秒内崩溃 {len(crash_times)} 次，放弃重启")
+                    self.processes.remove(process_info)
+                    self._release_node(process_info["ports"], process_info.get("runtime_config_file"))
+                    self._notify_if_all_exited()
+                    return
+                
+                delay = self._restart_delay(len(crash_times))
+                print(f"{config_name} 将在 {delay:.2f} 秒后重启（第 {process_info['restarts'] + 1} 次）")
+                await asyncio.sleep(delay)
+                if self._stopping or process_info not in self.processes:
+                    return
+                
+                try:
+                    process_info["process"] = await self._spawn(
+                        process_info["runtime_config_file"] or process_info["config_file"],
+                        process_info["placement"],
+                        process_info["backend"]
+                    )
+                    process_info["started_at"] = time.monotonic()
+                    self._start_drainers(process_info)
+                    process_info["restarts"] += 1
+                    print(f"{config_name} 已重启，PID: {process_info['process'].pid}")
+                except Exception as e:
+                    # 启动失败按一次崩溃处理，下一轮循环会立即进入退避
+                    print(f"重启 {config_name} 时出错: {e}")
         except asyncio.CancelledError:
             # 显式处理取消，避免错误传播
             pass
         except Exception as e:
-            print(f"检查进程状态时出错: {e}")
+            print(f"监视 {config_name} 时出错: {e}")
+    
+    def _start_drainers(self, process_info: Dict[str, Any]) -> None:
+        """为进程的标准输出和标准错误创建持续读取任务
+        
+        Args:
+            process_info: 进程信息
+        """
+        process = process_info["process"]
+        on_line = None
+        parser = process_info["backend"].log_parser() if process_info.get("backend") else None
+        if parser is not None:
+            if process_info.get("log_state") is None:
+                process_info["log_state"] = NodeLogState()
+            log_state = process_info["log_state"]
+            log_state.reset()
+            
+            def on_line(line: bytes) -> None:
+                event = parser.feed(line)
+                if event is not None:
+                    log_state.apply(event)
+        
+        process_info["drainers"] = [
+            asyncio.create_task(drain_stream(process.stdout, "stdout", process_info["log"], on_line=on_line)),
+            asyncio.create_task(drain_stream(process.stderr, "stderr", process_info["log"], on_line=on_line))
+        ]
+    
+    async def _print_process_output(self, process_info: Dict[str, Any]) -> None:
+        """打印已退出进程最近的输出
+        
+        Args:
+            process_info: 进程信息
+        """
+        config_name = os.path.basename(process_info["config_file"])
+        
+        # 等待读取任务读完管道中剩余的输出，子进程的子进程可能仍持有管道，因此设置超时
+        drainers = process_info.get("drainers", [])
+        if drainers:
+            await asyncio.wait(drainers, timeout=1.0)
+        
+        lines = process_info["log"].tail()
+        if not lines:
+            return
+        print(f"{config_name} 最近 {len(lines)} 行输出:")
+        for stream_name, line in lines:
+            print(f"  [{stream_name}] {line}")
+    
+    def _notify_if_all_exited(self) -> None:
+        """所有进程都已退出时通知主循环"""
+        if not self.processes:
+            print("所有进程已退出，程序结束")
+            if self._exit_future is not None and not self._exit_future.done():
+                # 设置未来对象为完成状态，通知主循环退出
+                self._exit_future.set_result(None)
     
     async def wait_for_interrupt(self) -> None:
         """等待用户中断并清理资源"""
@@ -132,7 +511,7 @@ class ProcessManager:
             # 这种方法更优雅地处理中断
             future = asyncio.Future()
             
-            # 设置定期检查进程状态的任务
+            # 开始监督所有进程，进程崩溃时自动重启
             check_task = asyncio.create_task(self.check_processes_status(future))
             
             try:
@@ -154,25 +533,98 @@ class ProcessManager:
             await self.cleanup_processes()
     
     async def cleanup_processes(self) -> None:
-        """清理所有进程"""
+        """清理所有进程
+        
+        一次性向所有子进程的进程组发送 SIGTERM 并批量等待退出，到达统一的截止时间后
+        向仍在运行的进程组发送 SIGKILL，最后报告未能回收的进程和清理耗时。
+        """
+        # 停止监督，避免终止中的进程被当作崩溃重启
+        self._stopping = True
+        self._supervising = False
+        for process_info in self.processes:
+            watcher = process_info.get("watcher")
+            if watcher:
+                watcher.cancel()
+        
         if not self.processes:
+            self._stopping = False
             return
-            
-        # 并发终止所有进程
-        cleanup_tasks = []
+        
+        print(f"正在终止 {len(self.processes)} 个进程...")
+        self.last_shutdown = await self._terminate_all([process_info["process"] for process_info in self.processes])
+        
         for process_info in self.processes:
-            cleanup_tasks.append(self._cleanup_single_process(process_info))
+            for drainer in process_info.get("drainers", []):
+                drainer.cancel()
+            self._release_node(process_info["ports"], process_info.get("runtime_config_file"))
         
-        # 等待所有清理任务完成，但设置超时
-        try:
-            await asyncio.wait_for(asyncio.gather(*cleanup_tasks, return_exceptions=True), timeout=3.0)
-        except asyncio.TimeoutError:
-            print("清理进程超时，某些进程可能未正常终止")
-            
         # 清空进程列表
         self.processes = []
-            
-        print("已清理所有资源")
+        self._stopping = False
+        
+        report = self.last_shutdown
+        if report["leftover"]:
+            print(f"{len(report['leftover'])} 个进程未能终止，PID: {', '.join(str(pid) for pid in report['leftover'])}")
+        print(f"已清理所有资源，终止 {report['terminated']} 个进程（强制终止 {report['killed']} 个），"
+              f"耗时: {report['elapsed']:.3f}秒")
+    
+    async def _terminate_all(self, processes: List[asyncio.subprocess.Process]) -> Dict[str, Any]:
+        """终止一组进程：统一发送 SIGTERM，批量等待，截止时间到达后统一发送 SIGKILL
+        
+        Args:
+            processes: 子进程列表
+        
+        Returns:
+            清理统计，包含终止的进程数、被强制终止的进程数、遗留进程的 PID 和耗时
+        """
+        start_time = time.monotonic()
+        live = list({id(process): process for process in processes if process.returncode is None}.values())
+        for process in live:
+            self._signal_process(process, signal.SIGTERM)
+        
+        waiters = {asyncio.ensure_future(process.wait()): process for process in live}
+        pending = set()
+        killed = 0
+        if waiters:
+            _, pending = await asyncio.wait(waiters, timeout=self.shutdown_grace)
+            if pending:
+                killed = len(pending)
+                for waiter in pending:
+                    self._signal_process(waiters[waiter], getattr(signal, "SIGKILL", signal.SIGTERM), force=True)
+                _, pending = await asyncio.wait(pending, timeout=1.0)
+                for waiter in pending:
+                    waiter.cancel()
+        
+        return {
+            "terminated": len(live),
+            "killed": killed,
+            "leftover": [waiters[waiter].pid for waiter in pending],
+            "elapsed": time.monotonic() - start_time
+        }
+    
+    @staticmethod
+    def _signal_process(process: asyncio.subprocess.Process, sig: int, force: bool = False) -> None:
+        """向子进程所在的进程组发送信号
+        
+        子进程以 start_new_session=True 启动，进程组 ID 等于其 PID，核心程序派生的进程会一起收到信号。
+        没有进程组的平台上退回到只终止子进程本身。
+        
+        Args:
+            process: 子进程
+            sig: 信号
+            force: 是否为强制终止，退回时据此选择 kill 或 terminate
+        """
+        if process.returncode is not None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, sig)
+            elif force:
+                process.kill()
+            else:
+                process.terminate()
+        except (ProcessLookupError, PermissionError):
+            pass
     
     async def _cleanup_single_process(self, process_info: Dict[str, Any]) -> None:
         """清理单个进程
@@ -186,32 +638,15 @@ class ProcessManager:
             # 终止进程
             if process.returncode is None:
                 print(f"正在终止进程: {os.path.basename(process_info.get('config_file', 'unknown'))}")
-                # 使用系统特定的方法终止进程
-                if hasattr(process, "terminate"):
-                    process.terminate()
-                    # 等待一小段时间让进程自行终止
-                    try:
-                        await asyncio.wait_for(process.wait(), timeout=1.0)
-                    except asyncio.TimeoutError:
-                        # 如果进程没有及时终止，强制杀死它
-                        if hasattr(process, "kill"):
-                            process.kill()
-                elif hasattr(process, "kill"):
-                    process.kill()
-                else:
-                    # 兜底方法
-                    try:
-                        os.kill(process.pid, 9)
-                    except:
-                        pass
+                self._signal_process(process, signal.SIGTERM)
+                # 等待一小段时间让进程自行终止
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    # 如果进程没有及时终止，强制杀死它
+                    self._signal_process(process, getattr(signal, "SIGKILL", signal.SIGTERM), force=True)
                 print(f"进程已终止: {os.path.basename(process_info.get('config_file', 'unknown'))}")
         except Exception as e:
             print(f"清理进程 {process_info.get('config_file', 'unknown')} 时出错: {e}")
-    
-    def _find_executable(self) -> Optional[str]:
-        """查找 Hysteria2 可执行文件
-        
-        Returns:
-            可执行文件路径，未找到则返回 None
-        """
-        return find_executable(get_executable_names("hysteria"))
+        finally:
+            self._release_node(process_info["ports"], process_info.get("runtime_config_file"))
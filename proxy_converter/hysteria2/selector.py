@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+节点选择模块，根据实测延迟对已连接的节点排序并保留最优的节点
+"""
+
+import os
+import math
+import random
+import asyncio
+from typing import List, Dict, Any
+
+from ..utils.network import measure_proxy_latency
+from .process_manager import ProcessManager
+
+
+class NodeSelector:
+    """基于延迟的节点选择器
+
+    对每个已连接节点的本地监听端口测量握手延迟和首字节时间，
+    二者之和作为节点得分（越小越好），然后按选择模式保留 count 个节点，
+    其余节点的进程会被终止。
+    """
+
+    MODES = ("random", "fastest", "weighted")
+
+    def __init__(
+        self,
+        process_manager: ProcessManager,
+        probe_url: str = "http://www.gstatic.com/generate_204",
+        concurrency: int = 16,
+        timeout: float = 5.0
+    ):
+        """初始化节点选择器
+
+        Args:
+            process_manager: 进程管理器，用于终止未被选中的节点
+            probe_url: 测量延迟时访问的目标 URL
+            concurrency: 同时测量的最大节点数
+            timeout: 单个节点的测量超时时间（秒）
+        """
+        self.process_manager = process_manager
+        self.probe_url = probe_url
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def measure(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """测量所有连接成功节点的延迟
+
+        测量结果写回每个连接结果中：handshake_latency、ttfb 和 score，
+        测量失败的节点 score 为 inf，并记录 latency_error。
+
+        Args:
+            results: connect_batch 返回的连接结果列表
+
+        Returns:
+            连接成功的结果列表
+        """
+        connected = [result for result in results if result.get("success")]
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def measure_one(result):
+            async with semaphore:
+                try:
+                    latency = await measure_proxy_latency(
+                        "127.0.0.1", result["port"], self.probe_url, self.timeout, result.get("protocol", "http")
+                    )
+                    result["handshake_latency"] = latency["handshake"]
+                    result["ttfb"] = latency["ttfb"]
+                    result["score"] = latency["handshake"] + latency["ttfb"]
+                except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+                    result["score"] = math.inf
+                    result["latency_error"] = str(e) or type(e).__name__
+
+        print(f"正在测量 {len(connected)} 个节点的延迟（并发 {self.concurrency}）...")
+        await asyncio.gather(*(measure_one(result) for result in connected))
+
+        for result in sorted(connected, key=lambda r: r["score"]):
+            config_name = os.path.basename(result["config_file"])
+            if math.isinf(result["score"]):
+                print(f"[{config_name}] 延迟测量失败: {result['latency_error']}")
+            else:
+                print(f"[{config_name}] 握手 {result['handshake_latency'] * 1000:.0f}ms，"
+                      f"首字节 {result['ttfb'] * 1000:.0f}ms")
+        return connected
+
+    def rank(self, connected: List[Dict[str, Any]], count: int, mode: str) -> List[Dict[str, Any]]:
+        """按选择模式从已测量的节点中挑选 count 个
+
+        Args:
+            connected: 已测量的连接结果列表
+            count: 需要保留的节点数量
+            mode: 选择模式，random、fastest 或 weighted
+
+        Returns:
+            被选中的连接结果列表
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"不支持的选择模式: {mode}，可选: {', '.join(self.MODES)}")
+        if count >= len(connected):
+            return list(connected)
+
+        if mode == "random":
+            return random.sample(connected, count)
+
+        if mode == "fastest":
+            return sorted(connected, key=lambda r: r.get("score", math.inf))[:count]
+
+        # weighted：以 1/score 为权重做不放回抽样，测量失败的节点只在不足时补位
+        measured = [r for r in connected if not math.isinf(r.get("score", math.inf))]
+        failed = [r for r in connected if math.isinf(r.get("score", math.inf))]
+        keyed = sorted(measured, key=lambda r: random.random() ** r["score"], reverse=True)
+        return (keyed + failed)[:count]
+
+    async def select(self, results: List[Dict[str, Any]], count: int, mode: str = "fastest") -> List[Dict[str, Any]]:
+        """测量、挑选并终止未被选中的节点
+
+        Args:
+            results: connect_batch 返回的连接结果列表
+            count: 需要保留的节点数量
+            mode: 选择模式，random、fastest 或 weighted
+
+        Returns:
+            被选中的连接结果列表
+        """
+        if mode == "random":
+            connected = [result for result in results if result.get("success")]
+        else:
+            connected = await self.measure(results)
+
+        selected = self.rank(connected, count, mode)
+        selected_ports = {result["port"] for result in selected}
+
+        # 终止未被选中的节点
+        rejected = [
+            process_info for process_info in self.process_manager.processes
+            if process_info["port"] not in selected_ports
+        ]
+        if rejected:
+            await asyncio.gather(*(self.process_manager.stop_process(process_info) for process_info in rejected))
+
+        print(f"已按 {mode} 模式保留 {len(selected)}/{len(connected)} 个节点")
+        return selected
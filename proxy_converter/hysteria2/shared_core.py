@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+单核心进程管理模块，所有节点由同一个 sing-box 进程提供
+"""
+
+import os
+import json
+import time
+import signal
+import asyncio
+from typing import Dict, Any
+
+from ..utils.filesystem import create_temp_config_file
+from ..utils.network import config_listeners
+from ..utils.log_buffer import LogRingBuffer, drain_stream
+from ..backends import backend_for_config, SingBoxBackend
+from ..backends.singbox import build_shared_config
+from .process_manager import ProcessManager
+
+
+class SharedCoreProcessManager(ProcessManager):
+    """单核心进程管理类
+
+    与 ProcessManager 接口相同，但不为每个节点启动进程，而是把所有节点编译为一个多入站、多出站的
+    sing-box 配置，由一个核心进程提供，每个节点仍有自己的本地监听端口。内存占用和启动耗时因此不再随节点数线性增长。
+
+    短时间内的多次启动和终止会合并为一次配置更新；核心进程运行中时通过 SIGHUP 让其重新加载配置，
+    不支持该信号的平台上重启核心进程。核心进程崩溃后按与 ProcessManager 相同的退避策略重启，
+    重启次数超限时放弃所有节点。
+    """
+
+    def __init__(self, *args, batch_window: float = 0.05, **kwargs):
+        """初始化单核心进程管理器
+
+        Args:
+            *args: 传给 ProcessManager 的参数
+            batch_window: 合并配置更新的等待时间（秒），窗口内启动或终止的节点只触发一次更新
+            **kwargs: 传给 ProcessManager 的参数
+        """
+        super().__init__(*args, **kwargs)
+        self.batch_window = batch_window
+        self.core_backend = SingBoxBackend()
+        self.core = None
+        self.core_config_file = None
+        self.core_log = LogRingBuffer(self.log_buffer_lines)
+        self.core_placement = None
+
+        # 等待下一次配置更新的节点，写入核心配置后才加入 processes
+        self._pending = []
+        self._batch = None
+        self._apply_lock = asyncio.Lock()
+        self._core_watcher = None
+        self._core_drainers = []
+        self._crash_times = []
+
+    async def launch_process(self, config_file: str, config: Dict[str, Any], port: int) -> Dict[str, Any]:
+        """把节点加入核心进程
+
+        Args:
+            config_file: 配置文件路径
+            config: 配置内容
+            port: 主监听端口
+
+        Returns:
+            进程信息，其中的 process 为所有节点共用的核心进程
+
+        Raises:
+            NotImplementedError: 节点类型不支持单核心模式时抛出
+        """
+        backend = backend_for_config(config)
+        outbound = backend.shared_outbound(config)
+        print(f"将 {os.path.basename(config_file)} 的 {backend.name} 节点加入核心进程...")
+
+        # 端口冲突时改用新端口
+        config, ports = self._resolve_ports(config_file, config, port)
+        port = ports[0]
+
+        listeners = config_listeners(config) or [("http", f"127.0.0.1:{port}")]
+        for protocol, listen in listeners:
+            print(f"{protocol.upper()} 代理: {listen}")
+        print(f"服务器: {config.get('server', 'Unknown')}")
+
+        process_info = {
+            "process": None,
+            "config_file": config_file,
+            "runtime_config_file": None,
+            "config": config,
+            "backend": backend,
+            "outbound": outbound,
+            "tag": f"node-{port}",
+            "port": port,
+            "ports": ports,
+            "protocol": listeners[0][0],
+            "placement": None,
+            "started_at": time.monotonic(),
+            "restarts": 0,
+            "crash_times": [],
+            "health_failures": 0,
+            "watcher": None,
+            "log": self.core_log,
+            "drainers": []
+        }
+        self._pending.append(process_info)
+
+        try:
+            await self._request_apply()
+        except Exception as e:
+            print(f"启动核心进程时发生错误: {e}")
+            if process_info in self._pending:
+                self._pending.remove(process_info)
+            self._release_node(ports)
+            raise
+
+        return process_info
+
+    async def stop_process(self, process_info: Dict[str, Any]) -> None:
+        """把节点从核心进程中移除，其余节点继续运行
+
+        Args:
+            process_info: 进程信息
+        """
+        if process_info not in self.processes:
+            return
+        self.processes.remove(process_info)
+        self._release_node(process_info["ports"])
+        try:
+            await self._request_apply()
+        except Exception as e:
+            print(f"移除 {os.path.basename(process_info['config_file'])} 后更新核心进程时出错: {e}")
+
+    async def _request_apply(self) -> None:
+        """请求一次配置更新，等待 batch_window 秒内的所有请求合并后一起生效"""
+        if self._batch is None:
+            self._batch = asyncio.get_running_loop().create_future()
+            asyncio.create_task(self._flush_batch(self._batch))
+        await asyncio.shield(self._batch)
+
+    async def _flush_batch(self, batch: asyncio.Future) -> None:
+        """等待合并窗口结束后应用配置
+
+        Args:
+            batch: 本批次请求共同等待的未来对象
+        """
+        await asyncio.sleep(self.batch_window)
+        # 此后的请求进入下一批次
+        self._batch = None
+        try:
+            async with self._apply_lock:
+                await self._apply()
+            batch.set_result(None)
+        except Exception as e:
+            batch.set_exception(e)
+
+    async def _apply(self) -> None:
+        """把当前节点写入核心配置，并启动或重新加载核心进程
+
+        Raises:
+            FileNotFoundError: 找不到 sing-box 可执行文件时抛出
+        """
+        pending = list(self._pending)
+        nodes = self.processes + pending
+
+        if not nodes:
+            await self._stop_core()
+            return
+
+        config = build_shared_config(
+            [(node["tag"], node["config"], node["outbound"]) for node in nodes], self.log_level
+        )
+        if self.core_config_file:
+            with open(self.core_config_file, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=4)
+        else:
+            self.core_config_file = create_temp_config_file(config, prefix="shared-core-")
+            if not self.core_config_file:
+                raise RuntimeError("无法创建核心进程的配置文件")
+
+        # 子进程绑定前才释放为替代端口保留的套接字
+        for node in pending:
+            for listen_port in node["ports"]:
+                self.port_allocator.release(listen_port)
+
+        if self.core is not None and self.core.returncode is None and hasattr(signal, "SIGHUP"):
+            self.core.send_signal(signal.SIGHUP)
+            print(f"核心进程已重新加载配置，共 {len(nodes)} 个节点")
+        else:
+            if self.core is not None and self.core.returncode is None:
+                await self._stop_core(keep_config=True)
+            if self.resource_limiter and self.core_placement is None:
+                self.core_placement = self.resource_limiter.assign("core")
+            self.core = await self._spawn(self.core_config_file, self.core_placement, self.core_backend)
+            self._core_drainers = [
+                asyncio.create_task(drain_stream(self.core.stdout, "stdout", self.core_log)),
+                asyncio.create_task(drain_stream(self.core.stderr, "stderr", self.core_log))
+            ]
+            print(f"核心进程已启动，PID: {self.core.pid}，共 {len(nodes)} 个节点")
+            now = time.monotonic()
+            for node in self.processes:
+                node["process"] = self.core
+                node["started_at"] = now
+            if self._supervising:
+                self._start_core_watcher()
+
+        # 写入核心配置的节点立即加入 processes，之后的配置更新不会遗漏它们
+        for node in pending:
+            node["process"] = self.core
+            node["drainers"] = self._core_drainers
+            self._pending.remove(node)
+            self.processes.append(node)
+
+    async def _stop_core(self, keep_config: bool = False) -> None:
+        """终止核心进程
+
+        Args:
+            keep_config: 是否保留核心配置文件，重启核心进程时使用
+        """
+        core, self.core = self.core, None
+        if core is not None:
+            await self._cleanup_single_process({
+                "process": core,
+                "config_file": "shared-core",
+                "ports": [],
+                "runtime_config_file": None if keep_config else self.core_config_file
+            })
+        for drainer in self._core_drainers:
+            drainer.cancel()
+        if not keep_config:
+            self.core_config_file = None
+            if self.resource_limiter and self.core_placement is not None:
+                self.resource_limiter.release("core")
+                self.core_placement = None
+
+    def _start_watcher(self, process_info: Dict[str, Any]) -> None:
+        """节点不单独监视，确保核心进程的监视任务在运行
+
+        Args:
+            process_info: 进程信息
+        """
+        self._start_core_watcher()
+
+    def _start_core_watcher(self) -> None:
+        """为核心进程创建监视任务"""
+        if self.core is not None and (self._core_watcher is None or self._core_watcher.done()):
+            self._core_watcher = asyncio.create_task(self._watch_core())
+
+    async def _watch_core(self) -> None:
+        """监视核心进程，崩溃后按退避策略重启，所有节点随之恢复"""
+        try:
+            while True:
+                core = self.core
+                if core is None:
+                    return
+                returncode = await core.wait()
+                if self._stopping:
+                    return
+                if self.core is not core:
+                    # 核心进程被主动替换
+                    continue
+
+                print(f"核心进程已退出，退出码: {returncode}")
+                await self._print_core_output()
+
+                now = time.monotonic()
+                self._crash_times = [t for t in self._crash_times if now - t <= self.restart_window]
+                self._crash_times.append(now)
+                if len(self._crash_times) > self.max_restarts:
+                    if self.max_restarts > 0:
+                        print(f"核心进程在 {self.restart_window:.0f} 秒内崩溃 {len(self._crash_times)} 次，放弃所有节点")
+                    for node in self.processes:
+                        self._release_node(node["ports"])
+                    self.processes = []
+                    await self._stop_core()
+                    self._notify_if_all_exited()
+                    return
+
+                delay = self._restart_delay(len(self._crash_times))
+                print(f"核心进程将在 {delay:.2f} 秒后重启")
+                await asyncio.sleep(delay)
+                if self._stopping:
+                    return
+
+                try:
+                    async with self._apply_lock:
+                        if self.core is core:
+                            self.core = None
+                            await self._apply()
+                    for node in self.processes:
+                        node["restarts"] += 1
+                except Exception as e:
+                    print(f"重启核心进程时出错: {e}")
+                    return
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"监视核心进程时出错: {e}")
+
+    async def _print_core_output(self) -> None:
+        """打印已退出核心进程最近的输出"""
+        if self._core_drainers:
+            await asyncio.wait(self._core_drainers, timeout=1.0)
+        lines = self.core_log.tail()
+        if not lines:
+            return
+        print(f"核心进程最近 {len(lines)} 行输出:")
+        for stream_name, line in lines:
+            print(f"  [{stream_name}] {line}")
+
+    async def cleanup_processes(self) -> None:
+        """终止核心进程并注销所有节点"""
+        self._stopping = True
+        self._supervising = False
+        if self._core_watcher:
+            self._core_watcher.cancel()
+            self._core_watcher = None
+
+        async with self._apply_lock:
+            await self._stop_core()
+        for node in self.processes + self._pending:
+            self._release_node(node["ports"])
+        self.processes = []
+        self._pending = []
+        self._stopping = False
+
+        print("已清理所有资源")
@@ -8,34 +8,120 @@
 import yaml
 import os
 import sys
+import copy
 import json
+import time
+import hashlib
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Tuple
+
+from .utils.cache import ParsedProxyCache
+from .utils.subscription import SubscriptionFetcher, FetchResult, is_subscription_url
+from .utils.manifest import ConfigManifest
+from .utils.filesystem import list_config_files
+from .utils.network import PortAllocator
+from .backends import get_backend, supported_types
+from .utils.state_store import StateStore
 
 
 class ProxyConverter:
     """代理转换器，用于从 YAML 文件中提取代理信息并建立连接"""
 
-    def __init__(self, yaml_file: str):
+    # 本地代理监听模式：只监听 HTTP、只监听 SOCKS5，或同时监听（SOCKS5 使用第二个分配的端口）
+    LISTENERS = ("http", "socks5", "both")
+
+    def __init__(
+        self,
+        yaml_file: str,
+        use_cache: bool = True,
+        cache_dir: str = None,
+        listener: str = "http",
+        overrides_file: str = None,
+        fetch_timeout: float = 30.0
+    ):
         """初始化代理转换器
 
         Args:
-            yaml_file: YAML 文件路径
+            yaml_file: YAML 文件路径或订阅地址（http/https）
+            use_cache: 是否使用磁盘上的解析结果缓存，False 时订阅地址也总是完整下载
+            cache_dir: 解析结果和订阅响应的缓存目录，不指定则使用默认缓存目录
+            listener: 本地代理监听模式，http、socks5 或 both
+            overrides_file: 配置覆盖文件（JSON），global 中的字段合并到所有节点，
+                nodes 中以节点名称或服务器为键的字段只合并到对应节点
+            fetch_timeout: 下载订阅的超时时间（秒）
         """
+        if listener not in self.LISTENERS:
+            raise ValueError(f"不支持的监听模式: {listener}，可选: {', '.join(self.LISTENERS)}")
         self.yaml_file = yaml_file
+        self.listener = listener
+        self.overrides = self.load_overrides(overrides_file) if overrides_file else {}
         self.proxies = []
-        self.load_yaml()
+        self.cache = ParsedProxyCache(cache_dir) if use_cache else None
+        self.generation_stats = {"written": 0, "unchanged": 0, "removed": 0}
+        self.loaded = False
+        
+        # 订阅地址先下载到本地缓存，之后按本地文件解析
+        self.subscription: FetchResult = None
+        if is_subscription_url(yaml_file):
+            self.subscription = self.fetch_subscription(yaml_file, cache_dir, use_cache, fetch_timeout)
+            self.yaml_file = self.subscription.path
+        
+        # 订阅返回 304 时推迟解析，配置文件仍是最新时无需加载
+        if not (self.subscription and self.subscription.not_modified):
+            self.load_yaml()
+
+    @staticmethod
+    def fetch_subscription(url: str, cache_dir: str, use_cache: bool, timeout: float) -> FetchResult:
+        """下载订阅，内容未变化时使用磁盘上缓存的响应
+
+        Args:
+            url: 订阅地址
+            cache_dir: 响应缓存目录
+            use_cache: 是否发送条件请求
+            timeout: 请求超时时间（秒）
+
+        Returns:
+            下载结果
+        """
+        print(f"正在下载订阅: {url}")
+        fetcher = SubscriptionFetcher(cache_dir, timeout=timeout, conditional=use_cache)
+        try:
+            return fetcher.fetch(url)
+        except OSError as e:
+            print(f"{e}")
+            sys.exit(1)
 
     def load_yaml(self) -> None:
-        """加载 YAML 文件并提取代理信息"""
+        """加载 YAML 文件并提取代理信息
+
+        优先使用磁盘缓存中的解析结果，未命中时使用 libyaml 的 C 加载器解析（不可用时回退到纯 Python 加载器），
+        解析后只缓存 proxies 部分。
+        """
+        start_time = time.perf_counter()
+        self.loaded = True
         try:
+            if self.cache:
+                cached = self.cache.get(self.yaml_file)
+                if cached is not None:
+                    self.proxies = cached
+                    print(f"成功加载 {len(self.proxies)} 个代理配置"
+                          f"（来自解析缓存，耗时: {time.perf_counter() - start_time:.3f}秒）")
+                    return
+            
+            # 优先使用 libyaml 的 C 加载器
+            loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
             with open(self.yaml_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                if 'proxies' in config:
-                    self.proxies = config['proxies']
-                    print(f"成功加载 {len(self.proxies)} 个代理配置")
-                else:
-                    print("错误：YAML 文件中未找到 'proxies' 部分")
+                config = yaml.load(f, Loader=loader)
+            parse_time = time.perf_counter() - start_time
+            
+            if config and 'proxies' in config:
+                self.proxies = config['proxies']
+                print(f"成功加载 {len(self.proxies)} 个代理配置"
+                      f"（{loader.__name__} 解析耗时: {parse_time:.3f}秒）")
+                if self.cache:
+                    self.cache.put(self.yaml_file, self.proxies)
+            else:
+                print("错误：YAML 文件中未找到 'proxies' 部分")
         except Exception as e:
             print(f"加载 YAML 文件时出错: {e}")
             sys.exit(1)
@@ -49,17 +135,127 @@ class ProxyConverter:
         Returns:
             符合条件的代理列表
         """
+        if not self.loaded:
+            self.load_yaml()
         if proxy_type:
             return [p for p in self.proxies if p.get('type') == proxy_type]
         return self.proxies
 
-    async def generate_hysteria2_config(self, proxy: Dict[str, Any], output_dir: str = "./configs", port: int = 8080) -> str:
-        """生成 Hysteria2 配置文件
+    def build_node_config(self, proxy: Dict[str, Any], port: int = 8080, socks_port: int = None) -> Dict[str, Any]:
+        """构建节点配置内容，协议相关的部分由节点类型对应的后端生成
+
+        Args:
+            proxy: 代理配置
+            port: 预分配的主监听端口
+            socks_port: 监听模式为 both 时预分配的 SOCKS5 端口
+
+        Returns:
+            配置字典
+
+        Raises:
+            ValueError: 节点类型不受支持时抛出
+        """
+        backend = get_backend(proxy.get('type'))
+        if backend is None:
+            raise ValueError(f"不支持的代理类型: {proxy.get('type')}")
+        
+        # 获取节点名称，优先使用配置中的 name
+        server_prefix = proxy.get('server', 'unknown').split('.')[0]
+        name = proxy.get('name', server_prefix)
+        
+        # 创建配置
+        config = backend.build_config(proxy)
+        # 添加节点名称
+        config["name"] = name
+        
+        # 添加本地代理监听配置，使用预分配的端口
+        if self.listener == "socks5":
+            config["socks5"] = {"listen": f"127.0.0.1:{port}"}
+        else:
+            config["http"] = {"listen": f"127.0.0.1:{port}"}
+            if self.listener == "both" and socks_port:
+                config["socks5"] = {"listen": f"127.0.0.1:{socks_port}"}
+        
+        # 合并全局和节点级覆盖，节点级优先
+        if self.overrides:
+            self._merge_overrides(config, self.overrides.get('global', {}))
+            node_overrides = self.overrides.get('nodes', {})
+            for key in (proxy.get('server'), name):
+                if key in node_overrides:
+                    self._merge_overrides(config, node_overrides[key])
+        
+        return config
+
+    def build_hysteria2_config(self, proxy: Dict[str, Any], port: int = 8080, socks_port: int = None) -> Dict[str, Any]:
+        """构建 Hysteria2 配置内容，等同于对 hysteria2 节点调用 build_node_config
+
+        Args:
+            proxy: 代理配置
+            port: 预分配的主监听端口
+            socks_port: 监听模式为 both 时预分配的 SOCKS5 端口
+
+        Returns:
+            配置字典
+        """
+        return self.build_node_config(proxy, port, socks_port)
+
+    @staticmethod
+    def load_overrides(path: str) -> Dict[str, Any]:
+        """加载配置覆盖文件
+
+        文件格式示例：
+        {"global": {"quic": {"maxIdleTimeout": "60s"}}, "nodes": {"hk1": {"bandwidth": {"up": "50 mbps"}}}}
+
+        Args:
+            path: 覆盖文件路径
+
+        Returns:
+            覆盖内容
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                overrides = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"加载配置覆盖文件 {path} 时出错: {e}")
+            sys.exit(1)
+        if not isinstance(overrides, dict):
+            print(f"配置覆盖文件 {path} 格式错误：顶层必须是对象")
+            sys.exit(1)
+        return overrides
+
+    @classmethod
+    def _merge_overrides(cls, config: Dict[str, Any], overrides: Dict[str, Any]) -> None:
+        """把覆盖字段递归合并到配置中，值为 null 的字段会从配置中删除
+
+        Args:
+            config: 配置字典，原地修改
+            overrides: 覆盖字段
+        """
+        for key, value in overrides.items():
+            if value is None:
+                config.pop(key, None)
+            elif isinstance(value, dict) and isinstance(config.get(key), dict):
+                cls._merge_overrides(config[key], value)
+            else:
+                # 复制一份，避免后续节点级合并修改到覆盖内容本身
+                config[key] = copy.deepcopy(value)
+
+    async def generate_node_config(
+        self,
+        proxy: Dict[str, Any],
+        output_dir: str = "./configs",
+        port: int = 8080,
+        manifest: ConfigManifest = None,
+        socks_port: int = None
+    ) -> str:
+        """生成节点配置文件
 
         Args:
             proxy: 代理配置
             output_dir: 输出目录
-            port: 预分配的端口号
+            port: 预分配的主监听端口
+            manifest: 配置清单，提供时内容未变化的配置文件不会被重写
+            socks_port: 监听模式为 both 时预分配的 SOCKS5 端口
 
         Returns:
             配置文件路径
@@ -72,92 +268,274 @@ class ProxyConverter:
         filename = f"{server_prefix}-{port}.json"
         filepath = os.path.join(output_dir, filename)
         
-        # 获取节点名称，优先使用配置中的 name
-        name = proxy.get('name', server_prefix)
+        config = self.build_node_config(proxy, port, socks_port)
+        content = json.dumps(config, indent=4, ensure_ascii=False)
         
-        # 创建配置
-        config = {
-            "server": proxy.get('server'),
-            "auth": proxy.get('password'),
-            "tls": {
-                "insecure": proxy.get('skip-cert-verify', False)
-            },
-            "transport": {},
-            # 添加 HTTP 监听配置，使用预分配的端口
-            "http": {"listen": f"127.0.0.1:{port}"},
-            # 添加节点名称
-            "name": name
-        }
-        
-        # 处理端口
-        if 'port' in proxy:
-            config["server"] += f":{proxy['port']}"
-        elif 'ports' in proxy:
-            # 如果有端口范围，使用第一个端口
-            ports = proxy['ports'].split('-')
-            if len(ports) == 2:
-                config["server"] += f":{ports[0]}"  
+        # 内容未变化时跳过写入
+        if manifest is not None:
+            identity = ConfigManifest.identity(proxy)
+            content_hash = ConfigManifest.content_hash(content)
+            if manifest.is_unchanged(identity, filename, content_hash):
+                self.generation_stats["unchanged"] += 1
+                return filepath
         
         # 写入文件
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
-            print(f"配置已保存到: {filepath}，HTTP 监听地址: 127.0.0.1:{port}")
-            return filepath
+                f.write(content)
+            listen_text = "，".join(
+                f"{protocol.upper()} 监听地址: {config[protocol]['listen']}"
+                for protocol in ("http", "socks5") if protocol in config
+            )
+            print(f"配置已保存到: {filepath}，{listen_text}")
         except Exception as e:
             print(f"保存配置文件时出错: {e}")
             return None
+        
+        if manifest is not None:
+            # 端口不变时文件名也不变，端口变化时删除旧文件
+            previous = manifest.get(identity)
+            if previous and previous.get('file') != filename:
+                self._remove_config_file(output_dir, previous.get('file'))
+            manifest.update(identity, port, filename, content_hash, config.get('name'), socks_port)
+        self.generation_stats["written"] += 1
+        return filepath
 
-    async def generate_all_configs(self, proxy_type: str = 'hysteria2', output_dir: str = "./configs") -> List[str]:
-        """生成所有代理的配置文件，使用预分配的端口实现真正并发
+    async def generate_hysteria2_config(
+        self,
+        proxy: Dict[str, Any],
+        output_dir: str = "./configs",
+        port: int = 8080,
+        manifest: ConfigManifest = None,
+        socks_port: int = None
+    ) -> str:
+        """生成 Hysteria2 配置文件，等同于对 hysteria2 节点调用 generate_node_config
 
         Args:
-            proxy_type: 代理类型
+            proxy: 代理配置
             output_dir: 输出目录
+            port: 预分配的主监听端口
+            manifest: 配置清单，提供时内容未变化的配置文件不会被重写
+            socks_port: 监听模式为 both 时预分配的 SOCKS5 端口
+
+        Returns:
+            配置文件路径
+        """
+        return await self.generate_node_config(proxy, output_dir, port, manifest, socks_port)
+
+    async def generate_all_configs(
+        self,
+        proxy_type: str = 'hysteria2',
+        output_dir: str = "./configs",
+        port_range: Tuple[int, int] = (8080, 65535),
+        exclude_ports: Iterable[int] = None
+    ) -> List[str]:
+        """增量生成所有代理的配置文件
+
+        通过配置清单为每个节点保持稳定的端口：已有节点沿用原端口，
+        新节点通过实际绑定检测分配当前未被占用的端口，已从订阅中移除的节点会删除其配置文件。
+        内容未变化的配置文件不会被重写。订阅地址返回 304 且生成参数与上一次相同时，
+        直接返回已有的配置文件，不解析订阅。
+
+        Args:
+            proxy_type: 代理类型，多个类型以逗号分隔，all 表示所有已注册后端支持的类型
+            output_dir: 输出目录
+            port_range: 新节点可分配的端口范围（包含两端）
+            exclude_ports: 不分配给新节点的端口
 
         Returns:
             配置文件路径列表
         """
-        proxies = self.get_proxy_by_type(proxy_type)
+        if proxy_type == 'all':
+            proxy_types = supported_types()
+        else:
+            proxy_types = [item.strip() for item in proxy_type.split(',') if item.strip()]
+            unsupported = [item for item in proxy_types if get_backend(item) is None]
+            if unsupported:
+                print(f"不支持的代理类型: {', '.join(unsupported)}，支持: {', '.join(supported_types())}")
+                proxy_types = [item for item in proxy_types if item not in unsupported]
+        
+        manifest = ConfigManifest(output_dir)
+        source = self._source_fingerprint(proxy_types, port_range, exclude_ports)
+        if self.subscription and self.subscription.not_modified and source == manifest.source:
+            config_files = self._current_config_files(output_dir)
+            if config_files:
+                self.generation_stats = {"written": 0, "unchanged": len(config_files), "removed": 0}
+                print(f"订阅和生成参数均未变化，跳过转换，沿用 {len(config_files)} 个配置文件")
+                return config_files
+        manifest.source = source
+        
+        if not self.loaded:
+            self.load_yaml()
+        
+        proxies = [proxy for proxy in self.proxies if proxy.get('type') in proxy_types]
         if not proxies:
             print(f"未找到类型为 {proxy_type} 的代理")
             return []
         
         print(f"正在为 {len(proxies)} 个 {proxy_type} 代理生成配置文件...")
         
-        # 预分配端口，起始端口为 8080
-        start_port = 8080
-        ports = [start_port + i for i in range(len(proxies))]
+        self.generation_stats = {"written": 0, "unchanged": 0, "removed": 0}
+        
+        # 首次使用清单时，目录中已有的配置文件都来自上一次非增量生成，生成后清理未被覆盖的文件
+        legacy_files = set()
+        if not manifest.exists and os.path.isdir(output_dir):
+            legacy_files = set(list_config_files(output_dir))
+        
+        # 计算节点标识，去除重复节点
+        nodes = {}
+        for proxy in proxies:
+            identity = ConfigManifest.identity(proxy)
+            if identity in nodes:
+                print(f"跳过重复节点: {proxy.get('name', proxy.get('server'))}")
+                continue
+            nodes[identity] = proxy
+        
+        # 清理已从订阅中移除的节点
+        for identity in list(manifest.nodes):
+            if identity not in nodes:
+                entry = manifest.remove(identity)
+                self._remove_config_file(output_dir, entry.get('file'))
+                self.generation_stats["removed"] += 1
+        
+        # 已有节点沿用原端口，新节点一次性分配当前未被占用的端口
+        ports = {identity: manifest.get(identity)['port'] for identity in nodes if manifest.get(identity)}
+        new_identities = [identity for identity in nodes if identity not in ports]
+        
+        # 同时监听 HTTP 和 SOCKS5 时，每个节点还需要第二个端口
+        socks_ports = {}
+        if self.listener == "both":
+            socks_ports = {
+                identity: manifest.get(identity)['socks_port']
+                for identity in ports if manifest.get(identity).get('socks_port')
+            }
+        new_socks_identities = [identity for identity in nodes if self.listener == "both" and identity not in socks_ports]
+        
+        if new_identities or new_socks_identities:
+            start_port, end_port = port_range
+            allocator = PortAllocator(start_port, end_port, exclude=exclude_ports)
+            new_ports = allocator.allocate(len(new_identities) + len(new_socks_identities), exclude=manifest.used_ports())
+            ports.update(zip(new_identities, new_ports))
+            socks_ports.update(zip(new_socks_identities, new_ports[len(new_identities):]))
+            
+            # 端口不足时，缺少任一所需端口的节点不生成配置
+            nodes = {
+                identity: proxy for identity, proxy in nodes.items()
+                if identity in ports and (self.listener != "both" or identity in socks_ports)
+            }
+            if len(new_ports) < len(new_identities) + len(new_socks_identities):
+                print(f"可用端口不足，{len(new_identities) + len(new_socks_identities) - len(new_ports)} 个端口未能分配，"
+                      f"共 {len(nodes)} 个节点生成配置")
         
-        # 保存端口范围到根目录
-        self._save_port_range(start_port, start_port + len(proxies) - 1)
+        if not ports:
+            manifest.save()
+            return []
         
         # 使用并发方式生成配置文件，传入预分配的端口
         tasks = []
-        for i, proxy in enumerate(proxies):
-            if proxy_type == 'hysteria2':
-                tasks.append(self.generate_hysteria2_config(proxy, output_dir, ports[i]))
+        task_nodes = []
+        for identity, proxy in nodes.items():
+            tasks.append(self.generate_node_config(
+                proxy, output_dir, ports[identity], manifest, socks_ports.get(identity)
+            ))
+            task_nodes.append((identity, proxy))
         
         # 并发执行所有任务
-        config_files = await asyncio.gather(*tasks)
-        # 过滤掉 None 值
-        config_files = [f for f in config_files if f]
+        generated = await asyncio.gather(*tasks)
         
-        print(f"已生成 {len(config_files)} 个配置文件")
-        return config_files
+        # 记录端口、配置文件、服务器和节点名称的对应关系，过滤掉生成失败的节点
+        config_files = []
+        state_nodes = []
+        for (identity, proxy), filepath in zip(task_nodes, generated):
+            if not filepath:
+                continue
+            config_files.append(filepath)
+            state_nodes.append({
+                "port": ports[identity],
+                "socks_port": socks_ports.get(identity),
+                "config_file": filepath,
+                "server": get_backend(proxy.get('type')).server_address(proxy),
+                "name": manifest.get(identity).get('name')
+            })
+        
+        for filepath in legacy_files - set(config_files):
+            self._remove_config_file(output_dir, os.path.basename(filepath))
+            self.generation_stats["removed"] += 1
+        
+        manifest.save()
         
-    def _save_port_range(self, start_port: int, end_port: int) -> None:
-        """保存端口范围到根目录
+        # 保存运行状态，供选择和连接阶段直接查找
+        state_store = StateStore(output_dir)
+        state_store.replace_nodes(state_nodes)
+        state_store.save()
+        print(f"节点状态已保存到: {state_store.path}")
         
+        stats = self.generation_stats
+        print(f"已生成 {len(config_files)} 个配置文件（写入 {stats['written']}，"
+              f"未变化 {stats['unchanged']}，移除 {stats['removed']}）")
+        return config_files
+    
+    def _source_fingerprint(
+        self,
+        proxy_types: List[str],
+        port_range: Tuple[int, int],
+        exclude_ports: Iterable[int]
+    ) -> str:
+        """计算订阅内容和生成参数的指纹，只有订阅地址才有指纹
+
         Args:
-            start_port: 起始端口
-            end_port: 结束端口
+            proxy_types: 代理类型列表
+            port_range: 新节点可分配的端口范围
+            exclude_ports: 不分配给新节点的端口
+
+        Returns:
+            指纹，本地文件返回 None
         """
-        ports_file = "proxy_ports.txt"
+        if not self.subscription:
+            return None
+        key = [
+            self.subscription.sha256,
+            sorted(proxy_types),
+            self.listener,
+            self.overrides,
+            list(port_range),
+            sorted(exclude_ports or [])
+        ]
+        return hashlib.sha256(json.dumps(key, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _current_config_files(output_dir: str) -> List[str]:
+        """获取节点状态中记录的配置文件
+
+        Args:
+            output_dir: 输出目录
+
+        Returns:
+            配置文件路径列表，状态文件不存在或有配置文件缺失时返回空列表
+        """
+        state_store = StateStore(output_dir)
+        if not state_store.exists():
+            return []
+        config_files = [state_store.config_path(port) for port in state_store.ports()]
+        if not all(path and os.path.exists(path) for path in config_files):
+            return []
+        return config_files
+
+    @staticmethod
+    def _remove_config_file(output_dir: str, filename: str) -> None:
+        """删除不再使用的配置文件
         
+        Args:
+            output_dir: 输出目录
+            filename: 配置文件名
+        """
+        if not filename:
+            return
+        filepath = os.path.join(output_dir, filename)
         try:
-            with open(ports_file, 'w', encoding='utf-8') as f:
-                f.write(f"{start_port}-{end_port}")
-            print(f"端口范围已保存到: {ports_file}")
-        except Exception as e:
-            print(f"保存端口范围时出错: {e}")
+            os.remove(filepath)
+            print(f"已删除配置文件: {filepath}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"删除配置文件 {filepath} 时出错: {e}")
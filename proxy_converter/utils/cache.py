@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+缓存模块，用于在磁盘上缓存订阅解析结果，避免重复解析大体积的 YAML 文件
+"""
+
+import os
+import json
+import hashlib
+from typing import Dict, Any, List, Optional
+
+
+def get_cache_dir() -> str:
+    """获取缓存目录，优先使用 XDG_CACHE_HOME
+
+    Returns:
+        缓存目录路径
+    """
+    base_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base_dir, 'proxy_converter')
+
+
+def file_sha256(path: str) -> str:
+    """计算文件内容的 SHA-256
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        十六进制哈希值
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParsedProxyCache:
+    """订阅解析结果缓存
+
+    以订阅文件的绝对路径区分缓存条目，条目中记录文件的 mtime、大小和内容哈希。
+    mtime 和大小都未变化时直接命中，否则重新计算哈希，哈希一致（例如文件只是被 touch）
+    时同样命中并刷新记录，哈希变化时视为未命中。
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_dir: str = None):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，不指定则使用默认缓存目录
+        """
+        self.cache_dir = cache_dir or get_cache_dir()
+
+    def _entry_path(self, source_path: str) -> str:
+        """获取订阅文件对应的缓存条目路径
+
+        Args:
+            source_path: 订阅文件路径
+
+        Returns:
+            缓存条目路径
+        """
+        key = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"proxies-{key}.json")
+
+    def _read_entry(self, source_path: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目
+
+        Args:
+            source_path: 订阅文件路径
+
+        Returns:
+            缓存条目，不存在或损坏时返回 None
+        """
+        try:
+            with open(self._entry_path(source_path), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('version') != self.VERSION or entry.get('path') != os.path.abspath(source_path):
+            return None
+        return entry
+
+    def get(self, source_path: str) -> Optional[List[Dict[str, Any]]]:
+        """获取订阅文件的缓存解析结果
+
+        Args:
+            source_path: 订阅文件路径
+
+        Returns:
+            缓存的代理列表，未命中时返回 None
+        """
+        entry = self._read_entry(source_path)
+        if entry is None:
+            return None
+
+        stat = os.stat(source_path)
+        if entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+            return entry.get('proxies')
+
+        if entry.get('sha256') != file_sha256(source_path):
+            return None
+
+        # 内容未变化，只刷新文件元数据
+        self.put(source_path, entry.get('proxies'), entry.get('sha256'))
+        return entry.get('proxies')
+
+    def put(self, source_path: str, proxies: List[Dict[str, Any]], sha256: str = None) -> None:
+        """写入订阅文件的解析结果
+
+        Args:
+            source_path: 订阅文件路径
+            proxies: 代理列表
+            sha256: 订阅文件内容哈希，不指定则重新计算
+        """
+        stat = os.stat(source_path)
+        entry = {
+            'version': self.VERSION,
+            'path': os.path.abspath(source_path),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': sha256 or file_sha256(source_path),
+            'proxies': proxies
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path = self._entry_path(source_path)
+        temp_path = f"{entry_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                # default=str 兼容 YAML 中的日期等非 JSON 类型
+                json.dump(entry, f, ensure_ascii=False, default=str)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            print(f"写入解析缓存时出错: {e}")
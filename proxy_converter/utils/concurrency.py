@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+并发控制模块，按近期启动的就绪耗时和失败率自适应调整同时启动的节点数
+"""
+
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Any, List
+
+
+class AdaptiveConcurrency:
+    """自适应并发窗口，类似 AIMD 拥塞控制
+
+    窗口从较小的值开始，每完成一轮（与当前窗口大小相同数量的启动）评估一次：
+    只统计上次调整之后开始的启动，旧窗口下的样本不会导致连续收缩。
+    本轮就绪耗时的中位数不超过基线的 latency_tolerance 倍且失败率没有明显上升时扩大窗口，
+    首次收缩之前成倍扩大，之后每轮增加 increase；否则按 decrease 比例收缩窗口。
+    基线取最近若干个未拥塞轮次的中位数（耗时和失败率分别计算），单轮的抖动不会拉低基线，
+    无法连接的节点本身也不会导致窗口持续收缩，只有耗时或失败率相对近期明显上升才会。
+    """
+
+    # 计算基线时使用的最近未拥塞轮次数
+    HISTORY = 8
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        increase: int = 2,
+        decrease: float = 0.5,
+        latency_tolerance: float = 1.5,
+        failure_tolerance: float = 0.25
+    ):
+        """初始化并发窗口
+
+        Args:
+            initial: 初始窗口大小
+            minimum: 最小窗口大小
+            maximum: 最大窗口大小
+            increase: 首次收缩之后每轮扩大的数量
+            decrease: 收缩时窗口乘以的比例
+            latency_tolerance: 就绪耗时中位数超过基线的多少倍时收缩
+            failure_tolerance: 失败率比基线高出多少时收缩
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.window = min(max(initial, self.minimum), self.maximum)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.failure_tolerance = failure_tolerance
+
+        self.active = 0
+        self.slow_start = True
+        self._history = deque(maxlen=self.HISTORY)
+        self._samples: List[tuple] = []
+        self._condition = asyncio.Condition()
+        self._start_time = time.monotonic()
+        self._adjusted_at = self._start_time
+        # 每轮评估后的窗口变化，第一项为初始窗口
+        self.trajectory: List[Dict[str, Any]] = [{"elapsed": 0.0, "window": self.window}]
+
+    async def acquire(self) -> float:
+        """等待窗口中出现空位并占用
+
+        Returns:
+            占用时的单调时钟时间，释放时传回
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < self.window)
+            self.active += 1
+        return time.monotonic()
+
+    async def release(self, started: float, success: bool) -> None:
+        """释放占用的位置并记录本次启动的结果
+
+        Args:
+            started: acquire 返回的时间
+            success: 节点是否就绪
+        """
+        async with self._condition:
+            self.active -= 1
+            if started >= self._adjusted_at:
+                self._samples.append((time.monotonic() - started, success))
+            if len(self._samples) >= self.window:
+                self._adjust()
+            self._condition.notify_all()
+
+    def _adjust(self) -> None:
+        """根据本轮样本调整窗口"""
+        latencies = sorted(latency for latency, _ in self._samples)
+        median = latencies[len(latencies) // 2]
+        failure = sum(1 for _, success in self._samples if not success) / len(self._samples)
+        self._samples = []
+        self._adjusted_at = time.monotonic()
+
+        congested = False
+        if self._history:
+            baseline_latency, baseline_failure = self.baseline()
+            congested = (
+                median > baseline_latency * self.latency_tolerance
+                or failure > baseline_failure + self.failure_tolerance
+            )
+        if congested:
+            self.slow_start = False
+            window = max(self.minimum, int(self.window * self.decrease))
+        elif self.slow_start:
+            window = min(self.maximum, self.window * 2)
+        else:
+            window = min(self.maximum, self.window + self.increase)
+        if not congested:
+            self._history.append((median, failure))
+
+        if window != self.window:
+            self.window = window
+            self.trajectory.append({
+                "elapsed": round(time.monotonic() - self._start_time, 3),
+                "window": window,
+                "median": round(median, 3),
+                "failure": round(failure, 3)
+            })
+
+    def baseline(self):
+        """近期未拥塞轮次的就绪耗时和失败率基线
+
+        Returns:
+            (就绪耗时中位数, 失败率中位数)
+        """
+        latencies = sorted(latency for latency, _ in self._history)
+        failures = sorted(failure for _, failure in self._history)
+        return latencies[len(latencies) // 2], failures[len(failures) // 2]
+
+    def summary(self) -> str:
+        """窗口变化的文字摘要
+
+        Returns:
+            如 "4 -> 8 -> 16 -> 8 -> 10（峰值 16）"
+        """
+        windows = [point["window"] for point in self.trajectory]
+        return f"{' -> '.join(str(window) for window in windows)}（峰值 {max(windows)}）"
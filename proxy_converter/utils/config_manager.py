@@ -8,13 +8,17 @@
 import os
 import json
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from .filesystem import list_config_files
 
 
 class ConfigManager:
-    """通用配置管理类"""
+    """通用配置管理类
+    
+    在内存中维护配置目录的索引：文件列表按目录 mtime 失效，目录中有文件增删或重命名时才重新扫描；
+    解析后的配置按文件 mtime 失效，文件内容未变化时直接返回缓存的配置，不再重复打开和解析。
+    """
     
     def __init__(self, config_dir: str = None):
         """初始化配置管理器
@@ -24,6 +28,41 @@ class ConfigManager:
         """
         self.config_dir = config_dir
         
+        # 目录索引及其对应的目录 mtime
+        self._file_index: List[str] = []
+        self._dir_mtime_ns: Optional[int] = None
+        # 配置文件路径 -> (文件 mtime, 解析后的配置)
+        self._config_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+    
+    def _list_config_files(self) -> List[str]:
+        """获取配置目录中的配置文件，目录未变化时直接返回索引
+        
+        Returns:
+            配置文件路径列表
+        """
+        try:
+            dir_mtime_ns = os.stat(self.config_dir).st_mtime_ns
+        except OSError:
+            self.invalidate()
+            return []
+        
+        if dir_mtime_ns != self._dir_mtime_ns:
+            self._file_index = list_config_files(self.config_dir)
+            self._dir_mtime_ns = dir_mtime_ns
+            # 清理已被删除文件的缓存
+            indexed = set(self._file_index)
+            for config_file in list(self._config_cache):
+                if config_file not in indexed:
+                    del self._config_cache[config_file]
+        
+        return list(self._file_index)
+    
+    def invalidate(self) -> None:
+        """清空目录索引和配置缓存"""
+        self._file_index = []
+        self._dir_mtime_ns = None
+        self._config_cache = {}
+        
     def validate_config_dir(self) -> bool:
         """验证配置目录是否有效
         
@@ -40,7 +79,7 @@ class ConfigManager:
             return False
             
         # 检查是否有配置文件
-        config_files = list_config_files(self.config_dir)
+        config_files = self._list_config_files()
         if not config_files:
             return False
             
@@ -62,7 +101,7 @@ class ConfigManager:
         if not self.config_dir or not os.path.isdir(self.config_dir):
             return []
             
-        all_files = list_config_files(self.config_dir)
+        all_files = self._list_config_files()
         if not all_files:
             return []
             
@@ -115,7 +154,7 @@ class ConfigManager:
         if not self.config_dir or not os.path.isdir(self.config_dir):
             return []
             
-        all_files = list_config_files(self.config_dir)
+        all_files = self._list_config_files()
         if not all_files:
             return []
             
@@ -125,9 +164,31 @@ class ConfigManager:
                 selected_files.append(file)
         return selected_files
     
+    def load_config(self, config_file: str) -> Dict[str, Any]:
+        """加载配置文件，文件未变化时直接返回缓存的配置
+        
+        Args:
+            config_file: 配置文件路径
+        
+        Returns:
+            配置字典，与缓存共享同一对象，调用方需要修改时应先复制
+        """
+        try:
+            mtime_ns = os.stat(config_file).st_mtime_ns
+        except OSError as e:
+            raise Exception(f"加载配置文件 {config_file} 时出错: {e}")
+        
+        cached = self._config_cache.get(config_file)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        
+        config = self.read_config(config_file)
+        self._config_cache[config_file] = (mtime_ns, config)
+        return config
+    
     @staticmethod
-    def load_config(config_file: str) -> Dict[str, Any]:
-        """加载配置文件
+    def read_config(config_file: str) -> Dict[str, Any]:
+        """直接从磁盘读取并解析配置文件，不使用缓存
         
         Args:
             config_file: 配置文件路径
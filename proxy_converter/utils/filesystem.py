@@ -94,7 +94,8 @@ def list_config_files(directory: str, extension: str = '.json') -> List[str]:
     
     config_files = []
     for file in os.listdir(directory):
-        if file.endswith(extension):
+        # 跳过以 . 开头的内部文件，如配置清单
+        if file.endswith(extension) and not file.startswith('.'):
             config_files.append(os.path.join(directory, file))
     
     return config_files
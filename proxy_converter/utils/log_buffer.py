@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+日志缓冲模块，持续读取子进程输出并保存在固定大小的环形缓冲区中
+"""
+
+import asyncio
+from collections import deque
+from typing import List, Tuple, Callable, Optional
+
+
+class LogRingBuffer:
+    """固定容量的日志环形缓冲区
+
+    只保留最近的 max_lines 行，单行超过 max_line_length 字节的部分会被截断，
+    因此无论子进程运行多久、输出多少，占用的内存都有上限。
+    """
+
+    def __init__(self, max_lines: int = 200, max_line_length: int = 4096):
+        """初始化环形缓冲区
+
+        Args:
+            max_lines: 保留的最大行数
+            max_line_length: 单行保留的最大字节数
+        """
+        self.max_line_length = max_line_length
+        self.lines = deque(maxlen=max_lines)
+        self.total_lines = 0
+
+    def append(self, stream_name: str, line: bytes) -> None:
+        """追加一行输出
+
+        Args:
+            stream_name: 输出流名称，stdout 或 stderr
+            line: 不含换行符的原始输出
+        """
+        if len(line) > self.max_line_length:
+            line = line[:self.max_line_length] + b"..."
+        self.lines.append((stream_name, line.decode('utf-8', errors='replace')))
+        self.total_lines += 1
+
+    def tail(self, count: int = None) -> List[Tuple[str, str]]:
+        """获取最近的若干行
+
+        Args:
+            count: 行数，不指定则返回缓冲区中的全部行
+
+        Returns:
+            (输出流名称, 内容) 列表
+        """
+        lines = list(self.lines)
+        if count is not None:
+            lines = lines[-count:]
+        return lines
+
+
+async def drain_stream(
+    stream: asyncio.StreamReader,
+    stream_name: str,
+    buffer: LogRingBuffer,
+    chunk_size: int = 65536,
+    on_line: Optional[Callable[[bytes], None]] = None
+) -> None:
+    """持续读取输出流直到 EOF，按行写入环形缓冲区
+
+    以大块读取代替逐行读取，避免超长行触发 StreamReader 的行长度限制，
+    同时保证子进程的管道始终被及时读空，不会因管道写满而阻塞。
+
+    Args:
+        stream: 子进程的输出流
+        stream_name: 输出流名称
+        buffer: 环形缓冲区
+        chunk_size: 单次读取的最大字节数
+        on_line: 每读到一行时的回调，参数为不含换行符的原始输出（超长行为截断部分），用于增量解析日志事件
+    """
+    pending = b""
+    # 超长行已写入截断部分后，丢弃该行剩余内容直到下一个换行
+    discarding = False
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if discarding:
+                discarding = False
+                continue
+            line = line.rstrip(b"\r")
+            buffer.append(stream_name, line)
+            if on_line is not None:
+                on_line(line)
+        if len(pending) > buffer.max_line_length:
+            if not discarding:
+                buffer.append(stream_name, pending)
+                if on_line is not None:
+                    on_line(pending)
+                discarding = True
+            pending = b""
+    if pending and not discarding:
+        pending = pending.rstrip(b"\r")
+        buffer.append(stream_name, pending)
+        if on_line is not None:
+            on_line(pending)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+日志事件模块，从子进程输出中逐行提取连接、断开、认证失败、重连和错误等结构化事件
+"""
+
+import re
+import time
+import asyncio
+from typing import Dict, Any, Optional
+
+# 控制台日志格式的级别带有颜色时使用的 ANSI 转义序列
+_ANSI_PATTERN = re.compile(rb"\x1b\[[0-9;]*m")
+_COUNT_PATTERN = re.compile(rb'"count":\s*(\d+)')
+_ERROR_PATTERN = re.compile(rb'"error":\s*"((?:[^"\\]|\\.)*)"')
+
+
+class Hysteria2LogParser:
+    """Hysteria2 客户端日志的增量解析器
+
+    hysteria 的控制台日志每行为 "时间<TAB>级别<TAB>消息<TAB>JSON 字段"。调试级别下大部分行是
+    逐请求的 TCP/UDP 记录，解析器先用几次字节串查找判断是否为关注的行，其余行不解码、不做正则匹配，
+    因此即使数百个子进程都以 debug 级别输出，解析开销也很小。
+
+    识别的事件：
+    - connected / reconnected：连接到服务器（count 大于 1 时为重连），首次连接附带从进程启动起算的握手耗时
+    - disconnected：与服务器的连接已关闭
+    - auth_failed：服务器拒绝认证
+    - error：ERROR 或 FATAL 级别的其他日志
+    """
+
+    def __init__(self):
+        """初始化解析器，握手耗时从此刻起算"""
+        self.started = time.monotonic()
+        self.connected = False
+
+    def feed(self, line: bytes) -> Optional[Dict[str, Any]]:
+        """解析一行输出
+
+        Args:
+            line: 不含换行符的原始输出
+
+        Returns:
+            事件字典，包含 type、time、message，以及 connected 事件的 count 和 rtt；不是事件时返回 None
+        """
+        if b"connected to server" in line:
+            match = _COUNT_PATTERN.search(line)
+            count = int(match.group(1)) if match else 1
+            now = time.monotonic()
+            event = {
+                "type": "reconnected" if count > 1 else "connected",
+                "time": now,
+                "message": "connected to server",
+                "count": count
+            }
+            if count <= 1:
+                event["rtt"] = now - self.started
+            self.connected = True
+            return event
+
+        if b"authentication error" in line:
+            self.connected = False
+            return self._event("auth_failed", line)
+
+        if b"connection closed" in line and self.connected:
+            self.connected = False
+            return self._event("disconnected", line)
+
+        # 级别位于时间之后，只在行首附近查找
+        head = line[:64]
+        if b"ERROR" in head or b"FATAL" in head:
+            return self._event("error", line)
+
+        return None
+
+    @staticmethod
+    def _event(event_type: str, line: bytes) -> Dict[str, Any]:
+        """构建事件，消息优先取 JSON 字段中的 error
+
+        Args:
+            event_type: 事件类型
+            line: 原始输出
+
+        Returns:
+            事件字典
+        """
+        line = _ANSI_PATTERN.sub(b"", line)
+        match = _ERROR_PATTERN.search(line)
+        if match:
+            message = match.group(1)
+        else:
+            fields = line.split(b"\t")
+            message = fields[2] if len(fields) > 2 else line
+        return {
+            "type": event_type,
+            "time": time.monotonic(),
+            "message": message.decode("utf-8", errors="replace")
+        }
+
+
+class NodeLogState:
+    """由日志事件维护的节点状态
+
+    status 为 starting、connected、disconnected 或 failed；认证失败和错误会记录在 failure 中，
+    就绪探测据此立即结束等待，不必等到进程退出。每次状态变化都会唤醒 wait 的调用方。
+    计数在进程重启后累计保留，状态和 failure 在重启时重置。
+    """
+
+    def __init__(self):
+        """初始化节点状态"""
+        self.status = "starting"
+        self.failure: Optional[str] = None
+        self.failure_type: Optional[str] = None
+        self.handshake_rtt: Optional[float] = None
+        self.reconnects = 0
+        self.disconnects = 0
+        self.auth_failures = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._changed = asyncio.Event()
+
+    def reset(self) -> None:
+        """进程重启时重置状态"""
+        self.status = "starting"
+        self.failure = None
+        self.failure_type = None
+        self._changed.set()
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        """根据事件更新状态
+
+        Args:
+            event: 解析器返回的事件
+        """
+        event_type = event["type"]
+        if event_type in ("connected", "reconnected"):
+            self.status = "connected"
+            if event_type == "reconnected":
+                self.reconnects += 1
+            elif event.get("rtt") is not None:
+                self.handshake_rtt = event["rtt"]
+        elif event_type == "disconnected":
+            self.status = "disconnected"
+            self.disconnects += 1
+        elif event_type == "auth_failed":
+            self.auth_failures += 1
+            self._fail(event_type, f"认证失败: {event['message']}")
+        elif event_type == "error":
+            self.errors += 1
+            self.last_error = event["message"]
+            # 连接建立之前的错误视为启动失败
+            if self.status == "starting":
+                self._fail(event_type, f"启动出错: {event['message']}")
+        self._changed.set()
+
+    def _fail(self, failure_type: str, message: str) -> None:
+        """记录失败
+
+        Args:
+            failure_type: 失败事件类型
+            message: 失败描述
+        """
+        self.status = "failed"
+        self.failure = message
+        self.failure_type = failure_type
+        self.last_error = message
+
+    async def wait(self, timeout: float) -> None:
+        """等待状态变化，最长等待 timeout 秒
+
+        Args:
+            timeout: 超时时间（秒）
+        """
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._changed.clear()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置清单模块，记录每个节点的稳定标识、分配的端口和配置内容哈希，用于增量生成配置文件
+"""
+
+import os
+import json
+import hashlib
+from typing import Dict, Any, Optional, Set
+
+
+class ConfigManifest:
+    """配置清单
+
+    以节点标识（类型、服务器、端口和认证信息的哈希）为键，记录节点分配到的端口、
+    配置文件名和配置内容哈希。订阅中节点顺序变化或增删时，未变化的节点保持端口不变，
+    内容未变化的配置文件也不会被重写。
+    """
+
+    FILENAME = ".manifest.json"
+    VERSION = 1
+
+    def __init__(self, output_dir: str):
+        """初始化配置清单
+
+        Args:
+            output_dir: 配置文件输出目录，清单文件保存在该目录下
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        # 上一次生成所用的订阅内容和参数的指纹，订阅返回 304 时据此判断能否跳过转换
+        self.source: Optional[str] = None
+        self.exists = os.path.exists(self.path)
+        self.load()
+
+    @staticmethod
+    def identity(proxy: Dict[str, Any]) -> str:
+        """计算节点的稳定标识
+
+        Args:
+            proxy: YAML 中的代理配置
+
+        Returns:
+            节点标识
+        """
+        key = [
+            proxy.get('type'),
+            proxy.get('server'),
+            proxy.get('port'),
+            proxy.get('ports'),
+            proxy.get('password') or proxy.get('uuid') or proxy.get('auth')
+        ]
+        return hashlib.sha1(json.dumps(key, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """计算配置内容的哈希
+
+        Args:
+            content: 序列化后的配置内容
+
+        Returns:
+            内容哈希
+        """
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def load(self) -> None:
+        """从磁盘加载清单，文件不存在或损坏时视为空清单"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.nodes = data.get('nodes', {})
+                self.source = data.get('source')
+        except (OSError, ValueError) as e:
+            print(f"读取配置清单 {self.path} 时出错，将重新生成: {e}")
+            self.nodes = {}
+            self.source = None
+
+    def save(self) -> None:
+        """原子地保存清单到磁盘"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'source': self.source, 'nodes': self.nodes}, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def get(self, identity: str) -> Optional[Dict[str, Any]]:
+        """获取节点记录
+
+        Args:
+            identity: 节点标识
+
+        Returns:
+            节点记录，不存在则返回 None
+        """
+        return self.nodes.get(identity)
+
+    def used_ports(self) -> Set[int]:
+        """获取清单中所有已分配的端口
+
+        Returns:
+            端口集合
+        """
+        ports = {entry['port'] for entry in self.nodes.values()}
+        ports.update(entry['socks_port'] for entry in self.nodes.values() if entry.get('socks_port'))
+        return ports
+
+    def is_unchanged(self, identity: str, filename: str, content_hash: str) -> bool:
+        """判断节点的配置文件是否无需重写
+
+        Args:
+            identity: 节点标识
+            filename: 配置文件名
+            content_hash: 新配置内容的哈希
+
+        Returns:
+            清单记录与新内容一致且文件仍存在时返回 True
+        """
+        entry = self.nodes.get(identity)
+        return (
+            entry is not None
+            and entry.get('file') == filename
+            and entry.get('hash') == content_hash
+            and os.path.exists(os.path.join(self.output_dir, filename))
+        )
+
+    def update(
+        self,
+        identity: str,
+        port: int,
+        filename: str,
+        content_hash: str,
+        name: str = None,
+        socks_port: int = None
+    ) -> None:
+        """更新节点记录
+
+        Args:
+            identity: 节点标识
+            port: 分配的主监听端口
+            filename: 配置文件名
+            content_hash: 配置内容哈希
+            name: 节点名称
+            socks_port: 同时监听 HTTP 和 SOCKS5 时分配的 SOCKS5 端口
+        """
+        self.nodes[identity] = {
+            'port': port,
+            'file': filename,
+            'hash': content_hash,
+            'name': name
+        }
+        if socks_port is not None:
+            self.nodes[identity]['socks_port'] = socks_port
+
+    def remove(self, identity: str) -> Optional[Dict[str, Any]]:
+        """移除节点记录
+
+        Args:
+            identity: 节点标识
+
+        Returns:
+            被移除的节点记录
+        """
+        return self.nodes.pop(identity, None)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+指标模块，以 Prometheus 文本格式暴露每个节点的运行指标
+"""
+
+import os
+import math
+import asyncio
+from typing import Dict, Any, List, Optional
+
+from .network import parse_listen_address, close_writer
+
+
+class NodeMetrics:
+    """按节点预分配槽位的指标存储
+
+    每个节点（以 HTTP 端口标识）在首次出现时分配一个槽位，之后的计数都是对列表固定下标的原地累加，
+    转发热路径上不创建字典或标签对象。RSS、CPU、重启次数等状态类指标在抓取时才从进程信息和 /proc 读取。
+    """
+
+    def __init__(self, capacity: int = 64):
+        """初始化指标存储
+
+        Args:
+            capacity: 预分配的槽位数量，不足时按倍数扩容
+        """
+        self._slots: Dict[int, int] = {}
+        self.names: List[Optional[str]] = []
+        self.ports: List[int] = []
+        self.ready: List[int] = []
+        self.time_to_ready: List[float] = []
+        self.bytes_sent: List[int] = []
+        self.bytes_received: List[int] = []
+        self.connections_total: List[int] = []
+        self.active_connections: List[int] = []
+        self._grow(capacity)
+
+    def _grow(self, capacity: int) -> None:
+        """把所有槽位列表扩容到 capacity
+
+        Args:
+            capacity: 新的槽位数量
+        """
+        extra = capacity - len(self.ports)
+        self.names.extend([None] * extra)
+        self.ports.extend([0] * extra)
+        self.ready.extend([0] * extra)
+        self.time_to_ready.extend([math.nan] * extra)
+        self.bytes_sent.extend([0] * extra)
+        self.bytes_received.extend([0] * extra)
+        self.connections_total.extend([0] * extra)
+        self.active_connections.extend([0] * extra)
+
+    def slot(self, port: int, name: str = None) -> int:
+        """获取节点的槽位，首次出现时分配
+
+        Args:
+            port: 节点 HTTP 端口
+            name: 节点名称，用作指标标签
+
+        Returns:
+            槽位下标
+        """
+        slot = self._slots.get(port)
+        if slot is None:
+            slot = len(self._slots)
+            if slot >= len(self.ports):
+                self._grow(len(self.ports) * 2)
+            self._slots[port] = slot
+            self.ports[slot] = port
+        if name and self.names[slot] != name:
+            self.names[slot] = name
+        return slot
+
+    def set_ready(self, port: int, name: str, time_to_ready: float) -> None:
+        """记录节点就绪
+
+        Args:
+            port: 节点 HTTP 端口
+            name: 节点名称
+            time_to_ready: 就绪耗时（秒）
+        """
+        slot = self.slot(port, name)
+        self.ready[slot] = 1
+        self.time_to_ready[slot] = time_to_ready
+
+    def set_down(self, port: int, name: str = None) -> None:
+        """记录节点未能就绪
+
+        Args:
+            port: 节点 HTTP 端口
+            name: 节点名称
+        """
+        self.ready[self.slot(port, name)] = 0
+
+    def render(self, process_manager=None) -> str:
+        """生成 Prometheus 文本格式的指标
+
+        Args:
+            process_manager: 进程管理器，提供存活状态、重启次数和 PID
+
+        Returns:
+            指标文本
+        """
+        processes = {}
+        if process_manager is not None:
+            processes = {process_info["port"]: process_info for process_info in process_manager.processes}
+
+        rows = []
+        for port, slot in self._slots.items():
+            process_info = processes.get(port)
+            process = process_info["process"] if process_info else None
+            alive = process is not None and process.returncode is None
+            labels = f'node="{_escape(self.names[slot] or str(port))}",port="{port}"'
+            usage = read_process_usage(process.pid) if alive else None
+            rows.append((slot, labels, alive, process_info, usage))
+
+        lines = []
+
+        def family(name: str, kind: str, help_text: str, values) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in values:
+                lines.append(f"{name}{{{labels}}} {_format_value(value)}")
+
+        family("proxy_converter_node_up", "gauge", "节点进程存活且已通过就绪探测",
+               [(labels, 1 if alive and self.ready[slot] else 0) for slot, labels, alive, _, _ in rows])
+        family("proxy_converter_node_time_to_ready_seconds", "gauge", "最近一次启动的就绪耗时",
+               [(labels, self.time_to_ready[slot]) for slot, labels, _, _, _ in rows])
+        family("proxy_converter_node_restarts_total", "counter", "节点进程被监督任务重启的次数",
+               [(labels, info["restarts"] if info else 0) for _, labels, _, info, _ in rows])
+        family("proxy_converter_node_reconnects_total", "counter", "节点日志中记录的重连次数",
+               [(labels, info["log_state"].reconnects) for _, labels, _, info, _ in rows if info and info.get("log_state")])
+        family("proxy_converter_node_auth_failures_total", "counter", "节点日志中记录的认证失败次数",
+               [(labels, info["log_state"].auth_failures) for _, labels, _, info, _ in rows if info and info.get("log_state")])
+        family("proxy_converter_node_resident_memory_bytes", "gauge", "节点进程的常驻内存",
+               [(labels, usage["rss"]) for _, labels, _, _, usage in rows if usage])
+        family("proxy_converter_node_cpu_seconds_total", "counter", "节点进程消耗的 CPU 时间",
+               [(labels, usage["cpu"]) for _, labels, _, _, usage in rows if usage])
+        family("proxy_converter_node_sent_bytes_total", "counter", "经负载均衡代理发往节点的字节数",
+               [(labels, self.bytes_sent[slot]) for slot, labels, _, _, _ in rows])
+        family("proxy_converter_node_received_bytes_total", "counter", "经负载均衡代理从节点收到的字节数",
+               [(labels, self.bytes_received[slot]) for slot, labels, _, _, _ in rows])
+        family("proxy_converter_node_connections_total", "counter", "经负载均衡代理转发到节点的连接数",
+               [(labels, self.connections_total[slot]) for slot, labels, _, _, _ in rows])
+        family("proxy_converter_node_active_connections", "gauge", "节点当前转发中的连接数",
+               [(labels, self.active_connections[slot]) for slot, labels, _, _, _ in rows])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """转义标签值中的特殊字符"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value) -> str:
+    """格式化指标值"""
+    if isinstance(value, float):
+        return "NaN" if math.isnan(value) else repr(value)
+    return str(value)
+
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_process_usage(pid: int) -> Optional[Dict[str, float]]:
+    """从 /proc 读取进程的常驻内存和累计 CPU 时间，仅 Linux 可用
+
+    Args:
+        pid: 进程 ID
+
+    Returns:
+        {"rss": 字节数, "cpu": 秒数}，无法读取时返回 None
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # 进程名可能包含空格，从最后一个右括号之后开始按空格切分，第一个字段是状态（总第 3 项）
+    fields = stat[stat.rfind(b")") + 2:].split()
+    try:
+        utime, stime, rss = int(fields[11]), int(fields[12]), int(fields[21])
+    except (IndexError, ValueError):
+        return None
+    return {"rss": rss * _PAGE_SIZE, "cpu": (utime + stime) / _CLOCK_TICKS}
+
+
+class MetricsServer:
+    """Prometheus 指标 HTTP 端点"""
+
+    def __init__(self, metrics: NodeMetrics, process_manager=None, listen: str = "127.0.0.1:9100"):
+        """初始化指标端点
+
+        Args:
+            metrics: 指标存储
+            process_manager: 进程管理器，提供进程状态
+            listen: 监听地址
+        """
+        self.metrics = metrics
+        self.process_manager = process_manager
+        self.listen = listen
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """开始监听"""
+        host, port = parse_listen_address(self.listen)
+        self._server = await asyncio.start_server(self._handle, host, port)
+        print(f"指标端点已启动: http://{host}:{port}/metrics")
+
+    async def stop(self) -> None:
+        """停止监听"""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            print("指标端点已停止")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理一次抓取请求
+
+        Args:
+            reader: 读取流
+            writer: 写入流
+        """
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5.0)
+            while (await asyncio.wait_for(reader.readline(), 5.0)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET" or parts[1].split("?")[0] not in ("/metrics", "/"):
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            else:
+                body = self.metrics.render(self.process_manager).encode("utf-8")
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    + f"Content-Length: {len(body)}\r\n".encode()
+                    + b"Connection: close\r\n\r\n"
+                    + body
+                )
+            await writer.drain()
+        except (OSError, asyncio.TimeoutError):
+            pass
+        finally:
+            await close_writer(writer)
@@ -5,7 +5,13 @@
 网络工具模块，包含网络相关的通用功能
 """
 
+import os
+import ssl
+import time
 import socket
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 # 这也是个耗时过程！
 def is_port_in_use(port: int) -> bool:
@@ -21,6 +27,221 @@ def is_port_in_use(port: int) -> bool:
         return s.connect_ex(('127.0.0.1', port)) == 0
 
 
+def parse_port_spec(spec: str) -> List[int]:
+    """解析端口列表描述，如 8080,8090-8095
+
+    Args:
+        spec: 以逗号分隔的端口或端口范围
+
+    Returns:
+        端口列表
+
+    Raises:
+        ValueError: 格式错误时抛出
+    """
+    ports = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "-" in item:
+            start, end = (int(part) for part in item.split("-", 1))
+            if start > end:
+                raise ValueError(f"端口范围起始值大于结束值: {item}")
+            ports.extend(range(start, end + 1))
+        else:
+            ports.append(int(item))
+    return ports
+
+
+def normalize_port_ranges(spec) -> str:
+    """规范化端口跳跃使用的端口列表，如 " 443, 20000-30000,25000-40000" 规范为 "443,20000-40000"
+
+    端口和范围按起始端口排序，重叠或相邻的范围会被合并；不展开范围，因此大范围也只占用常数内存。
+
+    Args:
+        spec: 以逗号分隔的端口或端口范围，也可以是单个整数
+
+    Returns:
+        规范化后的端口列表描述
+
+    Raises:
+        ValueError: 格式错误、端口超出 1-65535 或列表为空时抛出
+    """
+    ranges = []
+    for item in str(spec).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "-" in item:
+            start, end = (int(part) for part in item.split("-", 1))
+            if start > end:
+                start, end = end, start
+        else:
+            start = end = int(item)
+        if start < 1 or end > 65535:
+            raise ValueError(f"端口超出范围: {item}")
+        ranges.append((start, end))
+
+    if not ranges:
+        raise ValueError(f"端口列表为空: {spec!r}")
+
+    ranges.sort()
+    merged = [list(ranges[0])]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in merged)
+
+
+class PortAllocator:
+    """批量端口分配器
+
+    通过在本地地址上实际绑定来判断端口是否可用，一次遍历即可找到 N 个空闲端口。
+    分配出的端口会被记录，同一个分配器不会重复分配；reserve=True 时保留绑定的套接字，
+    直到调用 release 才释放，用于在子进程绑定前防止端口被其他程序抢占。
+    """
+
+    def __init__(
+        self,
+        start_port: int = 8080,
+        end_port: int = 65535,
+        exclude: Iterable[int] = None,
+        host: str = "127.0.0.1"
+    ):
+        """初始化端口分配器
+
+        Args:
+            start_port: 可分配端口范围的起始值
+            end_port: 可分配端口范围的结束值（包含）
+            exclude: 不参与分配的端口
+            host: 绑定检测使用的地址
+        """
+        self.start_port = start_port
+        self.end_port = end_port
+        self.exclude = set(exclude or [])
+        self.host = host
+        self.assigned = set()
+        self.reserved: Dict[int, socket.socket] = {}
+        self._cursor = start_port
+
+    def _try_bind(self, port: int) -> Optional[socket.socket]:
+        """尝试绑定端口
+
+        Args:
+            port: 端口
+
+        Returns:
+            绑定成功的套接字，失败时返回 None
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # 与 Go 等运行时保持一致，允许绑定处于 TIME_WAIT 的端口；Windows 上该选项语义不同，不设置
+        if os.name != "nt":
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((self.host, port))
+            return sock
+        except OSError:
+            sock.close()
+            return None
+
+    def is_free(self, port: int) -> bool:
+        """检查端口当前是否可以绑定
+
+        Args:
+            port: 端口
+
+        Returns:
+            是否可以绑定
+        """
+        sock = self._try_bind(port)
+        if sock is None:
+            return False
+        sock.close()
+        return True
+
+    def allocate(self, count: int, reserve: bool = False, exclude: Iterable[int] = None) -> List[int]:
+        """分配 count 个空闲端口
+
+        从上次分配结束的位置继续向后查找，到达范围末尾后回到起始位置，整个范围最多遍历一次。
+
+        Args:
+            count: 需要的端口数量
+            reserve: 是否保留绑定的套接字直到 release
+            exclude: 本次额外排除的端口
+
+        Returns:
+            端口列表，范围内空闲端口不足时返回的数量少于 count
+        """
+        skipped = self.exclude | self.assigned | set(exclude or [])
+        ports = []
+        range_size = self.end_port - self.start_port + 1
+        port = self._cursor
+        for _ in range(range_size):
+            if len(ports) >= count:
+                break
+            candidate = port
+            port = self.start_port if port >= self.end_port else port + 1
+            if candidate in skipped:
+                continue
+            sock = self._try_bind(candidate)
+            if sock is None:
+                continue
+            if reserve:
+                # 只绑定不监听的套接字挡不住同样设置了 SO_REUSEADDR 的程序，因此进入监听状态
+                sock.listen(1)
+                self.reserved[candidate] = sock
+            else:
+                sock.close()
+            ports.append(candidate)
+        self._cursor = port
+
+        self.assigned.update(ports)
+        if len(ports) < count:
+            print(f"警告：在 {self.start_port} 到 {self.end_port} 范围内只找到 {len(ports)}/{count} 个可用端口")
+        return ports
+
+    def claim(self, port: int) -> bool:
+        """登记一个由配置指定的端口
+
+        Args:
+            port: 端口
+
+        Returns:
+            端口未被本分配器分配过且当前可以绑定时返回 True，并将其登记为已分配
+        """
+        if port in self.assigned or not self.is_free(port):
+            return False
+        self.assigned.add(port)
+        return True
+
+    def unassign(self, port: int) -> None:
+        """注销已分配的端口，使其可以再次被分配或登记
+
+        Args:
+            port: 端口
+        """
+        self.release(port)
+        self.assigned.discard(port)
+
+    def release(self, port: int) -> None:
+        """释放为端口保留的套接字，让子进程可以绑定
+
+        Args:
+            port: 端口
+        """
+        sock = self.reserved.pop(port, None)
+        if sock is not None:
+            sock.close()
+
+    def release_all(self) -> None:
+        """释放所有保留的套接字"""
+        for port in list(self.reserved):
+            self.release(port)
+
+
 async def find_available_port(start_port: int = 8080) -> int:
     """查找可用端口
 
@@ -30,11 +251,356 @@ async def find_available_port(start_port: int = 8080) -> int:
     Returns:
         可用的端口号
     """
-    port = start_port
-    while is_port_in_use(port):
-        port += 1
-        # 避免无限循环，设置上限
-        if port > start_port + 1000:
-            print(f"警告：无法在 {start_port} 到 {start_port + 1000} 范围内找到可用端口")
-            return 0
-    return port
+    ports = PortAllocator(start_port, min(start_port + 1000, 65535)).allocate(1)
+    return ports[0] if ports else 0
+
+
+def parse_listen_address(listen: str) -> Tuple[str, int]:
+    """解析监听地址，返回可用于本地连接的主机和端口
+
+    Args:
+        listen: 监听地址，如 127.0.0.1:8080、:8080 或 0.0.0.0:8080
+
+    Returns:
+        (主机, 端口) 元组，通配地址会被替换为 127.0.0.1
+
+    Raises:
+        ValueError: 地址无法解析时抛出
+    """
+    host, _, port_str = listen.rpartition(":")
+    port = int(port_str)
+    host = host.strip("[]")
+    if host in ("", "0.0.0.0", "::"):
+        host = "127.0.0.1"
+    return host, port
+
+
+LISTENER_PROTOCOLS = ("http", "socks5")
+
+
+def config_listeners(config: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """获取配置中的本地代理监听
+
+    Args:
+        config: Hysteria2 配置
+
+    Returns:
+        (协议, 监听地址) 列表，按 http、socks5 的顺序，第一个为节点的主监听
+    """
+    return [
+        (protocol, config[protocol]["listen"])
+        for protocol in LISTENER_PROTOCOLS
+        if isinstance(config.get(protocol), dict) and config[protocol].get("listen")
+    ]
+
+
+async def close_writer(writer: asyncio.StreamWriter) -> None:
+    """关闭流写入端，忽略对端已断开导致的错误
+
+    Args:
+        writer: 流写入端
+    """
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except (OSError, ConnectionError):
+        pass
+
+
+async def probe_listener(host: str, port: int, timeout: float = 1.0) -> bool:
+    """使用非阻塞连接探测监听端口是否已开始接受连接
+
+    Args:
+        host: 主机地址
+        port: 端口
+        timeout: 连接超时时间（秒）
+
+    Returns:
+        端口是否已可连接
+    """
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    await close_writer(writer)
+    return True
+
+
+async def open_http_tunnel(
+    proxy_host: str,
+    proxy_port: int,
+    target: str,
+    timeout: float = 5.0
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """通过 HTTP 代理发起 CONNECT 请求，建立到目标地址的隧道
+
+    Args:
+        proxy_host: 代理主机
+        proxy_port: 代理端口
+        target: 目标地址，格式为 host:port
+        timeout: 整个握手过程的超时时间（秒）
+
+    Returns:
+        隧道建立后的 (reader, writer)
+
+    Raises:
+        ConnectionError: 代理返回非 2xx 状态码时抛出
+        OSError: 连接失败时抛出
+        asyncio.TimeoutError: 握手超时时抛出
+    """
+    async def handshake():
+        reader, writer = await asyncio.open_connection(proxy_host, proxy_port)
+        try:
+            writer.write(f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n\r\n".encode("ascii"))
+            await writer.drain()
+            status_line = await reader.readline()
+            parts = status_line.decode("latin-1").split(None, 2)
+            if len(parts) < 2 or not parts[1].startswith("2"):
+                raise ConnectionError(f"CONNECT {target} 失败: {status_line.decode('latin-1').strip() or '连接被关闭'}")
+            # 跳过剩余的响应头
+            while True:
+                line = await reader.readline()
+                if not line or line in (b"\r\n", b"\n"):
+                    break
+            return reader, writer
+        except BaseException:
+            writer.close()
+            raise
+
+    return await asyncio.wait_for(handshake(), timeout)
+
+
+def _socks5_connect_request(target: str) -> bytes:
+    """构建 SOCKS5 CONNECT 请求，目标地址以域名形式发送，由代理解析
+
+    Args:
+        target: 目标地址，格式为 host:port
+
+    Returns:
+        请求字节
+    """
+    host, _, port = target.rpartition(":")
+    host = host.strip("[]").encode("idna")
+    return b"\x05\x01\x00\x03" + bytes([len(host)]) + host + int(port).to_bytes(2, "big")
+
+
+def _socks5_address_length(atyp: int, first_byte: int) -> int:
+    """计算 SOCKS5 应答中绑定地址剩余部分的长度（含端口）
+
+    Args:
+        atyp: 地址类型
+        first_byte: 地址的第一个字节
+
+    Returns:
+        在已读取第一个字节之后还需读取的字节数
+    """
+    if atyp == 1:
+        return 3 + 2
+    if atyp == 4:
+        return 15 + 2
+    return first_byte + 2
+
+
+async def open_socks5_tunnel(
+    proxy_host: str,
+    proxy_port: int,
+    target: str,
+    timeout: float = 5.0
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """通过 SOCKS5 代理（无认证）发起 CONNECT，建立到目标地址的隧道
+
+    Args:
+        proxy_host: 代理主机
+        proxy_port: 代理端口
+        target: 目标地址，格式为 host:port
+        timeout: 整个握手过程的超时时间（秒）
+
+    Returns:
+        隧道建立后的 (reader, writer)
+
+    Raises:
+        ConnectionError: 代理拒绝请求时抛出
+        OSError: 连接失败时抛出
+        asyncio.TimeoutError: 握手超时时抛出
+    """
+    async def handshake():
+        reader, writer = await asyncio.open_connection(proxy_host, proxy_port)
+        try:
+            writer.write(b"\x05\x01\x00")
+            await writer.drain()
+            if await reader.readexactly(2) != b"\x05\x00":
+                raise ConnectionError("SOCKS5 代理要求不支持的认证方式")
+            writer.write(_socks5_connect_request(target))
+            await writer.drain()
+            _, reply, _, atyp, first_byte = await reader.readexactly(5)
+            if reply != 0:
+                raise ConnectionError(f"SOCKS5 CONNECT {target} 失败，应答码: {reply}")
+            await reader.readexactly(_socks5_address_length(atyp, first_byte))
+            return reader, writer
+        except asyncio.IncompleteReadError:
+            writer.close()
+            raise ConnectionError(f"SOCKS5 CONNECT {target} 失败: 连接被关闭")
+        except BaseException:
+            writer.close()
+            raise
+
+    return await asyncio.wait_for(handshake(), timeout)
+
+
+async def open_proxy_tunnel(
+    protocol: str,
+    proxy_host: str,
+    proxy_port: int,
+    target: str,
+    timeout: float = 5.0
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """按监听协议通过本地代理建立到目标地址的隧道
+
+    Args:
+        protocol: 代理协议，http 或 socks5
+        proxy_host: 代理主机
+        proxy_port: 代理端口
+        target: 目标地址，格式为 host:port
+        timeout: 整个握手过程的超时时间（秒）
+
+    Returns:
+        隧道建立后的 (reader, writer)
+    """
+    if protocol == "socks5":
+        return await open_socks5_tunnel(proxy_host, proxy_port, target, timeout)
+    return await open_http_tunnel(proxy_host, proxy_port, target, timeout)
+
+
+async def _sock_recv_exactly(loop: asyncio.AbstractEventLoop, sock: socket.socket, size: int) -> bytes:
+    """从非阻塞套接字读取恰好 size 个字节
+
+    Args:
+        loop: 事件循环
+        sock: 非阻塞套接字
+        size: 需要读取的字节数
+
+    Returns:
+        读取到的数据
+
+    Raises:
+        ConnectionError: 读满之前连接被关闭时抛出
+    """
+    data = b""
+    while len(data) < size:
+        chunk = await loop.sock_recv(sock, size - len(data))
+        if not chunk:
+            raise ConnectionError("连接被关闭")
+        data += chunk
+    return data
+
+
+async def _sock_proxy_connect(
+    loop: asyncio.AbstractEventLoop,
+    sock: socket.socket,
+    protocol: str,
+    target: str
+) -> None:
+    """在已连接到代理的原始套接字上完成 CONNECT 握手
+
+    Args:
+        loop: 事件循环
+        sock: 已连接到代理的非阻塞套接字
+        protocol: 代理协议，http 或 socks5
+        target: 目标地址，格式为 host:port
+
+    Raises:
+        ConnectionError: 代理拒绝请求或连接被关闭时抛出
+    """
+    if protocol == "socks5":
+        await loop.sock_sendall(sock, b"\x05\x01\x00")
+        if await _sock_recv_exactly(loop, sock, 2) != b"\x05\x00":
+            raise ConnectionError("SOCKS5 代理要求不支持的认证方式")
+        await loop.sock_sendall(sock, _socks5_connect_request(target))
+        _, reply, _, atyp, first_byte = await _sock_recv_exactly(loop, sock, 5)
+        if reply != 0:
+            raise ConnectionError(f"SOCKS5 CONNECT {target} 失败，应答码: {reply}")
+        await _sock_recv_exactly(loop, sock, _socks5_address_length(atyp, first_byte))
+        return
+
+    await loop.sock_sendall(sock, f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n\r\n".encode("ascii"))
+    response = b""
+    while b"\r\n\r\n" not in response:
+        chunk = await loop.sock_recv(sock, 4096)
+        if not chunk:
+            raise ConnectionError(f"CONNECT {target} 失败: 连接被关闭")
+        response += chunk
+    status_line = response.split(b"\r\n", 1)[0].decode("latin-1")
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[1].startswith("2"):
+        raise ConnectionError(f"CONNECT {target} 失败: {status_line}")
+
+
+async def measure_proxy_latency(
+    proxy_host: str,
+    proxy_port: int,
+    url: str,
+    timeout: float = 5.0,
+    protocol: str = "http"
+) -> Dict[str, float]:
+    """通过本地代理访问目标 URL，测量握手延迟和首字节时间
+
+    先通过 CONNECT 建立到目标主机的隧道（https 时在隧道内完成 TLS 握手），
+    再发送 GET 请求并等待响应的第一个字节。
+
+    Args:
+        proxy_host: 代理主机
+        proxy_port: 代理端口
+        url: 目标 URL，支持 http 和 https
+        timeout: 整个测量过程的超时时间（秒）
+        protocol: 代理协议，http 或 socks5
+
+    Returns:
+        包含 handshake（隧道及 TLS 建立耗时）和 ttfb（发送请求到收到首字节的耗时）的字典
+
+    Raises:
+        ConnectionError: 代理拒绝 CONNECT 或目标未返回数据时抛出
+        OSError: 连接失败时抛出
+        asyncio.TimeoutError: 测量超时时抛出
+    """
+    parsed = urlsplit(url)
+    host = parsed.hostname
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    path = parsed.path or "/"
+    if parsed.query:
+        path += f"?{parsed.query}"
+
+    async def measure():
+        loop = asyncio.get_running_loop()
+        start_time = time.monotonic()
+
+        # 在原始套接字上完成 CONNECT，之后可以直接在同一个套接字上叠加 TLS
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, (proxy_host, proxy_port))
+            await _sock_proxy_connect(loop, sock, protocol, f"{host}:{port}")
+
+            ssl_context = ssl.create_default_context() if parsed.scheme == "https" else None
+            reader, writer = await asyncio.open_connection(
+                sock=sock,
+                ssl=ssl_context,
+                server_hostname=host if ssl_context else None
+            )
+        except BaseException:
+            sock.close()
+            raise
+        handshake = time.monotonic() - start_time
+
+        try:
+            request_time = time.monotonic()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode("ascii"))
+            await writer.drain()
+            if not await reader.read(1):
+                raise ConnectionError(f"{url} 未返回任何数据")
+            ttfb = time.monotonic() - request_time
+        finally:
+            await close_writer(writer)
+
+        return {"handshake": handshake, "ttfb": ttfb}
+
+    return await asyncio.wait_for(measure(), timeout)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+就绪探测模块，用于判断本地代理监听端口何时真正可用
+"""
+
+import time
+import asyncio
+from typing import Dict, Any, Optional
+
+from .network import probe_listener, open_proxy_tunnel, close_writer
+from .log_events import NodeLogState
+
+
+class ReadinessProbe:
+    """节点就绪探测器
+
+    分两个阶段探测：
+    1. listen：以非阻塞连接轮询本地监听端口，直到端口开始接受连接
+    2. tunnel：通过本地代理（HTTP 或 SOCKS5）向探测目标发起 CONNECT，确认到服务器的隧道已可用
+
+    任一阶段成功后立即进入下一阶段，全部通过即返回，不做多余等待。
+    轮询间隔从 initial_interval 开始指数增长，最大不超过 max_interval。
+    提供节点的日志状态时，两次轮询之间等待状态变化而不是固定休眠：日志中出现连接成功时立即再次探测，
+    出现认证失败或启动错误时立即返回失败，不必等到进程退出。
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        probe_target: Optional[str] = "www.gstatic.com:443",
+        initial_interval: float = 0.01,
+        max_interval: float = 0.2,
+        attempt_timeout: float = 3.0
+    ):
+        """初始化就绪探测器
+
+        Args:
+            timeout: 每个节点的就绪截止时间（秒）
+            probe_target: 端到端 CONNECT 的目标地址（host:port），为空则只探测本地监听
+            initial_interval: 初始轮询间隔（秒）
+            max_interval: 最大轮询间隔（秒）
+            attempt_timeout: 单次探测的超时时间（秒）
+        """
+        self.timeout = timeout
+        self.probe_target = probe_target
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.attempt_timeout = attempt_timeout
+
+    async def wait_ready(
+        self,
+        host: str,
+        port: int,
+        process: Optional[asyncio.subprocess.Process] = None,
+        protocol: str = "http",
+        log_state: Optional[NodeLogState] = None
+    ) -> Dict[str, Any]:
+        """等待节点就绪
+
+        Args:
+            host: 本地监听主机
+            port: 本地监听端口
+            process: 对应的子进程，进程退出时立即停止探测
+            protocol: 本地监听的代理协议，http 或 socks5
+            log_state: 由子进程日志事件维护的节点状态
+
+        Returns:
+            探测结果，包含 ready、stage、time_to_ready 以及失败时的 error
+        """
+        start_time = time.monotonic()
+        deadline = start_time + self.timeout
+        interval = self.initial_interval
+        stage = "listen"
+        last_error = None
+
+        while True:
+            if log_state is not None and log_state.failure:
+                return {
+                    "ready": False,
+                    "stage": stage,
+                    "elapsed": time.monotonic() - start_time,
+                    "error": log_state.failure
+                }
+            
+            if process is not None and process.returncode is not None:
+                return {
+                    "ready": False,
+                    "stage": stage,
+                    "elapsed": time.monotonic() - start_time,
+                    "error": f"进程已退出，退出码: {process.returncode}"
+                }
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                error = f"等待就绪超时（{self.timeout:.1f}秒），阶段: {stage}"
+                if last_error:
+                    error += f"，最后错误: {last_error}"
+                return {
+                    "ready": False,
+                    "stage": stage,
+                    "elapsed": time.monotonic() - start_time,
+                    "error": error
+                }
+
+            attempt_timeout = min(self.attempt_timeout, remaining)
+            if stage == "listen":
+                if await probe_listener(host, port, attempt_timeout):
+                    if not self.probe_target:
+                        break
+                    # 监听已就绪，立即进入隧道探测阶段
+                    stage = "tunnel"
+                    interval = self.initial_interval
+                    continue
+            else:
+                try:
+                    _, writer = await open_proxy_tunnel(protocol, host, port, self.probe_target, attempt_timeout)
+                    await close_writer(writer)
+                    break
+                except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+                    last_error = str(e) or type(e).__name__
+
+            delay = min(interval, max(0.0, deadline - time.monotonic()))
+            if log_state is not None:
+                await log_state.wait(delay)
+            else:
+                await asyncio.sleep(delay)
+            interval = min(interval * 2, self.max_interval)
+
+        elapsed = time.monotonic() - start_time
+        return {
+            "ready": True,
+            "stage": stage,
+            "elapsed": elapsed,
+            "time_to_ready": elapsed
+        }
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+资源控制模块，为子进程设置 CPU 亲和性、调度优先级和 cgroup v2 资源限制
+"""
+
+import os
+import shutil
+from typing import Dict, Any, List, Optional, Callable
+
+
+class ResourceLimiter:
+    """子进程资源控制器
+
+    - CPU 亲和性：按放置策略把每个子进程绑定到当前负载最低的核心上，使子进程均匀分布在可用核心之间
+    - nice / ionice：降低子进程的 CPU 和 IO 调度优先级，给同机的其他程序让出资源
+    - cgroup v2：为每个子进程创建独立的 cgroup，限制其内存和 CPU 配额
+
+    亲和性、nice 和 cgroup 在子进程 exec 之前（preexec_fn）设置，子进程从启动开始就受到限制；
+    ionice 通过 ionice 命令前缀实现。这些功能仅在 Linux 上可用，其他平台会忽略并给出提示。
+    """
+
+    def __init__(
+        self,
+        cpu_affinity: bool = False,
+        cpus_per_child: int = 1,
+        nice: Optional[int] = None,
+        ionice_class: Optional[int] = None,
+        ionice_level: Optional[int] = None,
+        cgroup_memory: Optional[str] = None,
+        cgroup_cpu: Optional[float] = None,
+        cgroup_root: str = "/sys/fs/cgroup/proxy_converter"
+    ):
+        """初始化资源控制器
+
+        Args:
+            cpu_affinity: 是否为子进程绑定 CPU 核心
+            cpus_per_child: 每个子进程绑定的核心数
+            nice: 子进程的 nice 值，None 表示不修改
+            ionice_class: ionice 调度类别，1 实时、2 尽力而为、3 空闲，None 表示不修改
+            ionice_level: ionice 优先级（0-7），仅对类别 1 和 2 有效
+            cgroup_memory: 每个子进程的内存上限，写入 memory.max，如 256M
+            cgroup_cpu: 每个子进程可使用的 CPU 核数上限，如 0.5
+            cgroup_root: 存放子进程 cgroup 的 cgroup v2 目录
+        """
+        self.cpu_affinity = cpu_affinity and hasattr(os, "sched_setaffinity")
+        self.cpus_per_child = max(1, cpus_per_child)
+        self.nice = nice
+        self.ionice_command = self._build_ionice_command(ionice_class, ionice_level)
+        self.cgroup_memory = cgroup_memory
+        self.cgroup_cpu = cgroup_cpu
+        self.cgroup_root = cgroup_root
+        self.cgroups_enabled = bool(cgroup_memory or cgroup_cpu) and self._prepare_cgroup_root()
+
+        if cpu_affinity and not self.cpu_affinity:
+            print("警告：当前平台不支持设置 CPU 亲和性，已忽略")
+
+        # 每个核心上已放置的子进程数量
+        self.cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+        self.cpu_load = {cpu: 0 for cpu in self.cpus}
+        self.placements: Dict[Any, Dict[str, Any]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用了任何资源控制
+
+        Returns:
+            是否启用
+        """
+        return bool(self.cpu_affinity or self.nice is not None or self.ionice_command or self.cgroups_enabled)
+
+    @staticmethod
+    def _build_ionice_command(ionice_class: Optional[int], ionice_level: Optional[int]) -> List[str]:
+        """构建 ionice 命令前缀
+
+        Args:
+            ionice_class: 调度类别
+            ionice_level: 优先级
+
+        Returns:
+            命令前缀，未设置或系统中没有 ionice 命令时返回空列表
+        """
+        if ionice_class is None:
+            return []
+        ionice = shutil.which("ionice")
+        if not ionice:
+            print("警告：找不到 ionice 命令，已忽略 IO 优先级设置")
+            return []
+        command = [ionice, "-c", str(ionice_class)]
+        if ionice_level is not None and ionice_class in (1, 2):
+            command += ["-n", str(ionice_level)]
+        return command
+
+    def _prepare_cgroup_root(self) -> bool:
+        """创建 cgroup 根目录并启用 memory 和 cpu 控制器
+
+        Returns:
+            是否可以使用 cgroup
+        """
+        try:
+            parent = os.path.dirname(self.cgroup_root.rstrip("/"))
+            if not os.path.exists(os.path.join(parent, "cgroup.controllers")):
+                raise OSError(f"{parent} 不是 cgroup v2 目录")
+            os.makedirs(self.cgroup_root, exist_ok=True)
+            controllers = []
+            if self.cgroup_memory:
+                controllers.append("+memory")
+            if self.cgroup_cpu:
+                controllers.append("+cpu")
+            with open(os.path.join(self.cgroup_root, "cgroup.subtree_control"), "w") as f:
+                f.write(" ".join(controllers))
+            return True
+        except OSError as e:
+            print(f"警告：无法使用 cgroup 目录 {self.cgroup_root}，已忽略资源限制: {e}")
+            return False
+
+    def assign(self, key: Any) -> Dict[str, Any]:
+        """为子进程分配资源放置方案
+
+        同一个 key（如节点端口）重复分配时返回已有方案，重启后的进程仍使用相同的核心和 cgroup。
+
+        Args:
+            key: 子进程标识
+
+        Returns:
+            放置方案，包含 cpus 和 cgroup
+        """
+        if key in self.placements:
+            return self.placements[key]
+
+        placement = {"cpus": [], "cgroup": None}
+        if self.cpu_affinity:
+            # 选择当前负载最低的核心，负载相同时选编号较小的
+            cpus = sorted(self.cpus, key=lambda cpu: (self.cpu_load[cpu], cpu))[:self.cpus_per_child]
+            for cpu in cpus:
+                self.cpu_load[cpu] += 1
+            placement["cpus"] = cpus
+
+        if self.cgroups_enabled:
+            placement["cgroup"] = self._create_cgroup(key)
+
+        self.placements[key] = placement
+        return placement
+
+    def _create_cgroup(self, key: Any) -> Optional[str]:
+        """为子进程创建 cgroup 并写入限制
+
+        Args:
+            key: 子进程标识
+
+        Returns:
+            cgroup 目录，创建失败时返回 None
+        """
+        path = os.path.join(self.cgroup_root, f"node-{key}")
+        try:
+            os.makedirs(path, exist_ok=True)
+            if self.cgroup_memory:
+                with open(os.path.join(path, "memory.max"), "w") as f:
+                    f.write(str(self.cgroup_memory))
+            if self.cgroup_cpu:
+                period = 100000
+                with open(os.path.join(path, "cpu.max"), "w") as f:
+                    f.write(f"{int(self.cgroup_cpu * period)} {period}")
+            return path
+        except OSError as e:
+            print(f"警告：创建 cgroup {path} 失败: {e}")
+            return None
+
+    def release(self, key: Any) -> None:
+        """释放子进程的放置方案
+
+        Args:
+            key: 子进程标识
+        """
+        placement = self.placements.pop(key, None)
+        if placement is None:
+            return
+        for cpu in placement["cpus"]:
+            self.cpu_load[cpu] -= 1
+        if placement["cgroup"]:
+            try:
+                # cgroup 中的进程全部退出后才能删除
+                os.rmdir(placement["cgroup"])
+            except OSError:
+                pass
+
+    def wrap_command(self, cmd: List[str]) -> List[str]:
+        """为命令加上 ionice 前缀
+
+        Args:
+            cmd: 原始命令
+
+        Returns:
+            实际执行的命令
+        """
+        return self.ionice_command + cmd if self.ionice_command else cmd
+
+    def preexec_fn(self, placement: Dict[str, Any]) -> Optional[Callable[[], None]]:
+        """构建在子进程 exec 前执行的设置函数
+
+        Args:
+            placement: 放置方案
+
+        Returns:
+            设置函数，没有需要在子进程中设置的项目时返回 None
+        """
+        cpus = placement["cpus"]
+        cgroup = placement["cgroup"]
+        nice = self.nice
+        if not cpus and not cgroup and nice is None:
+            return None
+
+        def apply():
+            # 先加入 cgroup，后续设置和 exec 出的程序都受限制
+            if cgroup:
+                with open(os.path.join(cgroup, "cgroup.procs"), "w") as f:
+                    f.write(str(os.getpid()))
+            if cpus:
+                os.sched_setaffinity(0, cpus)
+            if nice is not None:
+                os.setpriority(os.PRIO_PROCESS, 0, nice)
+
+        return apply
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+运行文件模块，记录正在运行的连接进程，供 status 和 stop 子命令查找
+"""
+
+import os
+import json
+import time
+from typing import Dict, Any, List, Optional
+
+
+class RunFile:
+    """连接进程的运行文件
+
+    connect 建立连接后把自身 PID 和各节点的端口、子进程 PID 写入配置目录下的 .run.json，
+    退出时删除。其他命令据此判断连接是否仍在运行，并向其发送终止信号。
+    """
+
+    FILENAME = ".run.json"
+
+    def __init__(self, config_dir: str):
+        """初始化运行文件
+
+        Args:
+            config_dir: 配置文件目录，运行文件保存在该目录下
+        """
+        self.config_dir = config_dir
+        self.path = os.path.join(config_dir, self.FILENAME)
+
+    def write(self, nodes: List[Dict[str, Any]]) -> None:
+        """原子地写入当前进程的运行信息
+
+        Args:
+            nodes: 节点列表，每项包含 port、config_file 和 pid
+        """
+        os.makedirs(self.config_dir, exist_ok=True)
+        data = {
+            'pid': os.getpid(),
+            'started_at': time.time(),
+            'nodes': nodes
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """读取运行信息
+
+        Returns:
+            运行信息，文件不存在或无法解析时返回 None
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def remove(self) -> None:
+        """删除运行文件，只删除由当前进程写入的文件"""
+        data = self.read()
+        if data is None or data.get('pid') != os.getpid():
+            return
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def is_alive(pid: int) -> bool:
+        """检查进程是否仍在运行
+
+        Args:
+            pid: 进程 ID
+
+        Returns:
+            是否在运行
+        """
+        if os.name == "nt":
+            # Windows 上 os.kill(pid, 0) 会发送 CTRL_C_EVENT，改为查询进程退出码
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                return False
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            kernel32.CloseHandle(handle)
+            return exit_code.value == 259  # STILL_ACTIVE
+
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # 进程存在但属于其他用户
+            return True
+        except OSError:
+            return False
+        return True
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+运行状态存储模块，记录端口、配置文件、服务器、节点名称和最近健康状态之间的对应关系
+"""
+
+import os
+import json
+import time
+from typing import Dict, Any, List, Optional
+
+
+class StateStore:
+    """节点运行状态存储
+
+    状态保存在配置目录下的 .state.json 中，由 ProxyConverter 在生成配置后写入，
+    连接阶段更新节点的健康状态。加载后在内存中按端口、配置文件名和服务器建立索引，
+    双向查找都是 O(1)，不再需要列目录或用正则从文件名中解析端口。
+    写入时先写临时文件再替换，读取方不会看到写了一半的状态。
+    """
+
+    FILENAME = ".state.json"
+    VERSION = 1
+
+    def __init__(self, config_dir: str):
+        """初始化状态存储
+
+        Args:
+            config_dir: 配置文件目录，状态文件保存在该目录下
+        """
+        self.config_dir = config_dir
+        self.path = os.path.join(config_dir, self.FILENAME)
+        self.nodes: Dict[int, Dict[str, Any]] = {}
+        self._by_file: Dict[str, int] = {}
+        self._by_server: Dict[str, List[int]] = {}
+        self.load()
+
+    def exists(self) -> bool:
+        """状态文件是否存在
+
+        Returns:
+            是否存在
+        """
+        return os.path.exists(self.path)
+
+    def load(self) -> None:
+        """从磁盘加载状态并重建索引"""
+        self.nodes = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == self.VERSION:
+                    self.nodes = {int(port): node for port, node in data.get('nodes', {}).items()}
+            except (OSError, ValueError) as e:
+                print(f"读取状态文件 {self.path} 时出错: {e}")
+        self._rebuild_index()
+
+    def save(self) -> None:
+        """原子地保存状态到磁盘"""
+        os.makedirs(self.config_dir, exist_ok=True)
+        data = {
+            'version': self.VERSION,
+            'nodes': {str(port): node for port, node in sorted(self.nodes.items())}
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def _rebuild_index(self) -> None:
+        """重建配置文件名和服务器索引"""
+        self._by_file = {}
+        self._by_server = {}
+        for port, node in self.nodes.items():
+            self._index_node(port, node)
+
+    def _index_node(self, port: int, node: Dict[str, Any]) -> None:
+        """将节点加入索引
+
+        Args:
+            port: 端口
+            node: 节点状态
+        """
+        self._by_file[node['file']] = port
+        self._by_server.setdefault(node.get('server'), []).append(port)
+
+    def replace_nodes(self, nodes: List[Dict[str, Any]]) -> None:
+        """用新生成的节点列表替换状态，保留仍存在节点的健康信息
+
+        Args:
+            nodes: 节点列表，每项包含 port、config_file、server 和 name，同时监听 SOCKS5 时还包含 socks_port
+        """
+        previous = self.nodes
+        self.nodes = {}
+        for node in nodes:
+            port = node['port']
+            entry = {
+                'port': port,
+                'file': os.path.basename(node['config_file']),
+                'server': node.get('server'),
+                'name': node.get('name'),
+                'health': None
+            }
+            if node.get('socks_port'):
+                entry['socks_port'] = node['socks_port']
+            old = previous.get(port)
+            if old and old.get('file') == entry['file'] and old.get('server') == entry['server']:
+                entry['health'] = old.get('health')
+            self.nodes[port] = entry
+        self._rebuild_index()
+
+    def ports(self) -> List[int]:
+        """获取所有节点的端口
+
+        Returns:
+            排序后的端口列表
+        """
+        return sorted(self.nodes)
+
+    def config_path(self, port: int) -> Optional[str]:
+        """根据端口获取配置文件路径
+
+        Args:
+            port: 端口
+
+        Returns:
+            配置文件路径，不存在则返回 None
+        """
+        node = self.nodes.get(port)
+        return os.path.join(self.config_dir, node['file']) if node else None
+
+    def get_by_port(self, port: int) -> Optional[Dict[str, Any]]:
+        """根据端口获取节点状态
+
+        Args:
+            port: 端口
+
+        Returns:
+            节点状态，不存在则返回 None
+        """
+        return self.nodes.get(port)
+
+    def get_by_config(self, config_file: str) -> Optional[Dict[str, Any]]:
+        """根据配置文件获取节点状态
+
+        Args:
+            config_file: 配置文件路径或文件名
+
+        Returns:
+            节点状态，不存在则返回 None
+        """
+        port = self._by_file.get(os.path.basename(config_file))
+        return self.nodes.get(port) if port is not None else None
+
+    def get_by_server(self, server: str) -> List[Dict[str, Any]]:
+        """根据服务器地址获取节点状态
+
+        Args:
+            server: 服务器地址，与配置中的 server 字段一致
+
+        Returns:
+            节点状态列表
+        """
+        return [self.nodes[port] for port in self._by_server.get(server, [])]
+
+    def update_health(self, config_file: str, status: str, **details: Any) -> None:
+        """更新节点的健康状态，调用方负责在批量更新后调用 save
+
+        Args:
+            config_file: 配置文件路径或文件名
+            status: 健康状态，如 up、down
+            details: 附加信息，如 time_to_ready、error
+        """
+        node = self.get_by_config(config_file)
+        if node is None:
+            return
+        node['health'] = dict(details, status=status, checked_at=time.time())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+订阅下载模块，使用 ETag/Last-Modified 条件请求和 gzip 下载订阅，并在磁盘上缓存响应
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import urllib.error
+import urllib.request
+from typing import Dict, Any, Optional
+
+from .cache import get_cache_dir
+
+
+def is_subscription_url(source: str) -> bool:
+    """判断订阅来源是否为 HTTP(S) 地址
+
+    Args:
+        source: 订阅文件路径或地址
+
+    Returns:
+        是否为 HTTP(S) 地址
+    """
+    return source.lower().startswith(("http://", "https://"))
+
+
+class FetchResult:
+    """订阅下载结果"""
+
+    def __init__(self, path: str, not_modified: bool, sha256: str, from_cache: bool = False):
+        """初始化下载结果
+
+        Args:
+            path: 订阅内容在本地缓存中的路径
+            not_modified: 服务器是否返回 304（内容与缓存一致）
+            sha256: 订阅内容哈希
+            from_cache: 是否因下载失败而使用了旧的缓存内容
+        """
+        self.path = path
+        self.not_modified = not_modified
+        self.sha256 = sha256
+        self.from_cache = from_cache
+
+
+class SubscriptionFetcher:
+    """订阅下载器
+
+    每个订阅地址在缓存目录中对应一个响应体文件和一个元数据文件，元数据记录 ETag、
+    Last-Modified 和内容哈希。再次下载时携带 If-None-Match / If-Modified-Since，
+    服务器返回 304 时直接使用缓存的响应体；下载失败但有缓存时同样回退到缓存内容。
+    """
+
+    VERSION = 1
+    USER_AGENT = "clash.meta proxy-converter/1.0"
+
+    def __init__(self, cache_dir: str = None, timeout: float = 30.0, conditional: bool = True):
+        """初始化订阅下载器
+
+        Args:
+            cache_dir: 响应缓存目录，不指定则使用默认缓存目录
+            timeout: 请求超时时间（秒）
+            conditional: 是否发送条件请求，False 时总是完整下载
+        """
+        self.cache_dir = cache_dir or get_cache_dir()
+        self.timeout = timeout
+        self.conditional = conditional
+
+    def _paths(self, url: str):
+        """获取订阅地址对应的响应体和元数据文件路径
+
+        Args:
+            url: 订阅地址
+
+        Returns:
+            (响应体路径, 元数据路径)
+        """
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, f"subscription-{key}")
+        return f"{base}.yaml", f"{base}.json"
+
+    def _read_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        """读取订阅的缓存元数据，响应体缺失时视为没有缓存
+
+        Args:
+            url: 订阅地址
+
+        Returns:
+            元数据，不存在或损坏时返回 None
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != self.VERSION or meta.get('url') != url or not os.path.exists(body_path):
+            return None
+        return meta
+
+    def _write(self, url: str, body: bytes, headers) -> str:
+        """原子地写入响应体和元数据
+
+        Args:
+            url: 订阅地址
+            body: 解压后的响应体
+            headers: 响应头
+
+        Returns:
+            响应体的 SHA-256
+        """
+        body_path, meta_path = self._paths(url)
+        sha256 = hashlib.sha256(body).hexdigest()
+        meta = {
+            'version': self.VERSION,
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'sha256': sha256,
+            'size': len(body),
+            'fetched_at': time.time()
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for path, data in ((body_path, body), (meta_path, json.dumps(meta, indent=4).encode('utf-8'))):
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return sha256
+
+    def fetch(self, url: str) -> FetchResult:
+        """下载订阅，内容未变化时使用缓存
+
+        Args:
+            url: 订阅地址
+
+        Returns:
+            下载结果
+
+        Raises:
+            OSError: 下载失败且没有可用缓存时抛出
+        """
+        body_path, _ = self._paths(url)
+        meta = self._read_meta(url)
+
+        headers = {'User-Agent': self.USER_AGENT, 'Accept-Encoding': 'gzip'}
+        if meta and self.conditional:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        start_time = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout) as response:
+                body = response.read()
+                if response.headers.get('Content-Encoding', '').lower() == 'gzip':
+                    body = gzip.decompress(body)
+                sha256 = self._write(url, body, response.headers)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and meta:
+                print(f"订阅未变化（304），使用缓存内容（耗时: {time.perf_counter() - start_time:.3f}秒）")
+                return FetchResult(body_path, True, meta['sha256'])
+            if meta:
+                print(f"下载订阅失败（HTTP {e.code}），使用上次缓存的内容")
+                return FetchResult(body_path, False, meta['sha256'], from_cache=True)
+            raise OSError(f"下载订阅失败: HTTP {e.code}") from e
+        except (urllib.error.URLError, OSError) as e:
+            if meta:
+                print(f"下载订阅失败（{e}），使用上次缓存的内容")
+                return FetchResult(body_path, False, meta['sha256'], from_cache=True)
+            raise OSError(f"下载订阅失败: {e}") from e
+
+        print(f"已下载订阅 {len(body)} 字节（耗时: {time.perf_counter() - start_time:.3f}秒）")
+        return FetchResult(body_path, False, sha256)